@@ -0,0 +1,7 @@
+"""
+Benchmark suite of the simulation engine, distributions, sampling and charts.
+
+Run with ``python -m benchmarks run`` from the repository root; see
+:mod:`benchmarks.__main__` for the commands and :mod:`benchmarks.runner`
+for how benchmarks are written.
+"""
@@ -0,0 +1,73 @@
+"""
+Command line of the benchmark suite.
+
+    python -m benchmarks run [--filter TEXT] [--quick] [--output FILE]
+    python -m benchmarks compare BASE.json HEAD.json [--threshold 1.1]
+    python -m benchmarks list [--filter TEXT]
+
+Results are written to ``.benchmarks/<commit>.json`` unless ``--output``
+is given. Compare results from the same machine only.
+"""
+import os
+import sys
+import argparse
+from . import runner
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Engine benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="time the benchmarks and save the results")
+    run.add_argument("--filter", help="only cases whose name contains this text")
+    run.add_argument("--quick", action="store_true", help="time every case once, as a smoke test")
+    run.add_argument("--min-time", type=float, default=1.0, help="seconds per case at least")
+    run.add_argument("--output", help="result file")
+
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("base")
+    compare.add_argument("head")
+    compare.add_argument("--threshold", type=float, default=1.1, help="ratio that counts as a change")
+
+    listing = commands.add_parser("list", help="list the benchmark cases")
+    listing.add_argument("--filter", help="only cases whose name contains this text")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for case in runner.discover(args.filter):
+            print(case.name)
+        return 0
+
+    if args.command == "run":
+        cases = runner.discover(args.filter)
+        width = max((len(case.name) for case in cases), default=0)
+
+        def report(name, result):
+            line = f"{name:<{width}}  {result['median'] * 1e3:10.3f} ms"
+            if "items_per_second" in result:
+                line += f"  {result['items_per_second']:12.4g} /s"
+            print(line, flush=True)
+
+        if args.quick:
+            document = runner.run(cases, 0.0, 1, 1, report)
+        else:
+            document = runner.run(cases, args.min_time, report=report)
+        output = args.output or os.path.join(
+            runner.ROOT, ".benchmarks", f"{(document['commit'] or 'results')[:12]}.json"
+        )
+        runner.save(document, output)
+        print(f"Saved {len(cases)} results to {output}")
+        return 0
+
+    base, head = runner.load(args.base), runner.load(args.head)
+    if base["machine"] != head["machine"]:
+        print("Warning: the results come from different machines or library versions", file=sys.stderr)
+    rows = list(runner.compare(base, head, args.threshold))
+    width = max((len(row[0]) for row in rows), default=0)
+    for name, before, after, ratio, change in rows:
+        print(f"{name:<{width}}  {before * 1e3:10.3f}  {after * 1e3:10.3f} ms  {ratio:6.2f}x  {change}")
+    slower = sum(change == "slower" for *_, change in rows)
+    print(f"{len(rows)} cases compared, {slower} slower beyond {args.threshold}x")
+    return 1 if slower else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Building the result charts (rendering to a file is not included).
+"""
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import Gamma, Normal, Uniform
+from src.utils.statistics import StatsAccumulator
+from src.visualization import create_histogram, create_scatter_matrix, create_tornado_chart
+
+class Histogram:
+    """Histogram and density of raw results and of a streamed accumulator."""
+    params = [["array", "accumulator"], [100_000, 10_000_000]]
+    param_names = ["source", "iterations"]
+
+    def setup(self, source, iterations):
+        data = np.random.default_rng(0).lognormal(0, 0.5, iterations)
+        self.data = data if source == "array" else StatsAccumulator(bins=1024).update(data)
+
+    def time_create_histogram(self, source, iterations):
+        create_histogram(self.data)
+
+    def teardown(self, source, iterations):
+        plt.close("all")
+
+class Tornado:
+    """Tornado chart from a run that kept its inputs."""
+    params = [100_000, 1_000_000]
+    param_names = ["iterations"]
+
+    def setup(self, iterations):
+        config = SimulationConfig(iterations=iterations, seed=0, keep_inputs=True)
+        self.results = MonteCarloEngine(config).run_simulation(
+            "a * b - c", {"a": Normal(10, 2), "b": Uniform(1, 3), "c": Gamma(2.0, 1.0)}
+        )
+
+    def time_create_tornado_chart(self, iterations):
+        create_tornado_chart(self.results)
+
+    def teardown(self, iterations):
+        plt.close("all")
+
+class ScatterMatrix:
+    """Scatter matrix with sampled points and with binned densities."""
+    params = [[10_000, 1_000_000], [4, 10]]
+    param_names = ["iterations", "variables"]
+
+    def setup(self, iterations, variables):
+        rng = np.random.default_rng(0)
+        self.data = {f"v{i}": rng.standard_normal(iterations) for i in range(variables)}
+
+    def time_create_scatter_matrix(self, iterations, variables):
+        create_scatter_matrix(self.data)
+
+    def teardown(self, iterations, variables):
+        plt.close("all")
@@ -0,0 +1,50 @@
+"""
+Inverse CDF throughput of every distribution type, and distribution fitting.
+"""
+import numpy as np
+from src.distributions import fit_distribution, get_distribution
+from src.distributions.frozen import DISTRIBUTIONS
+
+# Parameters of each get_distribution type
+PARAMS = {
+    "normal": [0, 1],
+    "lognormal": [0, 0.5],
+    "uniform": [0, 1],
+    "triangular": [0, 1, 3],
+    "beta": [2, 5],
+    "gamma": [2, 1],
+    "weibull": [1.5, 1],
+    "custom": [np.linspace(0, 10, 50), np.linspace(0, 1, 50)],
+}
+
+SIZE = 1_000_000
+
+class Ppf:
+    """Transforming uniforms in place, as the engine does."""
+    params = sorted(DISTRIBUTIONS)
+    param_names = ["distribution"]
+
+    def setup(self, distribution):
+        self.dist = get_distribution(distribution, PARAMS[distribution])
+        self.uniforms = np.random.default_rng(0).random(SIZE)
+        self.out = np.empty(SIZE)
+
+    def time_ppf(self, distribution):
+        self.dist.ppf(self.uniforms, out=self.out)
+
+    def items(self, distribution):
+        return SIZE
+
+class Fit:
+    """Fitting one family, and automatic selection among all of them."""
+    params = [["normal", "gamma", "auto"], [10_000, 100_000]]
+    param_names = ["dist_type", "samples"]
+
+    def setup(self, dist_type, samples):
+        self.data = np.random.default_rng(0).gamma(2.0, 1.5, samples)
+
+    def time_fit_distribution(self, dist_type, samples):
+        fit_distribution(self.data, dist_type)
+
+    def items(self, dist_type, samples):
+        return samples
@@ -0,0 +1,84 @@
+"""
+Throughput of MonteCarloEngine.run_simulation.
+"""
+import numpy as np
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import Gamma, Normal, Triangular, Uniform
+
+def _inputs(num_vars):
+    """A mix of cheap and expensive inverse CDFs."""
+    kinds = (Normal(0, 1), Uniform(0, 1), Triangular(0, 1, 3), Gamma(2.0, 1.0))
+    return {f"x{i}": kinds[i % len(kinds)] for i in range(num_vars)}
+
+def _correlation(num_vars):
+    """Equicorrelated matrix, positive definite for any size."""
+    matrix = np.full((num_vars, num_vars), 0.3)
+    np.fill_diagonal(matrix, 1.0)
+    return matrix
+
+def _total(**inputs):
+    return sum(inputs.values())
+
+class Iterations:
+    """Scaling with the iteration and variable counts."""
+    params = [[10_000, 100_000, 1_000_000], [2, 20]]
+    param_names = ["iterations", "variables"]
+
+    def setup(self, iterations, variables):
+        self.inputs = _inputs(variables)
+        self.config = SimulationConfig(iterations=iterations, seed=0)
+
+    def time_run_simulation(self, iterations, variables):
+        MonteCarloEngine(self.config).run_simulation(_total, self.inputs)
+
+    def items(self, iterations, variables):
+        return iterations
+
+class Threads:
+    """Scaling with the number of worker threads."""
+    params = [1, 2, 4, 8]
+    param_names = ["threads"]
+
+    def setup(self, threads):
+        self.inputs = _inputs(10)
+        self.config = SimulationConfig(iterations=1_000_000, seed=0, num_threads=threads)
+
+    def time_run_simulation(self, threads):
+        MonteCarloEngine(self.config).run_simulation(_total, self.inputs)
+
+    def items(self, threads):
+        return 1_000_000
+
+class Sampling:
+    """Samplers, with and without correlated inputs."""
+    params = [["random", "lhs", "sobol"], [False, True]]
+    param_names = ["sampler", "correlated"]
+
+    def setup(self, sampler, correlated):
+        self.inputs = _inputs(10)
+        self.correlation = _correlation(10) if correlated else None
+        self.config = SimulationConfig(iterations=200_000, seed=0, sampler=sampler)
+
+    def time_run_simulation(self, sampler, correlated):
+        MonteCarloEngine(self.config).run_simulation(_total, self.inputs, self.correlation)
+
+    def items(self, sampler, correlated):
+        return 200_000
+
+class Formula:
+    """Compiled model formula against the equivalent Python function."""
+    params = ["formula", "function"]
+    param_names = ["model"]
+
+    def setup(self, model):
+        self.inputs = _inputs(4)
+        self.model = "x0 * x1 + x2 / (1 + x3)" if model == "formula" else (
+            lambda x0, x1, x2, x3: x0 * x1 + x2 / (1 + x3)
+        )
+        self.config = SimulationConfig(iterations=1_000_000, seed=0)
+
+    def time_run_simulation(self, model):
+        MonteCarloEngine(self.config).run_simulation(self.model, self.inputs)
+
+    def items(self, model):
+        return 1_000_000
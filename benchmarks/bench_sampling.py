@@ -0,0 +1,38 @@
+"""
+Uniform sample generation.
+"""
+import numpy as np
+from src.utils.sampling import SAMPLERS, get_sampler, latin_hypercube_blocks, latin_hypercube_sampling
+
+class LatinHypercube:
+    """One Latin Hypercube design, whole and in blocks."""
+    params = [[100_000, 1_000_000], [5, 50]]
+    param_names = ["samples", "dims"]
+
+    def setup(self, samples, dims):
+        self.out = np.empty((samples, dims), order="F")
+
+    def time_latin_hypercube_sampling(self, samples, dims):
+        latin_hypercube_sampling(samples, dims, np.random.default_rng(0), out=self.out)
+
+    def time_latin_hypercube_blocks(self, samples, dims):
+        for _ in latin_hypercube_blocks(samples, dims, 65536, np.random.default_rng(0)):
+            pass
+
+    def items(self, samples, dims):
+        return samples * dims
+
+class SampleChunk:
+    """Drawing one engine chunk with every sampler."""
+    params = sorted(SAMPLERS)
+    param_names = ["sampler"]
+
+    def setup(self, sampler):
+        self.sampler = get_sampler(sampler, 10, np.random.default_rng(0))
+        self.seed = np.random.SeedSequence(0)
+
+    def time_sample_chunk(self, sampler):
+        self.sampler.sample_chunk(1_000_000, 500_000, 565_536, self.seed)
+
+    def items(self, sampler):
+        return 65536 * 10
@@ -0,0 +1,203 @@
+"""
+Discovery, timing and comparison of benchmarks.
+
+Benchmarks follow the asv conventions: classes in ``bench_*.py`` modules
+with ``time_*`` methods, parametrized by the class attributes ``params``
+(one list of values per parameter) and ``param_names``. The optional
+``setup`` and ``teardown`` methods receive the same parameters and are not
+timed; an optional ``items`` method returns the work done per call (e.g.
+iterations simulated), from which a throughput is reported.
+"""
+import os
+import json
+import time
+import inspect
+import platform
+import itertools
+import statistics
+import subprocess
+import importlib
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Bumped whenever the result file layout changes
+FORMAT = 1
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@dataclass
+class Case:
+    """One benchmark method with one combination of parameters."""
+    name: str
+    cls: type
+    method: str
+    params: Tuple
+
+def discover(pattern: Optional[str] = None) -> List[Case]:
+    """Benchmark cases of every ``bench_*`` module, optionally filtered.
+
+    Args:
+        pattern: Substring the case names must contain
+
+    Returns:
+        Cases in module, class, method and parameter order
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    cases = []
+    for filename in sorted(os.listdir(directory)):
+        if not (filename.startswith("bench_") and filename.endswith(".py")):
+            continue
+        module = importlib.import_module(f"{__package__}.{filename[:-3]}")
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for method in sorted(name for name in dir(cls) if name.startswith("time_")):
+                for params in _combinations(cls):
+                    name = f"{filename[6:-3]}.{cls_name}.{method}{_label(cls, params)}"
+                    if pattern is None or pattern in name:
+                        cases.append(Case(name, cls, method, params))
+    return cases
+
+def time_case(
+    case: Case,
+    min_time: float = 1.0,
+    min_repeat: int = 3,
+    max_repeat: int = 20
+) -> Dict[str, Any]:
+    """Time one case after a warm-up call.
+
+    Calls are repeated until ``min_repeat`` calls and ``min_time`` seconds
+    are done, or ``max_repeat`` calls.
+
+    Returns:
+        Timing statistics in seconds, with the throughput if known
+    """
+    instance = case.cls()
+    if hasattr(instance, "setup"):
+        instance.setup(*case.params)
+    try:
+        func = getattr(instance, case.method)
+        func(*case.params)
+        samples = []
+        started = time.perf_counter()
+        while len(samples) < max_repeat and (
+            len(samples) < min_repeat or time.perf_counter() - started < min_time
+        ):
+            start = time.perf_counter()
+            func(*case.params)
+            samples.append(time.perf_counter() - start)
+        result = {
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "mean": statistics.fmean(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "repeat": len(samples),
+        }
+        if hasattr(instance, "items"):
+            result["items_per_second"] = instance.items(*case.params) / result["median"]
+        return result
+    finally:
+        if hasattr(instance, "teardown"):
+            instance.teardown(*case.params)
+
+def run(
+    cases: List[Case],
+    min_time: float = 1.0,
+    min_repeat: int = 3,
+    max_repeat: int = 20,
+    report: Callable[[str, Dict[str, Any]], None] = lambda name, result: None
+) -> Dict[str, Any]:
+    """Time every case and describe the environment they ran in.
+
+    Args:
+        cases: Cases from :func:`discover`
+        min_time: Seconds to spend on each case at least
+        min_repeat: Timed calls per case at least
+        max_repeat: Timed calls per case at most
+        report: Called with each case's name and result as it completes
+
+    Returns:
+        Result document, as written by :func:`save`
+    """
+    results = {}
+    for case in cases:
+        results[case.name] = time_case(case, min_time, min_repeat, max_repeat)
+        report(case.name, results[case.name])
+    return {
+        "format": FORMAT,
+        "created": time.time(),
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "machine": machine(),
+        "results": results,
+    }
+
+def machine() -> Dict[str, Any]:
+    """Facts about the machine and libraries that timings depend on."""
+    return {
+        "node": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+def save(document: Dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(document, f, indent=1, sort_keys=True)
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a benchmark result file of format {FORMAT}")
+    return document
+
+def compare(
+    base: Dict[str, Any],
+    head: Dict[str, Any],
+    threshold: float = 1.1
+) -> Iterator[Tuple[str, float, float, float, str]]:
+    """Median times of the cases in both result documents.
+
+    Args:
+        base: Earlier results
+        head: Later results
+        threshold: Ratio of medians beyond which a case counts as slower
+            (or, inverted, faster)
+
+    Yields:
+        (name, base median, head median, ratio, "slower"/"faster"/"")
+    """
+    for name in sorted(set(base["results"]) & set(head["results"])):
+        before = base["results"][name]["median"]
+        after = head["results"][name]["median"]
+        ratio = after / before if before > 0 else float("inf")
+        change = "slower" if ratio > threshold else "faster" if ratio < 1 / threshold else ""
+        yield name, before, after, ratio, change
+
+def _combinations(cls: type) -> Iterator[Tuple]:
+    params = getattr(cls, "params", None)
+    if params is None:
+        return iter([()])
+    if params and not isinstance(params[0], (list, tuple)):
+        # A single parameter may be given as a plain list
+        params = [params]
+    return itertools.product(*params)
+
+def _label(cls: type, params: Tuple) -> str:
+    if not params:
+        return ""
+    names = getattr(cls, "param_names", None) or [f"p{i}" for i in range(len(params))]
+    return "(" + ", ".join(f"{name}={value!r}" for name, value in zip(names, params)) + ")"
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -3,12 +3,13 @@ from setuptools import setup, find_packages
 setup(
     name="monte_carlo_excel",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks"]),
     install_requires=[
         "numpy>=1.24.0",
         "pandas>=2.0.0",
         "scipy>=1.10.0",
         "xlwings>=0.30.0",
+        "openpyxl>=3.1.0",
         "statsmodels>=0.14.0",
         "scikit-learn>=1.2.0",
         "arch>=5.0.0",
@@ -19,6 +20,9 @@ setup(
         "plotly>=5.13.0",
     ],
     extras_require={
+        "fast": [
+            "numexpr>=2.8.0",
+        ],
         "dev": [
             "pytest>=7.3.0",
             "pytest-cov>=4.0.0",
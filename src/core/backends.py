@@ -0,0 +1,218 @@
+"""
+Execution backends for evaluating simulation models over input chunks.
+"""
+import numpy as np
+from contextlib import nullcontext
+from collections import deque
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+
+BACKENDS = ("thread", "process", "serial")
+
+def chunk_bounds(n: int, num_chunks: int) -> List[Tuple[int, int]]:
+    """Split ``n`` iterations into at most ``num_chunks`` contiguous ranges.
+
+    Args:
+        n: Total number of iterations
+        num_chunks: Desired number of chunks
+
+    Returns:
+        List of (start, stop) index pairs covering ``range(n)``
+    """
+    chunk_size = max(1, -(-n // max(1, num_chunks)))
+    return [(i, min(i + chunk_size, n)) for i in range(0, n, chunk_size)]
+
+def open_executor(
+    backend: str,
+    max_workers: int
+) -> ContextManager[Optional[Executor]]:
+    """Create the worker pool for a backend.
+
+    The returned context manager yields ``None`` for the serial backend.
+    Reusing one pool across several :func:`run_chunks` calls avoids paying
+    the pool start-up cost per block.
+
+    Args:
+        backend: One of "thread", "process" or "serial"
+        max_workers: Maximum number of worker threads or processes
+
+    Returns:
+        Context manager yielding the executor
+    """
+    if backend == "serial":
+        return nullcontext(None)
+    elif backend == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers)
+    elif backend == "process":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        raise ValueError(f"Unknown execution backend: {backend}")
+
+def run_chunks(
+    backend: str,
+    model: Callable[..., np.ndarray],
+    input_data: Dict[str, np.ndarray],
+    bounds: List[Tuple[int, int]],
+    executor: Optional[Executor] = None
+) -> List[np.ndarray]:
+    """Evaluate a model over chunks of input data with the selected backend.
+
+    Every backend evaluates exactly the same chunks, so for a given set of
+    inputs the results are identical whichever backend is used.
+
+    Args:
+        backend: One of "thread", "process" or "serial"
+        model: Function that takes input samples and returns output
+        input_data: Dictionary mapping variable names to transformed samples
+        bounds: (start, stop) index pairs of the chunks to evaluate
+        executor: Pool from :func:`open_executor`; a pool with one worker
+            per chunk is created for this call if omitted
+
+    Returns:
+        List of per-chunk model results, in chunk order
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown execution backend: {backend}")
+        
+    if backend == "serial":
+        return [
+            model(**_slice_inputs(input_data, start, stop))
+            for start, stop in bounds
+        ]
+        
+    if executor is None:
+        with open_executor(backend, len(bounds)) as executor:
+            return run_chunks(backend, model, input_data, bounds, executor)
+            
+    if backend == "thread":
+        futures = [
+            executor.submit(model, **_slice_inputs(input_data, start, stop))
+            for start, stop in bounds
+        ]
+        return [f.result() for f in futures]
+    else:
+        return _run_process_chunks(model, input_data, bounds, executor)
+
+def run_tasks(
+    backend: str,
+    func: Callable[..., Any],
+    tasks: Sequence[Tuple],
+    executor: Optional[Executor] = None
+) -> Iterator[Any]:
+    """Call ``func(*task)`` for every task with the selected backend.
+
+    Unlike :func:`run_chunks` nothing is shared up front: each task carries
+    everything its worker needs, so for the process backend ``func`` and
+    the task arguments must be picklable. Results are yielded in task order
+    as soon as they are available and are not retained afterwards, so the
+    caller can store each one before the next arrives.
+
+    Args:
+        backend: One of "thread", "process" or "serial"
+        func: Function to call; module-level for the process backend
+        tasks: Argument tuples, one per call
+        executor: Pool from :func:`open_executor`; a pool with one worker
+            per task is created for this call if omitted
+
+    Yields:
+        Result of each call, in task order
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown execution backend: {backend}")
+        
+    if backend == "serial":
+        for task in tasks:
+            yield func(*task)
+        return
+        
+    if executor is None:
+        with open_executor(backend, len(tasks)) as executor:
+            yield from run_tasks(backend, func, tasks, executor)
+        return
+        
+    futures = deque(executor.submit(func, *task) for task in tasks)
+    try:
+        while futures:
+            yield futures.popleft().result()
+    finally:
+        # Abandoned early: drop the calls that have not started
+        for future in futures:
+            future.cancel()
+
+def _slice_inputs(
+    input_data: Dict[str, np.ndarray],
+    start: int,
+    stop: int
+) -> Dict[str, np.ndarray]:
+    """Return views of every input variable for one chunk."""
+    return {name: data[start:stop] for name, data in input_data.items()}
+
+def _run_process_chunks(
+    model: Callable[..., np.ndarray],
+    input_data: Dict[str, np.ndarray],
+    bounds: List[Tuple[int, int]],
+    executor: Executor
+) -> List[np.ndarray]:
+    """Evaluate chunks in worker processes reading inputs from shared memory.
+
+    The transformed inputs are copied once into a single shared memory block;
+    workers only receive the block name, its layout and their chunk bounds,
+    so no per-chunk input arrays are pickled. The model itself must be
+    picklable (e.g. a module-level function).
+    """
+    layout = []
+    offset = 0
+    for name, data in input_data.items():
+        data = np.asarray(data)
+        if data.dtype.hasobject:
+            raise TypeError(
+                f"Input '{name}' has object dtype and cannot be shared "
+                "with worker processes"
+            )
+        # Keep every column aligned for its dtype
+        offset = -(-offset // data.dtype.alignment) * data.dtype.alignment
+        layout.append((name, data.dtype.str, len(data), offset))
+        offset += data.nbytes
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, offset))
+    try:
+        for (name, dtype, n, off), data in zip(layout, input_data.values()):
+            np.ndarray((n,), dtype=dtype, buffer=shm.buf, offset=off)[:] = data
+
+        futures = [
+            executor.submit(_process_chunk, model, shm.name, layout, start, stop)
+            for start, stop in bounds
+        ]
+        # Let every worker finish with the block before it is unlinked
+        wait(futures)
+        return [f.result() for f in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+def _process_chunk(
+    model: Callable[..., np.ndarray],
+    shm_name: str,
+    layout: List[Tuple[str, str, int, int]],
+    start: int,
+    stop: int
+) -> np.ndarray:
+    """Worker entry point: attach to shared inputs and evaluate one chunk."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    chunk_data = {}
+    try:
+        chunk_data = {
+            name: np.ndarray((n,), dtype=dtype, buffer=shm.buf, offset=off)[start:stop]
+            for name, dtype, n, off in layout
+        }
+        # Copy so the result never references the shared block after close
+        return np.array(model(**chunk_data))
+    finally:
+        chunk_data.clear()
+        try:
+            shm.close()
+        except BufferError:
+            # A traceback from a failing model may still hold chunk views;
+            # the mapping is released together with them.
+            pass
@@ -0,0 +1,408 @@
+"""
+Content-addressed disk cache of simulation results.
+
+A run is identified by a hash of everything that determines its outputs:
+the input distributions, correlation matrix and method, the model, the
+sampler, seed and chunking, and (unless runs of the setup extend each
+other) the iteration count. Results and input samples are stored as
+``.npy`` files and memory-mapped on a hit, so a repeated run returns
+without sampling or reading the arrays up front. When only the iteration
+count went up, the cached run is extended with the missing iterations
+(see :meth:`MonteCarloEngine.extend_simulation`).
+
+Entries are evicted least recently used first once the cache outgrows its
+size limit.
+"""
+import os
+import json
+import glob
+import uuid
+import types
+import marshal
+import hashlib
+import numpy as np
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from ..distributions.frozen import Distribution
+from ..utils.statistics import StatsAccumulator
+from .expressions import ModelExpression
+from .results import SimulationResult
+from .simulation import MonteCarloEngine, _input_columns
+
+# Cache location, overridable per user
+DEFAULT_CACHE_DIR = os.environ.get("MCSIM_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".mcsim", "cache"
+)
+
+# Bumped whenever the stored layout or the engine's streams change
+_FORMAT = 1
+
+class ResultCache:
+    """Disk cache of simulation results keyed by the run's content.
+
+    Only reproducible runs are cached: the engine must have a seed, no
+    stopping criterion or tolerance, and must not have run before, since
+    every run continues its random streams; the model and distributions
+    must be identifiable from their code and data (or the model given a
+    ``model_key``). Other runs are simply simulated.
+
+    Attributes:
+        hits: Runs answered from the cache
+        extended: Runs completed from a cached run of another length
+        misses: Runs simulated from scratch and stored
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = 1 << 30
+    ):
+        """Open (or create) a cache directory.
+
+        Args:
+            directory: Where entries are stored; defaults to
+                :data:`DEFAULT_CACHE_DIR`
+            max_bytes: Size limit of the stored arrays
+        """
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.extended = 0
+        self.misses = 0
+
+    def run(
+        self,
+        engine: MonteCarloEngine,
+        model: Callable[..., np.ndarray],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray] = None,
+        use_lhs: bool = False,
+        model_key: Optional[str] = None
+    ) -> Tuple[SimulationResult, Dict[str, float]]:
+        """Run a simulation on ``engine``, or answer it from the cache.
+
+        Args:
+            engine: Engine configured for the run, not used for any run yet
+            model: Function that takes input samples and returns output, or
+                a formula over the input names
+            input_distributions: Dictionary mapping variable names to their sampling functions
+            correlation_matrix: Optional rank correlation matrix of the input variables
+            use_lhs: Whether to use Latin Hypercube Sampling
+            model_key: Identity of the model, for models whose code does
+                not identify them (e.g. formulas read from a workbook)
+
+        Returns:
+            Results, memory-mapped from the cache, and their summary
+            statistics. Results answered from the cache were not run, so
+            their ``run_stats`` and the engine's ``last_stats`` are None;
+            runs that were simulated or extended carry their timing.
+        """
+        config = engine.config
+        key = None
+        if (
+            config.seed is not None
+            and config.stopping_criteria is None
+            and config.tolerance is None
+            and engine.seed_sequence.n_children_spawned == 0
+        ):
+            key = self._key(engine, model, input_distributions, correlation_matrix, use_lhs, model_key)
+        if key is None:
+            results = engine.run_simulation(model, input_distributions, correlation_matrix, use_lhs)
+            return results, StatsAccumulator().update(results).summary()
+
+        entry = self._load(key)
+        iterations = config.iterations
+        # Fewer iterations are a prefix of the stored run if they end on a
+        # chunk boundary; otherwise their last chunk is drawn differently
+        if entry is not None and (
+            entry["iterations"] == iterations
+            or (entry["iterations"] > iterations and iterations % config.chunk_size == 0)
+        ):
+            self.hits += 1
+            self._touch(key)
+            engine.last_stats = None
+            results = self._result(entry, input_distributions, iterations)
+            if entry["iterations"] == iterations:
+                return results, entry["summary"]
+            return results, StatsAccumulator().update(results).summary()
+
+        if entry is not None:
+            self.extended += 1
+            self._touch(key)
+            previous = self._result(entry, input_distributions, entry["iterations"])
+            results = engine.extend_simulation(
+                model, input_distributions, previous, correlation_matrix, use_lhs
+            )
+            del previous
+            if len(results) < entry["iterations"]:
+                # Keep the longer run stored
+                return results, StatsAccumulator().update(results).summary()
+        else:
+            self.misses += 1
+            results = engine.run_simulation(model, input_distributions, correlation_matrix, use_lhs)
+        summary = StatsAccumulator().update(results).summary()
+        entry = self._store(key, results, summary)
+        self._evict(keep=key)
+        results = self._result(entry, input_distributions, iterations)
+        results.run_stats = engine.last_stats
+        return results, summary
+
+    def key(
+        self,
+        engine: MonteCarloEngine,
+        model: Callable[..., np.ndarray],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray] = None,
+        use_lhs: bool = False,
+        model_key: Optional[str] = None
+    ) -> str:
+        """Hex digest identifying the outputs of a run."""
+        key = self._key(engine, model, input_distributions, correlation_matrix, use_lhs, model_key)
+        if key is None:
+            raise ValueError("Cannot identify the model or distributions for caching; pass a model_key")
+        return key
+
+    def _key(
+        self,
+        engine: MonteCarloEngine,
+        model: Callable[..., np.ndarray],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray],
+        use_lhs: bool,
+        model_key: Optional[str]
+    ) -> Optional[str]:
+        """The cache key, or None if the model or a distribution cannot be identified."""
+        config = engine.config
+        inputs = [[name, _identity(dist)] for name, dist in input_distributions.items()]
+        model = model_key if model_key is not None else _identity(model)
+        if model is None or any(identity is None for _, identity in inputs):
+            return None
+        spec = {
+            "format": _FORMAT,
+            "inputs": inputs,
+            "correlation": None if correlation_matrix is None else np.asarray(correlation_matrix, dtype=float).tolist(),
+            "correlation_method": config.correlation_method,
+            "model": model,
+            "sampler": "lhs" if use_lhs else config.sampler,
+            # numpy integers are valid seeds but not JSON
+            "seed": None if config.seed is None else int(config.seed),
+            "chunk_size": config.chunk_size,
+            "replicates": config.replicates,
+            "keep_inputs": config.keep_inputs,
+            # Runs that extend each other share one entry
+            "iterations": None if engine.can_extend(use_lhs) else config.iterations,
+        }
+        return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+    @property
+    def size(self) -> int:
+        """Bytes used by the stored arrays."""
+        return sum(self._entry_bytes(key) for key in self._keys())
+
+    def clear(self) -> None:
+        """Remove every entry, and arrays left behind by earlier removals."""
+        for pattern in ("*.json", "*.npy"):
+            for path in glob.glob(os.path.join(self.directory, pattern)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _result(
+        self,
+        entry: dict,
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        iterations: int
+    ) -> SimulationResult:
+        """Memory-map the first ``iterations`` of a stored run."""
+        results = np.load(self._path(entry["results"]), mmap_mode="r")[:iterations]
+        inputs = None
+        if entry["inputs"]:
+            inputs = np.load(self._path(entry["inputs"]), mmap_mode="r")[:iterations]
+        replicate_means = entry["replicate_means"]
+        return SimulationResult(
+            results,
+            replicate_means=None if replicate_means is None else np.array(replicate_means),
+            inputs=_input_columns(input_distributions, inputs)
+        )
+
+    def _store(self, key: str, results: SimulationResult, summary: Dict[str, float]) -> dict:
+        """Write a run's arrays, then its entry file, and drop the old arrays."""
+        old = self._load(key)
+        # New files per version, so maps of the previous one stay valid
+        version = uuid.uuid4().hex[:8]
+        entry = {
+            "iterations": len(results),
+            "results": f"{key}-{version}.results.npy",
+            "inputs": None,
+            "replicate_means": None if results.replicate_means is None else results.replicate_means.tolist(),
+            "summary": summary,
+        }
+        np.save(self._path(entry["results"]), np.asarray(results))
+        if results.inputs is not None:
+            entry["inputs"] = f"{key}-{version}.inputs.npy"
+            inputs = np.empty((len(results), len(results.inputs)), order="F")
+            for j, values in enumerate(results.inputs.values()):
+                inputs[:, j] = values
+            np.save(self._path(entry["inputs"]), inputs)
+        temporary = self._path(f"{key}-{version}.json")
+        with open(temporary, "w") as f:
+            json.dump(entry, f)
+        os.replace(temporary, self._path(f"{key}.json"))
+        if old is not None:
+            self._remove_arrays(old)
+        return entry
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used entries until the cache fits its limit."""
+        keys = sorted(self._keys(), key=lambda key: os.path.getmtime(self._path(f"{key}.json")))
+        sizes = {key: self._entry_bytes(key) for key in keys}
+        total = sum(sizes.values())
+        for key in keys:
+            if total <= self.max_bytes:
+                break
+            if key != keep:
+                self._remove(key)
+                total -= sizes[key]
+
+    def _load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(f"{key}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _touch(self, key: str) -> None:
+        """Mark an entry as used now."""
+        os.utime(self._path(f"{key}.json"))
+
+    def _keys(self):
+        return [
+            os.path.basename(path)[:-len(".json")]
+            for path in glob.glob(os.path.join(self.directory, "*.json"))
+            if "-" not in os.path.basename(path)
+        ]
+
+    def _entry_bytes(self, key: str) -> int:
+        entry = self._load(key)
+        if entry is None:
+            return 0
+        return sum(
+            os.path.getsize(self._path(name))
+            for name in (entry["results"], entry["inputs"])
+            if name and os.path.exists(self._path(name))
+        )
+
+    def _remove(self, key: str) -> None:
+        entry = self._load(key)
+        try:
+            os.remove(self._path(f"{key}.json"))
+        except OSError:
+            pass
+        if entry is not None:
+            self._remove_arrays(entry)
+
+    def _remove_arrays(self, entry: dict) -> None:
+        for name in (entry["results"], entry["inputs"]):
+            if name:
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    # Still mapped by a result on Windows; it is left for
+                    # the next clear
+                    pass
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+def _identity(obj) -> Optional[str]:
+    """Stable description of a distribution or model for the cache key.
+
+    Functions are identified by their bytecode together with the data they
+    read: defaults, closure cells and the module globals they name, so
+    editing a function, a constant or a helper invalidates its entries.
+    Returns None for anything whose behaviour cannot be pinned down.
+    """
+    if isinstance(obj, str):
+        return obj
+    if isinstance(obj, Distribution):
+        return repr(obj)
+    if isinstance(obj, ModelExpression):
+        return obj.expression
+    digest = hashlib.sha256()
+    try:
+        _hash_value(obj, digest, set())
+    except _Unidentifiable:
+        return None
+    return digest.hexdigest()
+
+class _Unidentifiable(Exception):
+    """A value the cache key cannot describe by content."""
+
+def _hash_value(value, digest: Any, seen: Set[int]) -> None:
+    """Feed the content of ``value`` into ``digest``.
+
+    Raises:
+        _Unidentifiable: For objects other than plain data, arrays,
+            distributions, modules, classes and functions
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        digest.update(f"{type(value).__name__}:{value!r};".encode())
+    elif isinstance(value, np.ndarray):
+        # The full contents; repr elides large arrays
+        array = np.ascontiguousarray(value)
+        if array.dtype.hasobject:
+            raise _Unidentifiable(value)
+        digest.update(f"ndarray:{array.dtype.str}:{array.shape};".encode())
+        digest.update(array.tobytes())
+    elif isinstance(value, np.generic):
+        _hash_value(np.asarray(value), digest, seen)
+    elif isinstance(value, (Distribution, ModelExpression)):
+        digest.update(f"{_identity(value)};".encode())
+    elif isinstance(value, (tuple, list, frozenset, set)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        digest.update(f"{type(value).__name__}:{len(items)}(".encode())
+        for item in items:
+            _hash_value(item, digest, seen)
+        digest.update(b");")
+    elif isinstance(value, dict):
+        digest.update(f"dict:{len(value)}(".encode())
+        for name in sorted(value, key=repr):
+            _hash_value(name, digest, seen)
+            _hash_value(value[name], digest, seen)
+        digest.update(b");")
+    elif isinstance(value, types.ModuleType):
+        digest.update(f"module:{value.__name__};".encode())
+    elif isinstance(value, type):
+        digest.update(f"class:{value.__module__}.{value.__qualname__};".encode())
+    elif isinstance(value, types.MethodType):
+        _hash_value(value.__self__, digest, seen)
+        _hash_value(value.__func__, digest, seen)
+    elif isinstance(value, types.FunctionType):
+        if id(value) in seen:
+            # Recursion, or a helper already described
+            digest.update(f"function:{value.__qualname__};".encode())
+            return
+        seen.add(id(value))
+        code = value.__code__
+        digest.update(f"function:{value.__module__}.{value.__qualname__}:".encode())
+        digest.update(marshal.dumps(code))
+        _hash_value(value.__defaults__, digest, seen)
+        _hash_value(value.__kwdefaults__, digest, seen)
+        _hash_value(tuple(cell.cell_contents for cell in value.__closure__ or ()), digest, seen)
+        for name in sorted(_global_names(code)):
+            if name in value.__globals__:
+                _hash_value(name, digest, seen)
+                _hash_value(value.__globals__[name], digest, seen)
+    elif isinstance(value, types.BuiltinFunctionType) or type(value).__name__ == "ufunc":
+        digest.update(f"builtin:{getattr(value, '__module__', None)}.{value.__name__};".encode())
+    else:
+        raise _Unidentifiable(value)
+
+def _global_names(code: types.CodeType) -> Set[str]:
+    """Names a code object and the functions nested in it may look up globally."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
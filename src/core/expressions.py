@@ -0,0 +1,268 @@
+"""
+Compiled model expressions.
+
+A model can be given as a formula over the input variable names, such as
+``revenue * (1 - cost_ratio) - capex``, instead of a Python function. The
+formula is parsed once into a restricted syntax tree and compiled into a
+fused ``numexpr`` kernel when numexpr is installed, which evaluates in
+cache-sized blocks without holding the GIL. Otherwise it falls back to numpy
+ufuncs evaluated block by block, so temporaries stay small.
+
+The syntax is Python arithmetic with a few spreadsheet conventions: ``^``
+is a power, and function names are case-insensitive Excel functions
+(``IF``, ``MIN``, ``MAX``, ``ABS``, ``EXP``, ``LN``, ``LOG`` (base 10),
+``LOG10``, ``SQRT``, ``SIN``, ``COS``, ``TAN``).
+"""
+import re
+import ast
+import numpy as np
+from functools import lru_cache, reduce
+from typing import Callable
+
+@lru_cache(maxsize=None)
+def _numexpr():
+    """The numexpr module, or None when it is not installed.
+
+    Imported on first use rather than with the engine, as it is slow to
+    import.
+    """
+    try:
+        import numexpr
+    except ImportError:  # optional dependency
+        return None
+    return numexpr
+
+EVALUATORS = ("auto", "numexpr", "numpy")
+
+# Rows per block when evaluating with numpy
+_BLOCK_SIZE = 16384
+
+# Function name -> (numexpr function, numpy function, number of arguments);
+# None means any number of at least two
+_FUNCTIONS = {
+    "abs": ("abs", "__np.abs", 1),
+    "exp": ("exp", "__np.exp", 1),
+    "ln": ("log", "__np.log", 1),
+    "log": ("log10", "__np.log10", 1),
+    "log10": ("log10", "__np.log10", 1),
+    "sqrt": ("sqrt", "__np.sqrt", 1),
+    "sin": ("sin", "__np.sin", 1),
+    "cos": ("cos", "__np.cos", 1),
+    "tan": ("tan", "__np.tan", 1),
+    "if": ("where", "__np.where", 3),
+    "min": (None, "__np.minimum", None),
+    "max": (None, "__np.maximum", None),
+}
+
+_OPERATORS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.Pow: "**",
+    ast.Mod: "%",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.USub: "-",
+    ast.UAdd: "+",
+}
+
+class ModelExpression:
+    """Model compiled from a formula over the input variables.
+
+    Instances are callable like any model function, taking the inputs as
+    keyword arguments (extra inputs are ignored), and pickle as their
+    formula so they can be sent to worker processes.
+
+    Attributes:
+        expression: The formula
+        variables: Input names used by the formula, in order of appearance
+        evaluator: "numexpr" or "numpy"
+    """
+
+    def __init__(self, expression: str, evaluator: str = "auto"):
+        """Parse and compile a formula.
+
+        Args:
+            expression: Formula over the input variable names
+            evaluator: "numexpr", "numpy", or "auto" for numexpr when installed
+        """
+        if evaluator not in EVALUATORS:
+            raise ValueError(f"Unknown expression evaluator: {evaluator}")
+        if evaluator == "auto":
+            evaluator = "numpy" if _numexpr() is None else "numexpr"
+        if evaluator == "numexpr" and _numexpr() is None:
+            raise ImportError("numexpr is required for the numexpr evaluator")
+
+        self.expression = expression
+        self.evaluator = evaluator
+        try:
+            tree = ast.parse(expression.replace("^", "**").strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid model expression {expression!r}: {e.msg}") from None
+
+        translator = _Translator()
+        self._numpy_source = translator.translate(tree.body, numexpr_syntax=False)
+        self._numexpr_source = translator.translate(tree.body, numexpr_syntax=True)
+        # MIN/MAX calls, reduced with numpy between numexpr kernels
+        self._numexpr_reductions = translator.reductions
+        self.variables = tuple(dict.fromkeys(translator.names))
+        self._function: Callable[..., np.ndarray] = eval(
+            f"lambda {', '.join(self.variables)}: {self._numpy_source}",
+            {"__np": np}
+        )
+
+    def __call__(self, **inputs) -> np.ndarray:
+        missing = [name for name in self.variables if name not in inputs]
+        if missing:
+            raise ValueError(f"Model expression uses unknown inputs: {', '.join(missing)}")
+        args = [np.asarray(inputs[name]) for name in self.variables]
+        if self.evaluator == "numexpr":
+            result = self._evaluate_numexpr(args)
+        else:
+            result = self._evaluate_blocks(args)
+        # Formulas that use no (array) input give one value for every row
+        n = max((len(v) for v in inputs.values() if np.ndim(v)), default=0)
+        if result.ndim == 0 and n:
+            result = np.full(n, result)
+        return result
+
+    def _evaluate_numexpr(self, args) -> np.ndarray:
+        """Evaluate the numexpr kernels, reducing MIN/MAX calls in between."""
+        numexpr = _numexpr()
+        local_dict = dict(zip(self.variables, args))
+        for name, ufunc, sources in self._numexpr_reductions:
+            values = [numexpr.evaluate(source, local_dict=local_dict) for source in sources]
+            local_dict[name] = reduce(getattr(np, ufunc), values)
+        return numexpr.evaluate(self._numexpr_source, local_dict=local_dict)
+
+    def _evaluate_blocks(self, args) -> np.ndarray:
+        """Evaluate the numpy function in row blocks into one output array."""
+        n = max((len(a) for a in args if a.ndim), default=0)
+        if n <= _BLOCK_SIZE:
+            return np.asarray(self._function(*args))
+
+        def block(start: int, stop: int) -> np.ndarray:
+            return np.asarray(self._function(*[
+                a[start:stop] if a.ndim else a for a in args
+            ]))
+
+        first = block(0, _BLOCK_SIZE)
+        out = np.empty((n,) + first.shape[1:], dtype=first.dtype)
+        out[:_BLOCK_SIZE] = first
+        for start in range(_BLOCK_SIZE, n, _BLOCK_SIZE):
+            out[start:start + _BLOCK_SIZE] = block(start, start + _BLOCK_SIZE)
+        return out
+
+    def __reduce__(self):
+        return (compile_model, (self.expression, self.evaluator))
+
+    def __repr__(self) -> str:
+        return f"ModelExpression({self.expression!r})"
+
+class _Translator:
+    """Translate a restricted expression tree to numpy or numexpr source."""
+
+    def translate(self, node: ast.AST, numexpr_syntax: bool) -> str:
+        self.names = []
+        # (temporary name, numpy ufunc, argument sources) of numexpr MIN/MAX
+        self.reductions = []
+        self.numexpr_syntax = numexpr_syntax
+        source = self._visit(node)
+        if not self.reductions:
+            return source
+        # numexpr refuses dunder names, so temporaries get a prefix that no
+        # input name starts with
+        prefix = "_reduced"
+        while any(name.startswith(prefix) for name in self.names):
+            prefix += "_"
+
+        def rename(text: str) -> str:
+            return re.sub(r"\x00(\d+)\x00", lambda match: prefix + match.group(1), text)
+
+        self.reductions = [
+            (rename(name), ufunc, [rename(arg) for arg in args])
+            for name, ufunc, args in self.reductions
+        ]
+        return rename(source)
+
+    def _visit(self, node: ast.AST) -> str:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            return repr(node.value)
+        if isinstance(node, ast.Name) and not node.id.startswith("__"):
+            self.names.append(node.id)
+            return node.id
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            return f"({self._visit(node.left)} {_OPERATORS[type(node.op)]} {self._visit(node.right)})"
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _OPERATORS:
+            return f"({_OPERATORS[type(node.op)]}{self._visit(node.operand)})"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = self._visit(node.operand)
+            return f"(~{operand})" if self.numexpr_syntax else f"__np.logical_not({operand})"
+        if isinstance(node, ast.BoolOp):
+            values = [self._visit(value) for value in node.values]
+            if self.numexpr_syntax:
+                joiner = " & " if isinstance(node.op, ast.And) else " | "
+                return f"({joiner.join(values)})"
+            function = "__np.logical_and" if isinstance(node.op, ast.And) else "__np.logical_or"
+            return self._fold(function, values)
+        if isinstance(node, ast.Compare) and all(type(op) in _OPERATORS for op in node.ops):
+            operands = [self._visit(node.left)] + [self._visit(c) for c in node.comparators]
+            parts = [
+                f"({left} {_OPERATORS[type(op)]} {right})"
+                for left, op, right in zip(operands, node.ops, operands[1:])
+            ]
+            if len(parts) == 1:
+                return parts[0]
+            return f"({' & '.join(parts)})" if self.numexpr_syntax else self._fold("__np.logical_and", parts)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            return self._call(node.func.id.lower(), [self._visit(arg) for arg in node.args])
+        raise ValueError(f"Unsupported syntax in model expression: {type(node).__name__}")
+
+    def _call(self, name: str, args) -> str:
+        if name not in _FUNCTIONS:
+            raise ValueError(f"Unknown function in model expression: {name.upper()}")
+        numexpr_name, numpy_name, arity = _FUNCTIONS[name]
+        if arity is None and len(args) < 2 or arity is not None and len(args) != arity:
+            raise ValueError(f"Wrong number of arguments to {name.upper()}: {len(args)}")
+        if not self.numexpr_syntax:
+            return self._fold(numpy_name, args) if arity is None else f"{numpy_name}({', '.join(args)})"
+        if numexpr_name is not None:
+            return f"{numexpr_name}({', '.join(args)})"
+        # numexpr has no elementwise min/max; the arguments are evaluated as
+        # kernels of their own and reduced with numpy into a temporary
+        temporary = f"\x00{len(self.reductions)}\x00"
+        self.reductions.append((temporary, "minimum" if name == "min" else "maximum", args))
+        return temporary
+
+    @staticmethod
+    def _fold(function: str, args) -> str:
+        """Nest a binary function over several arguments."""
+        result = args[0]
+        for arg in args[1:]:
+            result = f"{function}({result}, {arg})"
+        return result
+
+def compile_model(expression: str, evaluator: str = "auto") -> ModelExpression:
+    """Compile a model formula, reusing earlier compilations of the same text.
+
+    Args:
+        expression: Formula over the input variable names
+        evaluator: "numexpr", "numpy", or "auto" for numexpr when installed
+
+    Returns:
+        Callable model
+    """
+    if evaluator == "auto":
+        evaluator = "numpy" if _numexpr() is None else "numexpr"
+    return _compile_model(expression, evaluator)
+
+@lru_cache(maxsize=256)
+def _compile_model(expression: str, evaluator: str) -> ModelExpression:
+    """Cached compilation keyed by formula text and evaluator."""
+    return ModelExpression(expression, evaluator)
@@ -0,0 +1,330 @@
+"""
+Per-stage timing and opt-in profiling of simulation runs.
+
+Every chunk times its stages (sampling, correlation, distribution
+transform, model evaluation and storing) with ``time.perf_counter`` in the
+worker that runs it, which costs a few clock reads per chunk. The engine
+collects the :class:`ChunkStats` as chunks complete, passes them to its
+:class:`RunHooks` and attaches a :class:`RunStats` to the result.
+
+cProfile and tracemalloc capture are opt-in through
+``SimulationConfig.profile``, since both slow a run down considerably.
+"""
+import io
+import os
+import time
+import heapq
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+PROFILERS = ("cprofile", "tracemalloc")
+
+# Stages timed inside a chunk, in execution order
+STAGES = ("sample", "correlate", "transform", "model", "store")
+
+@dataclass
+class ChunkStats:
+    """Timing of one chunk, measured by the worker that ran it."""
+    start: int  # first iteration of the chunk within its design
+    stop: int
+    worker: str  # "<pid>:<thread name>" of the worker
+    started: float  # time.perf_counter() at the start of the chunk
+    seconds: float
+    stages: Dict[str, float]  # seconds spent in each of STAGES
+    peak_memory: Optional[int] = None  # traced peak bytes, process workers with tracemalloc
+    profile: Optional[dict] = None  # raw cProfile statistics, process workers with cProfile
+
+@dataclass
+class RunStats:
+    """Where the time of one run went.
+
+    Attributes:
+        iterations: Iterations simulated
+        seconds: Wall time of the run
+        phases: Wall time of the engine's phases in the calling thread:
+            "setup", "evaluate" (waiting for the workers), "convergence"
+            (checks between batches) and "finalize"
+        stages: Seconds in each chunk stage, summed over all chunks, so
+            with several workers they can add up to more than ``seconds``
+        chunk_count: Number of chunks timed; zero when the model was
+            evaluated over inputs drawn up front (see
+            :meth:`MonteCarloEngine.resimulate`)
+        busy_seconds: Seconds each worker spent running chunks
+        slowest_chunks: Timing of the slowest chunks, slowest first, at
+            most ``SimulationConfig.slowest_chunks`` of them, so the stats
+            stay small however long a streamed run gets
+        workers: Size of the worker pool
+        allocated_bytes: Bytes of the result, input and uniform buffers the
+            engine allocated
+        peak_memory: With tracemalloc, the peak of traced memory above its
+            level at the start of the run, in the calling process or in
+            the process worker with the largest chunk peak
+        profile: With cProfile, the raw statistics of the calling thread
+            and all chunks, see :meth:`profile_stats`
+    """
+    iterations: int
+    seconds: float
+    phases: Dict[str, float]
+    stages: Dict[str, float]
+    chunk_count: int = 0
+    busy_seconds: Dict[str, float] = field(default_factory=dict)
+    slowest_chunks: List[ChunkStats] = field(default_factory=list)
+    workers: int = 1
+    allocated_bytes: int = 0
+    peak_memory: Optional[int] = None
+    profile: Optional[dict] = None
+
+    @property
+    def iterations_per_second(self) -> float:
+        return self.iterations / self.seconds if self.seconds > 0 else float("inf")
+
+    @property
+    def utilisation(self) -> Optional[float]:
+        """Share of the pool's capacity spent on chunks while evaluating."""
+        capacity = self.phases.get("evaluate", 0.0) * self.workers
+        if not self.chunk_count or capacity <= 0:
+            return None
+        return min(1.0, sum(self.busy_seconds.values()) / capacity)
+
+    def summary(self) -> Dict[str, float]:
+        """Headline figures in the order written to Excel."""
+        summary = {
+            "Iterations": self.iterations,
+            "Seconds": self.seconds,
+            "Iterations/second": self.iterations_per_second,
+            "Workers": self.workers,
+            "Chunks": self.chunk_count,
+            "Utilisation": self.utilisation,
+            "Allocated bytes": self.allocated_bytes,
+        }
+        if self.peak_memory is not None:
+            summary["Peak traced bytes"] = self.peak_memory
+        return summary
+
+    def profile_stats(self) -> Optional[pstats.Stats]:
+        """The cProfile statistics as a :class:`pstats.Stats`, if captured."""
+        if not self.profile:
+            return None
+        return pstats.Stats(_RawProfile(self.profile), stream=io.StringIO())
+
+    def profile_table(self, limit: int = 30) -> List[list]:
+        """Functions with the most cumulative time, as rows of
+        ``[function, calls, own seconds, cumulative seconds]``."""
+        if not self.profile:
+            return []
+        rows = sorted(self.profile.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            [pstats.func_std_string(func), calls, own, cumulative]
+            for func, (_, calls, own, cumulative, _) in rows[:limit]
+        ]
+
+class RunHooks:
+    """Callbacks on the progress of runs; override the ones needed.
+
+    Hooks are called in the thread that started the run as chunks
+    complete, e.g. to show progress or log slow chunks, and should return
+    quickly.
+    """
+
+    def on_start(self, iterations: int) -> None:
+        """A run of (at most) ``iterations`` iterations starts."""
+
+    def on_chunk(self, chunk: ChunkStats) -> None:
+        """A chunk completed."""
+
+    def on_finish(self, stats: RunStats) -> None:
+        """A run completed."""
+
+class StageTimer:
+    """Adds the time between successive laps to named stages."""
+
+    def __init__(self):
+        self.worker = f"{os.getpid()}:{threading.current_thread().name}"
+        self.started = self._last = time.perf_counter()
+        self.stages = {}
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def chunk(self, start: int, stop: int, captured: Dict[str, Any]) -> ChunkStats:
+        """Timing of a chunk that ran from the timer's creation to its last lap."""
+        return ChunkStats(
+            start,
+            stop,
+            self.worker,
+            self.started,
+            self._last - self.started,
+            self.stages,
+            **captured
+        )
+
+@contextmanager
+def capture(profile: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """Profile the enclosed code with cProfile or trace its memory.
+
+    Yields a dict that, once the block exits, holds ``profile`` (raw
+    cProfile statistics) or ``peak_memory`` (peak traced bytes above the
+    level on entry); it stays empty without a profiler. cProfile follows
+    the current thread only; tracemalloc traces every thread of the
+    process.
+    """
+    captured = {}
+    if profile == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield captured
+        finally:
+            profiler.disable()
+            profiler.create_stats()
+            captured["profile"] = profiler.stats
+    elif profile == "tracemalloc":
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            yield captured
+        finally:
+            captured["peak_memory"] = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+            if started:
+                tracemalloc.stop()
+    else:
+        yield captured
+
+class RunProfiler:
+    """Collects the timing of one run in the thread that started it.
+
+    Used as a context manager around the run; :meth:`finish` returns the
+    :class:`RunStats`. Chunks are reduced into totals as they complete and
+    only the ``slowest`` are kept, so memory does not grow with the run.
+    """
+
+    def __init__(
+        self,
+        profile: Optional[str],
+        backend: str,
+        workers: int,
+        hooks: Sequence[RunHooks] = (),
+        slowest: int = 10
+    ):
+        self.profile = profile
+        # cProfile and tracemalloc only see the calling process, so
+        # process workers capture their own chunks
+        self.chunk_profile = profile if backend == "process" else None
+        self.workers = workers
+        self.hooks = hooks
+        self.slowest = slowest
+        self.phases = {}
+        self.stages = {}
+        self.chunk_count = 0
+        self.busy_seconds = {}
+        self.allocated_bytes = 0
+        self._slowest = []  # min-heap of (seconds, count, chunk)
+        self._profile = None
+        self._peak_memory = None
+        self._capture = None
+        self._captured = {}
+        self._started = None
+
+    def __enter__(self) -> "RunProfiler":
+        self._started = time.perf_counter()
+        self._capture = capture(self.profile)
+        self._captured = self._capture.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop()
+
+    def start(self, iterations: int) -> None:
+        for hook in self.hooks:
+            hook.on_start(iterations)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed code as an engine phase."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def add_stages(self, stages: Dict[str, float]) -> None:
+        for name, seconds in stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def chunk(self, chunk: ChunkStats) -> None:
+        """Record a completed chunk."""
+        self.chunk_count += 1
+        self.add_stages(chunk.stages)
+        self.busy_seconds[chunk.worker] = self.busy_seconds.get(chunk.worker, 0.0) + chunk.seconds
+        self._add_capture(chunk.profile, chunk.peak_memory)
+        for hook in self.hooks:
+            hook.on_chunk(chunk)
+        # Merged into the run's profile
+        chunk.profile = None
+        if self.slowest > 0:
+            entry = (chunk.seconds, self.chunk_count, chunk)
+            if len(self._slowest) < self.slowest:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def allocated(self, *arrays) -> None:
+        """Count buffers the engine allocated."""
+        self.allocated_bytes += sum(array.nbytes for array in arrays if array is not None)
+
+    def finish(self, iterations: int) -> RunStats:
+        """Stop capturing and describe the run."""
+        seconds = time.perf_counter() - self._started
+        self._stop()
+        self._add_capture(self._captured.get("profile"), self._captured.get("peak_memory"))
+        stats = RunStats(
+            iterations,
+            seconds,
+            self.phases,
+            {name: self.stages[name] for name in STAGES if name in self.stages},
+            self.chunk_count,
+            self.busy_seconds,
+            [chunk for _, _, chunk in sorted(self._slowest, reverse=True)],
+            self.workers,
+            self.allocated_bytes,
+            self._peak_memory,
+            None if self._profile is None else self._profile.stats
+        )
+        for hook in self.hooks:
+            hook.on_finish(stats)
+        return stats
+
+    def _add_capture(self, profile: Optional[dict], peak_memory: Optional[int]) -> None:
+        """Merge a cProfile profile and memory peak into the run's."""
+        if profile:
+            profile = pstats.Stats(_RawProfile(dict(profile)), stream=io.StringIO())
+            if self._profile is None:
+                self._profile = profile
+            else:
+                self._profile.add(profile)
+        if peak_memory is not None:
+            self._peak_memory = max(peak_memory, self._peak_memory or 0)
+
+    def _stop(self) -> None:
+        if self._capture is not None:
+            capture, self._capture = self._capture, None
+            capture.__exit__(None, None, None)
+
+class _RawProfile:
+    """Raw cProfile statistics in the form :class:`pstats.Stats` loads."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
@@ -0,0 +1,106 @@
+"""
+Result containers returned by the Monte Carlo simulation engine.
+"""
+import numpy as np
+from typing import Dict, List, Optional
+from dataclasses import dataclass
+from .profiling import RunStats
+
+@dataclass
+class ConvergencePoint:
+    """Precision of the running estimate after a batch of iterations."""
+    iterations: int
+    estimate: np.ndarray  # running mean (or percentile) of each output
+    half_width: np.ndarray  # confidence interval half-width of the estimate
+
+class SimulationResult(np.ndarray):
+    """Array of simulation results carrying metadata about the run.
+
+    Behaves exactly like the plain result array; arrays derived from it
+    (arithmetic, reductions, concatenation) are ordinary numpy arrays.
+    Slices keep the metadata, with ``iterations`` counting their rows and
+    ``inputs`` dropped unless they hold every row.
+
+    Attributes:
+        iterations: Number of iterations actually simulated
+        converged: Whether a stopping criterion or tolerance was met
+        convergence_trace: Precision after each batch when run in batches
+        replicate_means: Mean output of each completed replicate design
+            when the run used several independently randomized replicates
+        inputs: Input samples of every iteration by variable name, when
+            the run kept them
+        run_stats: Timing of the run that produced the results; None for
+            results read back from a cache or run store
+    """
+
+    def __new__(
+        cls,
+        results: np.ndarray,
+        converged: bool = False,
+        convergence_trace: Optional[List[ConvergencePoint]] = None,
+        replicate_means: Optional[np.ndarray] = None,
+        inputs: Optional[Dict[str, np.ndarray]] = None,
+        run_stats: Optional[RunStats] = None
+    ) -> "SimulationResult":
+        obj = np.asarray(results).view(cls)
+        obj.iterations = len(obj)
+        obj.converged = converged
+        obj.convergence_trace = convergence_trace or []
+        obj.replicate_means = replicate_means
+        obj.inputs = inputs
+        obj.run_stats = run_stats
+        return obj
+
+    def __array_finalize__(self, obj) -> None:
+        self.iterations = len(self) if self.ndim >= 1 else getattr(obj, "iterations", None)
+        self.converged = getattr(obj, "converged", False)
+        self.convergence_trace = getattr(obj, "convergence_trace", [])
+        self.replicate_means = getattr(obj, "replicate_means", None)
+        self.run_stats = getattr(obj, "run_stats", None)
+        # The input samples are per row, so they only carry over to views of
+        # every row in order (e.g. a reshape), not to slices or copies
+        self.inputs = getattr(obj, "inputs", None)
+        if self.inputs is not None and not self._same_rows(obj):
+            self.inputs = None
+
+    def _same_rows(self, obj) -> bool:
+        """Whether this array views the rows of ``obj`` one for one."""
+        return (
+            self.ndim >= 1
+            and obj.ndim >= 1
+            and len(self) == len(obj)
+            and self.__array_interface__["data"][0] == obj.__array_interface__["data"][0]
+            and self.strides[0] == obj.strides[0]
+        )
+
+    def __reduce__(self):
+        # Carry the metadata along with the array state when pickled
+        reconstruct, args, state = super().__reduce__()
+        return reconstruct, args, (state, self._metadata())
+
+    def __setstate__(self, state) -> None:
+        array_state, metadata = state
+        super().__setstate__(array_state)
+        self.__dict__.update(metadata)
+
+    def _metadata(self) -> dict:
+        return {
+            "iterations": self.iterations,
+            "converged": self.converged,
+            "convergence_trace": self.convergence_trace,
+            "replicate_means": self.replicate_means,
+            "inputs": self.inputs,
+            "run_stats": self.run_stats,
+        }
+
+    @property
+    def standard_error(self) -> Optional[np.ndarray]:
+        """Standard error of the mean estimated from the replicate means."""
+        if self.replicate_means is None or len(self.replicate_means) < 2:
+            return None
+        means = self.replicate_means
+        return np.std(means, axis=0, ddof=1) / np.sqrt(len(means))
+
+    def __array_wrap__(self, arr, context=None, return_scalar=False):
+        arr = arr.view(np.ndarray)
+        return arr[()] if arr.ndim == 0 else arr
@@ -0,0 +1,210 @@
+"""
+Sensitivity analysis of simulation outputs to their inputs.
+
+:func:`analyze_sensitivity` works on the input samples and outputs of a
+finished run (``SimulationConfig(keep_inputs=True)``) in one vectorized
+pass: every column is ranked with a single argsort, and the rank
+correlations, regression coefficients and tornado swings are all derived
+from those ranks and one correlation matrix.
+
+:func:`sobol_indices` estimates variance-based first- and total-order
+indices with the Saltelli/Jansen scheme, which needs its own model
+evaluations; they are run in parallel chunks on the execution backends.
+"""
+import functools
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from .backends import BACKENDS, open_executor, run_tasks
+from .expressions import compile_model
+
+@dataclass
+class SensitivityResult:
+    """Sensitivity measures of one output, in input order."""
+    names: List[str]
+    spearman: np.ndarray  # rank correlation of each input with the output
+    src: np.ndarray  # standardized regression coefficients
+    r_squared: float  # share of output variance explained by the linear fit
+    base: float  # mean output
+    low: np.ndarray  # mean output when the input is in its lowest quantile
+    high: np.ndarray  # mean output when the input is in its highest quantile
+
+    @property
+    def swing(self) -> np.ndarray:
+        """Range of the conditional means, the width of the tornado bars."""
+        return np.abs(self.high - self.low)
+
+    def tornado(self) -> List[Tuple[str, float, float]]:
+        """(name, low, high) per input, largest swing first."""
+        order = np.argsort(-self.swing, kind="stable")
+        return [(self.names[i], float(self.low[i]), float(self.high[i])) for i in order]
+
+@dataclass
+class SobolResult:
+    """Variance-based sensitivity indices, in input order."""
+    names: List[str]
+    first: np.ndarray  # first-order indices
+    total: np.ndarray  # total-order indices
+    variance: float  # output variance
+    evaluations: int  # model evaluations used
+
+def analyze_sensitivity(
+    inputs: Dict[str, np.ndarray],
+    output: np.ndarray,
+    quantile: float = 0.1
+) -> SensitivityResult:
+    """Rank correlations, regression coefficients and tornado swings.
+
+    Args:
+        inputs: Input samples by name, one value per iteration
+        output: Output of every iteration (1-D)
+        quantile: Share of iterations in the low and high groups of the
+            conditional means (0.5 splits at the median)
+
+    Returns:
+        Sensitivity measures of every input
+    """
+    output = np.asarray(output, dtype=float)
+    if output.ndim == 2 and output.shape[1] == 1:
+        output = output[:, 0]
+    if output.ndim != 1:
+        raise ValueError(f"Sensitivity analysis needs a single output, got shape {output.shape}")
+    if not 0 < quantile <= 0.5:
+        raise ValueError(f"Quantile must be in (0, 0.5], got {quantile}")
+    names = list(inputs)
+    n = len(output)
+    if any(len(values) != n for values in inputs.values()):
+        raise ValueError("Input samples and output must have one value per iteration")
+
+    # One argsort per column gives the ranks, and the tornado groups
+    k = max(1, int(n * quantile))
+    ranks = np.empty((n, len(names) + 1), order="F")
+    low = np.empty(len(names))
+    high = np.empty(len(names))
+    for j, values in enumerate(list(inputs.values()) + [output]):
+        order = np.argsort(values, kind="stable")
+        _average_ranks(np.asarray(values)[order], order, ranks[:, j])
+        if j < len(names):
+            low[j] = output[order[:k]].mean()
+            high[j] = output[order[-k:]].mean()
+
+    spearman = _correlations(ranks)[-1, :-1]
+
+    # Standardized regression coefficients from the correlation matrix
+    samples = np.column_stack(list(inputs.values()) + [output])
+    correlation = _correlations(samples)
+    r_xx, r_xy = correlation[:-1, :-1], correlation[:-1, -1]
+    src = np.linalg.lstsq(r_xx, r_xy, rcond=None)[0]
+    return SensitivityResult(
+        names=names,
+        spearman=spearman,
+        src=src,
+        r_squared=float(np.dot(r_xy, src)),
+        base=float(output.mean()),
+        low=low,
+        high=high
+    )
+
+def sobol_indices(
+    model: Callable[..., np.ndarray],
+    input_distributions: Dict[str, Callable[[], np.ndarray]],
+    n: int,
+    seed: Optional[int] = None,
+    backend: str = "thread",
+    chunk_size: int = 8192,
+    num_threads: int = -1
+) -> SobolResult:
+    """First- and total-order Sobol' indices by the Saltelli scheme.
+
+    Two independent sample matrices A and B are drawn, and for every input
+    i a matrix AB_i that is A with column i from B, for ``n * (d + 2)``
+    model evaluations. First-order indices use the Saltelli (2010)
+    estimator and total-order indices Jansen's. Chunks of rows are
+    evaluated in parallel and reduced to sums, so nothing of size ``n``
+    is kept. Inputs are treated as independent.
+
+    Args:
+        model: Function that takes input samples and returns output, or a
+            formula over the input names
+        input_distributions: Dictionary mapping variable names to their sampling functions
+        n: Rows of each sample matrix
+        seed: Random seed
+        backend: Execution backend ("thread", "process" or "serial")
+        chunk_size: Rows per task, each with its own random stream
+        num_threads: Number of workers, -1 for all cores but one
+
+    Returns:
+        Sobol' indices of every input
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown execution backend: {backend}")
+    if n < 2:
+        raise ValueError(f"Sobol' indices need at least 2 rows, got {n}")
+    if isinstance(model, str):
+        model = compile_model(model)
+    from .simulation import _available_cpus
+
+    names = list(input_distributions)
+    sizes = [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    task = functools.partial(_saltelli_chunk, model, input_distributions)
+    workers = num_threads if num_threads > 0 else max(1, _available_cpus() - 1)
+    with open_executor(backend, min(workers, len(sizes))) as executor:
+        sums = sum(run_tasks(backend, task, list(zip(sizes, seeds)), executor))
+
+    # Accumulated sums: f_A, f_B, f_A^2, f_B^2, then per input
+    # f_B (f_ABi - f_A) and (f_A - f_ABi)^2
+    d = len(names)
+    total_a, total_b, square_a, square_b = sums[:4]
+    mean = (total_a + total_b) / (2 * n)
+    variance = (square_a + square_b) / (2 * n) - mean ** 2
+    first = sums[4:4 + d] / n / variance
+    total = sums[4 + d:] / (2 * n) / variance
+    return SobolResult(names, first, total, float(variance), n * (d + 2))
+
+def _saltelli_chunk(
+    model: Callable[..., np.ndarray],
+    input_distributions: Dict[str, Callable[[], np.ndarray]],
+    rows: int,
+    seed: np.random.SeedSequence
+) -> np.ndarray:
+    """Evaluate one chunk of the Saltelli design and reduce it to sums."""
+    from .simulation import _draw_inputs
+    d = len(input_distributions)
+    uniforms = np.random.default_rng(seed).random((2 * d, rows)).T
+    a = _draw_inputs(uniforms[:, :d], input_distributions, None)
+    b = _draw_inputs(uniforms[:, d:], input_distributions, None)
+    f_a = _evaluate(model, a, rows)
+    f_b = _evaluate(model, b, rows)
+
+    sums = np.empty(4 + 2 * d)
+    sums[:4] = f_a.sum(), f_b.sum(), np.dot(f_a, f_a), np.dot(f_b, f_b)
+    for i, name in enumerate(input_distributions):
+        f_ab = _evaluate(model, dict(a, **{name: b[name]}), rows)
+        sums[4 + i] = np.dot(f_b, f_ab - f_a)
+        sums[4 + d + i] = np.dot(f_a - f_ab, f_a - f_ab)
+    return sums
+
+def _evaluate(model, inputs: Dict[str, np.ndarray], rows: int) -> np.ndarray:
+    """Evaluate a single-output model as a float vector of ``rows`` values."""
+    result = np.asarray(model(**inputs), dtype=float)
+    if result.size != rows:
+        raise ValueError(f"Sobol' indices need a single output per iteration, got shape {result.shape}")
+    return result.reshape(rows)
+
+def _average_ranks(sorted_values: np.ndarray, order: np.ndarray, out: np.ndarray) -> None:
+    """Write the ranks of a column into ``out``, averaging over ties."""
+    n = len(order)
+    positions = np.arange(n, dtype=float)
+    # Runs of equal values share the mean of their positions
+    starts = np.flatnonzero(np.r_[True, sorted_values[1:] != sorted_values[:-1]])
+    if len(starts) < n:
+        stops = np.r_[starts[1:], n]
+        positions = np.repeat((starts + stops - 1) / 2, stops - starts)
+    out[order] = positions
+
+def _correlations(columns: np.ndarray) -> np.ndarray:
+    """Pearson correlation matrix of the columns; constant columns give 0."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = np.corrcoef(columns, rowvar=False)
+    return np.nan_to_num(correlation, nan=0.0)
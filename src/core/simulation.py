@@ -1,11 +1,24 @@
 """
 Core Monte Carlo simulation engine.
 """
+import os
+import time
+import pickle
+import functools
 import numpy as np
-from typing import Callable, Dict, Optional, Union, List
-from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+from typing import Callable, ContextManager, Dict, Iterator, Optional, Sequence, Union, List, Tuple
+from contextlib import nullcontext
 from dataclasses import dataclass
-from ..utils.sampling import latin_hypercube_sampling
+from concurrent.futures import Executor
+from ..distributions.frozen import Distribution
+from ..utils.correlation import CORRELATIONS, Correlation, get_correlation
+from ..utils.sampling import SAMPLERS, Sampler, get_sampler
+from ..utils.statistics import StatsAccumulator
+from .expressions import compile_model
+from .backends import BACKENDS, chunk_bounds, open_executor, run_chunks, run_tasks
+from .profiling import PROFILERS, ChunkStats, RunHooks, RunProfiler, StageTimer, capture
+from .results import ConvergencePoint, SimulationResult
 
 @dataclass
 class SimulationConfig:
@@ -14,98 +27,1063 @@ class SimulationConfig:
     seed: Optional[int] = None
     num_threads: int = -1  # -1 means use all available cores
     stopping_criteria: Optional[Callable[[np.ndarray], bool]] = None
+    backend: str = "thread"  # "thread", "process" or "serial"
+    block_size: int = 65536  # iterations per block in streaming mode
+    tolerance: Optional[float] = None  # stop once the CI half-width is below this
+    tolerance_percentile: Optional[float] = None  # check a percentile (0-100) instead of the mean
+    confidence: float = 0.95  # confidence level of the tolerance interval
+    batch_size: Optional[int] = None  # iterations between checks, default iterations // 10
+    sampler: str = "random"  # "random", "lhs", "sobol" or "halton"
+    replicates: int = 1  # independently randomized designs, for RQMC error estimates
+    chunk_size: int = 8192  # iterations per worker task, each with its own random stream
+    correlation_method: str = "copula"  # "copula" or "iman_conover"
+    output_shape: Optional[Tuple[int, ...]] = None  # per-iteration model output shape; probed if None
+    keep_inputs: bool = False  # attach the input samples to the result of run_simulation
+    keep_draws: bool = False  # keep the last run's uniforms and inputs for resimulate
+    profile: Optional[str] = None  # "cprofile" or "tracemalloc" capture into result.run_stats
+    slowest_chunks: int = 10  # chunks whose timing result.run_stats keep, slowest first
+
+@dataclass
+class _Draws:
+    """Random numbers of a run, kept for :meth:`MonteCarloEngine.resimulate`."""
+    input_distributions: Dict[str, Callable[[], np.ndarray]]
+    correlation_matrix: Optional[np.ndarray]
+    uniforms: np.ndarray  # correlated uniforms, one column per input
+    inputs: np.ndarray  # the uniforms transformed by the distributions
 
 class MonteCarloEngine:
     """Core Monte Carlo simulation engine with support for various sampling methods."""
     
-    def __init__(self, config: SimulationConfig):
+    def __init__(
+        self,
+        config: SimulationConfig,
+        executor: Optional[Executor] = None,
+        hooks: Optional[Sequence[RunHooks]] = None
+    ):
         """Initialize the Monte Carlo simulation engine.
         
         Args:
             config: Simulation configuration parameters
+            executor: Long-lived worker pool matching ``config.backend`` to
+                run on; a pool is created per run if omitted
+            hooks: :class:`RunHooks` called as runs start, as chunks
+                complete and with every run's :class:`RunStats`
         """
+        if config.backend not in BACKENDS:
+            raise ValueError(f"Unknown execution backend: {config.backend}")
+        if config.sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler: {config.sampler}")
+        if config.correlation_method not in CORRELATIONS:
+            raise ValueError(f"Unknown correlation method: {config.correlation_method}")
+        if config.replicates < 1:
+            raise ValueError(f"Replicates must be at least 1, got {config.replicates}")
+        if config.chunk_size < 1:
+            raise ValueError(f"Chunk size must be at least 1, got {config.chunk_size}")
+        if config.profile is not None and config.profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {config.profile}")
+            
         self.config = config
-        self.rng = np.random.default_rng(seed=config.seed)
+        self.executor = executor
+        self.hooks = list(hooks or [])
+        # Timing of the latest run, including streamed ones
+        self.last_stats = None
+        # Root of the random streams; every run and chunk spawns from it
+        self.seed_sequence = np.random.SeedSequence(config.seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+        self._draws = None
         self.num_threads = (
             config.num_threads if config.num_threads > 0 
-            else max(1, len(os.sched_getaffinity(0)) - 1)
+            else max(1, _available_cpus() - 1)
         )
     
     def run_simulation(
         self,
-        model: Callable[..., np.ndarray],
+        model: Union[Callable[..., np.ndarray], str],
         input_distributions: Dict[str, Callable[[], np.ndarray]],
         correlation_matrix: Optional[np.ndarray] = None,
-        use_lhs: bool = False
-    ) -> np.ndarray:
+        use_lhs: bool = False,
+        out: Optional[np.ndarray] = None,
+        inputs_out: Optional[np.ndarray] = None
+    ) -> SimulationResult:
         """Run Monte Carlo simulation with the specified model and input distributions.
         
+        Uniform samples come from ``config.sampler``. With
+        ``config.replicates`` > 1 the iterations are split into independently
+        randomized designs whose means give a standard error estimate, which
+        is what makes randomized quasi-Monte Carlo error measurable.
+        
+        The iterations are cut into chunks of ``config.chunk_size`` that
+        workers sample, transform and evaluate themselves, each from its own
+        ``SeedSequence.spawn`` stream. The chunks do not depend on the number
+        of workers, so results are reproducible for a given seed whatever the
+        backend or thread count.
+        
+        When ``config.stopping_criteria`` or ``config.tolerance`` is set the
+        simulation runs in batches of ``config.batch_size`` iterations and
+        stops sampling as soon as the criterion is met after a batch.
+        
+        Workers write their chunks straight into ``out`` and ``inputs_out``
+        when given, so passing memory-mapped arrays streams a run to disk
+        as it completes.
+        
+        Every run is timed per phase, stage and chunk into a
+        :class:`RunStats`, attached to the result as ``run_stats``;
+        ``config.profile`` adds a cProfile profile or the tracemalloc peak.
+        
         Args:
-            model: Function that takes input samples and returns output
+            model: Function that takes input samples and returns output, or
+                a formula over the input names (see :func:`compile_model`)
             input_distributions: Dictionary mapping variable names to their sampling functions
-            correlation_matrix: Optional correlation matrix for input variables
-            use_lhs: Whether to use Latin Hypercube Sampling
+            correlation_matrix: Optional rank correlation matrix of the input variables,
+                induced by ``config.correlation_method``
+            use_lhs: Shortcut for ``config.sampler = "lhs"``
+            out: Optional array of shape ``(iterations, *output_shape)``
+                to write the results into
+            inputs_out: Optional array of shape ``(iterations, num_inputs)``
+                to write the input samples into, with ``config.keep_inputs``;
+                Fortran order keeps each input contiguous
             
         Returns:
-            Array of simulation results
+            Array of simulation results, annotated with the number of
+            iterations used, the convergence trace, replicate means,
+            the :class:`RunStats` and, with ``config.keep_inputs``, the
+            input samples. It is a view of ``out`` when given.
         """
-        num_vars = len(input_distributions)
-        
-        if use_lhs:
-            # Generate Latin Hypercube samples
-            samples = latin_hypercube_sampling(
-                self.config.iterations,
-                num_vars,
-                self.rng
+        with self._profiler() as profiler:
+            profiler.start(self.config.iterations)
+            with profiler.phase("setup"):
+                if isinstance(model, str):
+                    model = compile_model(model)
+                _check_buffers(self.config, len(input_distributions), out, inputs_out)
+            if self.config.stopping_criteria or self.config.tolerance is not None:
+                results = self._run_batched(
+                    model,
+                    input_distributions,
+                    correlation_matrix,
+                    use_lhs,
+                    profiler,
+                    out,
+                    inputs_out
+                )
+            else:
+                results = self._run_all(
+                    model,
+                    input_distributions,
+                    correlation_matrix,
+                    use_lhs,
+                    profiler,
+                    out,
+                    inputs_out
+                )
+            results.run_stats = self.last_stats = profiler.finish(len(results))
+        return results
+    
+    def _run_all(
+        self,
+        model: Callable[..., np.ndarray],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray],
+        use_lhs: bool,
+        profiler: RunProfiler,
+        out: Optional[np.ndarray] = None,
+        inputs_out: Optional[np.ndarray] = None
+    ) -> SimulationResult:
+        """Run every iteration at once."""
+        with profiler.phase("setup"):
+            designs = self._designs(len(input_distributions), use_lhs)
+            correlation = self._correlation(correlation_matrix)
+            chunks = [
+                chunk
+                for block in self._chunk_blocks(designs, self.config.iterations)
+                for chunk in block
+            ]
+        
+        # Run simulation in parallel on the configured backend
+        with profiler.phase("evaluate"), self._executor() as executor:
+            results, inputs, uniforms = self._evaluate(
+                model,
+                input_distributions,
+                correlation,
+                chunks,
+                executor,
+                profiler,
+                out,
+                inputs_out
             )
-        else:
-            # Generate random samples
-            samples = np.random.random((self.config.iterations, num_vars))
             
-        if correlation_matrix is not None:
-            # Apply correlation structure
-            samples = self._apply_correlation(samples, correlation_matrix)
+        with profiler.phase("finalize"):
+            self._keep_draws(input_distributions, correlation_matrix, uniforms, inputs)
+            return SimulationResult(
+                results,
+                replicate_means=_replicate_means(results, [n for _, n, _ in designs]),
+                inputs=self._result_inputs(input_distributions, inputs)
+            )
+    
+    def _run_batched(
+        self,
+        model: Callable[..., np.ndarray],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray],
+        use_lhs: bool,
+        profiler: RunProfiler,
+        out: Optional[np.ndarray] = None,
+        inputs_out: Optional[np.ndarray] = None
+    ) -> SimulationResult:
+        """Run batches until the stopping criterion or tolerance is met."""
+        batch_size = self.config.batch_size or max(1, self.config.iterations // 10)
+        z = NormalDist().inv_cdf(0.5 + self.config.confidence / 2)
         
-        # Transform samples according to input distributions
-        input_data = {}
-        for idx, (name, dist_func) in enumerate(input_distributions.items()):
-            input_data[name] = dist_func(samples[:, idx])
+        with profiler.phase("setup"):
+            designs = self._designs(len(input_distributions), use_lhs)
+            correlation = self._correlation(correlation_matrix)
+        results = out
+        inputs = inputs_out
+        uniforms = None
+        done = 0
+        trace = []
+        converged = False
+        with self._executor() as executor:
+            # Convergence is checked after every batch, so chunks are no
+            # larger than a batch
+            for chunks in self._chunk_blocks(designs, batch_size, min(self.config.chunk_size, batch_size)):
+                size = sum(stop - start for _, _, start, stop, _ in chunks)
+                with profiler.phase("evaluate"):
+                    if done == 0:
+                        block, block_inputs, block_uniforms = self._evaluate(
+                            model,
+                            input_distributions,
+                            correlation,
+                            chunks,
+                            executor,
+                            profiler
+                        )
+                        # Preallocate once the output shape is known
+                        if results is None:
+                            results = np.empty(
+                                (self.config.iterations,) + block.shape[1:],
+                                dtype=block.dtype
+                            )
+                            profiler.allocated(results)
+                        _store_chunk(results[:size], block)
+                        if block_inputs is not None:
+                            if inputs is None:
+                                inputs = np.empty((self.config.iterations, block_inputs.shape[1]), order="F")
+                                profiler.allocated(inputs)
+                            inputs[:size] = block_inputs
+                        if block_uniforms is not None:
+                            uniforms = np.empty((self.config.iterations, block_uniforms.shape[1]), order="F")
+                            profiler.allocated(uniforms)
+                            uniforms[:size] = block_uniforms
+                    else:
+                        self._evaluate(
+                            model,
+                            input_distributions,
+                            correlation,
+                            chunks,
+                            executor,
+                            profiler,
+                            results[done:done + size],
+                            None if inputs is None else inputs[done:done + size],
+                            None if uniforms is None else uniforms[done:done + size]
+                        )
+                done += size
+                
+                with profiler.phase("convergence"):
+                    point = _convergence_point(
+                        results[:done],
+                        z,
+                        self.config.tolerance_percentile
+                    )
+                    trace.append(point)
+                    
+                    if self.config.tolerance is not None:
+                        converged = bool(np.all(point.half_width <= self.config.tolerance))
+                    if not converged and self.config.stopping_criteria:
+                        converged = bool(self.config.stopping_criteria(results[:done]))
+                if converged:
+                    # Early stopping if criteria met
+                    break
+                    
+        with profiler.phase("finalize"):
+            if done < len(results) and out is not None:
+                # The caller's buffers are kept and only their head is valid
+                results = results[:done]
+                if inputs is not None:
+                    inputs = inputs[:done]
+                if uniforms is not None:
+                    uniforms = uniforms[:done].copy(order="F")
+            elif done < len(results):
+                # Release the unused tail of the buffers
+                results = results[:done].copy()
+                if inputs is not None:
+                    inputs = inputs[:done].copy(order="F")
+                if uniforms is not None:
+                    uniforms = uniforms[:done].copy(order="F")
+            self._keep_draws(input_distributions, correlation_matrix, uniforms, inputs)
+            return SimulationResult(
+                results,
+                converged,
+                trace,
+                _replicate_means(results, self._replicate_sizes()),
+                self._result_inputs(input_distributions, inputs)
+            )
+    
+    def can_extend(self, use_lhs: bool = False) -> bool:
+        """Whether a run's iterations are a prefix of a longer run's.
+        
+        Chunk streams only depend on their position, so this holds unless
+        the design spans all iterations (Latin Hypercube), the iterations
+        are split into replicates, or the run stops early.
+        """
+        return (
+            not use_lhs
+            and self.config.sampler != "lhs"
+            and self.config.replicates == 1
+            and self.config.stopping_criteria is None
+            and self.config.tolerance is None
+        )
+    
+    def extend_simulation(
+        self,
+        model: Union[Callable[..., np.ndarray], str],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        previous: np.ndarray,
+        correlation_matrix: Optional[np.ndarray] = None,
+        use_lhs: bool = False
+    ) -> SimulationResult:
+        """Continue an earlier run of the same setup to ``config.iterations``.
+        
+        ``previous`` must come from an engine with the same seed and
+        configuration apart from the iteration count. Its complete chunks
+        are copied and only the iterations after them are simulated, which
+        gives the same result as :meth:`run_simulation` would. A longer
+        previous run is cut short the same way.
+        
+        Args:
+            model: Function that takes input samples and returns output, or
+                a formula over the input names (see :func:`compile_model`)
+            input_distributions: Dictionary mapping variable names to their sampling functions
+            previous: Results of the earlier run, with its ``inputs`` when
+                ``config.keep_inputs`` is set
+            correlation_matrix: Optional rank correlation matrix of the input variables,
+                induced by ``config.correlation_method``
+            use_lhs: Shortcut for ``config.sampler = "lhs"``
+        
+        Returns:
+            Array of simulation results, as from :meth:`run_simulation`;
+            its ``run_stats`` only count the iterations simulated
+        """
+        if not self.can_extend(use_lhs):
+            raise ValueError(
+                "Only runs without Latin Hypercube sampling, replicates or "
+                "early stopping can be extended"
+            )
+        keep_inputs = self.config.keep_inputs
+        previous_inputs = getattr(previous, "inputs", None)
+        if keep_inputs and previous_inputs is None:
+            raise ValueError("The previous run did not keep its inputs")
+            
+        with self._profiler() as profiler:
+            profiler.start(self.config.iterations)
+            with profiler.phase("setup"):
+                if isinstance(model, str):
+                    model = compile_model(model)
+                
+                # The trailing partial chunk was drawn with a different length, so
+                # it is simulated again
+                iterations = self.config.iterations
+                reused = min(len(previous), iterations) // self.config.chunk_size * self.config.chunk_size
+                results = np.empty((iterations,) + previous.shape[1:], dtype=previous.dtype)
+                results[:reused] = previous[:reused]
+                inputs = None
+                if keep_inputs:
+                    inputs = np.empty((iterations, len(input_distributions)), order="F")
+                    for j, name in enumerate(input_distributions):
+                        inputs[:reused, j] = previous_inputs[name][:reused]
+                profiler.allocated(results, inputs)
+                
+                designs = self._designs(len(input_distributions), use_lhs)
+                chunks = [
+                    chunk
+                    for block in self._chunk_blocks(designs, iterations)
+                    for chunk in block
+                    if chunk[3] > reused
+                ]
+            if chunks:
+                with profiler.phase("evaluate"), self._executor() as executor:
+                    self._evaluate(
+                        model,
+                        input_distributions,
+                        self._correlation(correlation_matrix),
+                        chunks,
+                        executor,
+                        profiler,
+                        results[reused:],
+                        None if inputs is None else inputs[reused:]
+                    )
+            results = SimulationResult(results, inputs=_input_columns(input_distributions, inputs))
+            results.run_stats = self.last_stats = profiler.finish(iterations - reused)
+        return results
+    
+    def resimulate(
+        self,
+        model: Union[Callable[..., np.ndarray], str],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray] = None
+    ) -> SimulationResult:
+        """Re-run the last simulation after some input distributions changed.
         
-        # Run simulation in parallel
-        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
-            chunk_size = self.config.iterations // self.num_threads
-            futures = []
+        With ``config.keep_draws`` the engine keeps the correlated uniforms
+        and input samples of its last :meth:`run_simulation`. Only the
+        columns whose distribution differs are transformed again, from the
+        same uniforms, and the model is re-evaluated; nothing is resampled.
+        Both runs therefore use common random numbers, so their difference
+        reflects the changed inputs rather than sampling noise. Successive
+        calls compare against the latest distributions.
+        
+        Args:
+            model: Function that takes input samples and returns output, or
+                a formula over the input names (see :func:`compile_model`)
+            input_distributions: The previous run's variables, in the same
+                order, with any of their distributions changed
+            correlation_matrix: Correlation matrix of the previous run
             
-            for i in range(0, self.config.iterations, chunk_size):
-                chunk_data = {
-                    name: data[i:i + chunk_size]
-                    for name, data in input_data.items()
-                }
-                futures.append(
-                    executor.submit(self._run_chunk, model, chunk_data)
+        Returns:
+            Array of simulation results, annotated with the replicate means
+            and, with ``config.keep_inputs``, the input samples
+        """
+        if not self.can_resimulate(input_distributions, correlation_matrix):
+            raise ValueError(
+                "Resimulation needs a previous run with config.keep_draws "
+                "over the same variables and correlation matrix"
+            )
+        with self._profiler() as profiler:
+            profiler.start(len(self._draws.inputs))
+            with profiler.phase("setup"):
+                if isinstance(model, str):
+                    model = compile_model(model)
+                    
+                draws = self._draws
+                changed = [
+                    j for j, (name, dist) in enumerate(input_distributions.items())
+                    if dist != draws.input_distributions[name]
+                ]
+                timer = StageTimer()
+                inputs = draws.inputs
+                if changed and self.config.keep_inputs:
+                    # The previous result exposes these inputs; leave them as they were
+                    inputs = inputs.copy(order="F")
+                    profiler.allocated(inputs)
+                dists = list(input_distributions.values())
+                for j in changed:
+                    if isinstance(dists[j], Distribution):
+                        dists[j].ppf(draws.uniforms[:, j], out=inputs[:, j])
+                    else:
+                        inputs[:, j] = dists[j](draws.uniforms[:, j].copy())
+                timer.lap("transform")
+                self._draws = _Draws(dict(input_distributions), draws.correlation_matrix, draws.uniforms, inputs)
+                
+                n = len(inputs)
+                bounds = [
+                    (start, min(start + self.config.chunk_size, n))
+                    for start in range(0, n, self.config.chunk_size)
+                ]
+            with profiler.phase("evaluate"), self._executor() as executor:
+                chunks = run_chunks(
+                    self._backend(),
+                    model,
+                    _input_columns(input_distributions, inputs),
+                    bounds,
+                    executor
                 )
+                timer.lap("model")
+            with profiler.phase("finalize"):
+                first = np.asarray(chunks[0])
+                results = np.empty((n,) + first.shape[1:], dtype=first.dtype)
+                profiler.allocated(results)
+                for (start, stop), result in zip(bounds, chunks):
+                    _store_chunk(results[start:stop], result)
+                timer.lap("store")
+                profiler.add_stages(timer.stages)
+                results = SimulationResult(
+                    results,
+                    replicate_means=_replicate_means(results, self._replicate_sizes()),
+                    inputs=self._result_inputs(input_distributions, inputs)
+                )
+            results.run_stats = self.last_stats = profiler.finish(n)
+        return results
+    
+    def can_resimulate(
+        self,
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray] = None
+    ) -> bool:
+        """Whether :meth:`resimulate` can reuse the draws of the last run."""
+        draws = self._draws
+        if draws is None or list(input_distributions) != list(draws.input_distributions):
+            return False
+        if correlation_matrix is None or draws.correlation_matrix is None:
+            return correlation_matrix is None and draws.correlation_matrix is None
+        return np.array_equal(np.asarray(correlation_matrix, dtype=float), draws.correlation_matrix)
+    
+    def run_simulation_stream(
+        self,
+        model: Union[Callable[..., np.ndarray], str],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray] = None,
+        use_lhs: bool = False,
+        block_size: Optional[int] = None
+    ) -> Iterator[np.ndarray]:
+        """Run the simulation block by block with bounded memory.
+        
+        The blocks of each replicate continue one design, e.g. a single
+        Latin Hypercube or Sobol' sequence over all its iterations, and are
+        evaluated as the same chunks of ``config.chunk_size`` iterations as
+        :meth:`run_simulation`, so the blocks of a seeded run concatenate to
+        its results whatever the block size. As many whole chunks as fit in
+        a block (at least one) are evaluated at a time and blocks are cut
+        from them as views; rows left over are copied and completed from the
+        next chunks. Memory use is therefore bounded by about two blocks, or
+        one chunk plus one block when chunks are larger, regardless of the
+        iteration count. Once every block has been consumed, the engine's ``last_stats``
+        hold the :class:`RunStats` of the run.
+        
+        Args:
+            model: Function that takes input samples and returns output, or
+                a formula over the input names (see :func:`compile_model`)
+            input_distributions: Dictionary mapping variable names to their sampling functions
+            correlation_matrix: Optional rank correlation matrix of the input variables,
+                induced by ``config.correlation_method``
+            use_lhs: Shortcut for ``config.sampler = "lhs"``
+            block_size: Iterations per block (defaults to ``config.block_size``)
             
-            results = np.concatenate([f.result() for f in futures])
+        Yields:
+            Array of simulation results for each block
+        """
+        block_size = block_size or self.config.block_size
+        if block_size <= 0:
+            raise ValueError(f"Block size must be positive, got {block_size}")
+        if isinstance(model, str):
+            model = compile_model(model)
             
-        if self.config.stopping_criteria and self.config.stopping_criteria(results):
-            # Early stopping if criteria met
-            return results
+        with self._profiler() as profiler:
+            profiler.start(self.config.iterations)
+            with profiler.phase("setup"):
+                designs = self._designs(len(input_distributions), use_lhs)
+                correlation = self._correlation(correlation_matrix)
+            done = 0
+            pending = None
+            with self._executor() as executor:
+                for chunks in self._chunk_blocks(designs, block_size):
+                    with profiler.phase("evaluate"):
+                        results, _, _ = self._evaluate(
+                            model,
+                            input_distributions,
+                            correlation,
+                            chunks,
+                            executor,
+                            profiler
+                        )
+                    start = 0
+                    if pending is not None:
+                        # Complete the block carried over from the last chunks
+                        start = min(block_size - len(pending), len(results))
+                        pending = np.concatenate([pending, results[:start]])
+                        if len(pending) == block_size:
+                            done += block_size
+                            yield pending
+                            pending = None
+                    # Hand out whole blocks and carry the rest into the next one
+                    whole = start + (len(results) - start) // block_size * block_size
+                    for first in range(start, whole, block_size):
+                        done += block_size
+                        yield results[first:first + block_size]
+                    if whole < len(results):
+                        pending = results[whole:].copy()
+            if pending is not None:
+                done += len(pending)
+                yield pending
+            self.last_stats = profiler.finish(done)
+    
+    def run_simulation_summary(
+        self,
+        model: Union[Callable[..., np.ndarray], str],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray] = None,
+        use_lhs: bool = False,
+        block_size: Optional[int] = None,
+        bins: Optional[int] = None
+    ) -> StatsAccumulator:
+        """Run the simulation and keep only its summary statistics.
+        
+        Blocks from :meth:`run_simulation_stream` are reduced into a
+        :class:`StatsAccumulator` as they complete, so the raw outputs are
+        never held beyond one block. With ``bins`` the accumulator also
+        keeps an adaptive histogram, from which charts are drawn.
+        
+        Args:
+            model: Function that takes input samples and returns output, or
+                a formula over the input names (see :func:`compile_model`)
+            input_distributions: Dictionary mapping variable names to their sampling functions
+            correlation_matrix: Optional rank correlation matrix of the input variables,
+                induced by ``config.correlation_method``
+            use_lhs: Whether to use Latin Hypercube Sampling
+            block_size: Iterations per block (defaults to ``config.block_size``)
+            bins: Number of histogram bins to accumulate, if any
             
-        return results
+        Returns:
+            Accumulated statistics of the simulation outputs
+        """
+        stats = StatsAccumulator(bins=bins)
+        for block in self.run_simulation_stream(
+            model,
+            input_distributions,
+            correlation_matrix,
+            use_lhs,
+            block_size
+        ):
+            stats.update(block)
+        return stats
+    
+    def _executor(self) -> ContextManager[Optional[Executor]]:
+        """The injected worker pool (left open), or a new one for this run."""
+        backend = self._backend()
+        if self.executor is not None and backend != "serial":
+            return nullcontext(self.executor)
+        return open_executor(backend, self.num_threads)
+    
+    def _backend(self) -> str:
+        """Backend of the runs: cProfile follows the calling thread only, so
+        thread chunks then run serially in it."""
+        if self.config.profile == "cprofile" and self.config.backend == "thread":
+            return "serial"
+        return self.config.backend
+    
+    def _profiler(self) -> RunProfiler:
+        """Collector of the next run's :class:`RunStats`."""
+        backend = self._backend()
+        if backend == "serial":
+            workers = 1
+        else:
+            workers = getattr(self.executor, "_max_workers", None) or self.num_threads
+        return RunProfiler(
+            self.config.profile,
+            backend,
+            workers,
+            self.hooks,
+            self.config.slowest_chunks
+        )
+    
+    def _designs(
+        self,
+        num_vars: int,
+        use_lhs: bool
+    ) -> List[Tuple[Sampler, int, np.random.SeedSequence]]:
+        """Sampler, iteration count and chunk seed of each replicate design."""
+        name = "lhs" if use_lhs else self.config.sampler
+        sizes = self._replicate_sizes()
+        
+        # A fresh stream per run, split into independent design randomization
+        # and chunk streams for every replicate
+        run_seed = self.seed_sequence.spawn(1)[0]
+        designs = []
+        for seed, n in zip(run_seed.spawn(len(sizes)), sizes):
+            design_seed, chunk_seed = seed.spawn(2)
+            sampler = get_sampler(name, num_vars, np.random.default_rng(design_seed))
+            designs.append((sampler, n, chunk_seed))
+        return designs
     
-    def _apply_correlation(
+    def _chunk_blocks(
         self,
-        samples: np.ndarray,
-        correlation_matrix: np.ndarray
-    ) -> np.ndarray:
-        """Apply correlation structure to samples using Cholesky decomposition."""
-        chol = np.linalg.cholesky(correlation_matrix)
-        return samples @ chol.T
+        designs: List[Tuple[Sampler, int, np.random.SeedSequence]],
+        block_size: int,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[List[Tuple]]:
+        """Group the chunks of every design into blocks of whole chunks.
+        
+        Each chunk is a ``(sampler, n, start, stop, seed)`` task. Seeds are
+        spawned in chunk order, so a chunk's stream only depends on its
+        position and never on how the chunks are distributed over workers
+        or grouped into blocks. Blocks hold as many chunks as fit in
+        ``block_size``, and at least one.
+        
+        Args:
+            designs: Sampler, iteration count and chunk seed of each design
+            block_size: Iterations per block
+            chunk_size: Iterations per chunk; defaults to ``config.chunk_size``.
+                Other sizes give other random streams.
+        """
+        chunk_size = chunk_size or self.config.chunk_size
+        per_block = max(1, block_size // chunk_size)
+        for sampler, n, seed in designs:
+            bounds = [
+                (start, min(start + chunk_size, n))
+                for start in range(0, n, chunk_size)
+            ]
+            for i in range(0, len(bounds), per_block):
+                group = bounds[i:i + per_block]
+                yield [
+                    (sampler, n, start, stop, chunk_seed)
+                    for (start, stop), chunk_seed in zip(group, seed.spawn(len(group)))
+                ]
+    
+    def _replicate_sizes(self) -> List[int]:
+        """Number of iterations in each replicate design."""
+        replicates = max(1, min(self.config.replicates, self.config.iterations))
+        return [
+            stop - start
+            for start, stop in chunk_bounds(self.config.iterations, replicates)
+        ]
+    
+    def _keep_draws(
+        self,
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray],
+        uniforms: Optional[np.ndarray],
+        inputs: Optional[np.ndarray]
+    ) -> None:
+        """Remember a run's random numbers when ``config.keep_draws`` is set."""
+        if uniforms is None:
+            return
+        if correlation_matrix is not None:
+            correlation_matrix = np.array(correlation_matrix, dtype=float)
+        self._draws = _Draws(dict(input_distributions), correlation_matrix, uniforms, inputs)
+    
+    def _result_inputs(
+        self,
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        inputs: Optional[np.ndarray]
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Input columns to attach to a result, if ``config.keep_inputs``."""
+        if not self.config.keep_inputs:
+            return None
+        return _input_columns(input_distributions, inputs)
     
-    def _run_chunk(
+    def _correlation(
+        self,
+        correlation_matrix: Optional[np.ndarray]
+    ) -> Optional[Correlation]:
+        """Cached correlation transform of ``correlation_matrix``, if any."""
+        if correlation_matrix is None:
+            return None
+        return get_correlation(correlation_matrix, self.config.correlation_method)
+    
+    def _evaluate(
         self,
         model: Callable[..., np.ndarray],
-        chunk_data: Dict[str, np.ndarray]
-    ) -> np.ndarray:
-        """Run a chunk of simulations."""
-        return model(**chunk_data)
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation: Optional[Correlation],
+        chunks: List[Tuple],
+        executor: Optional[Executor],
+        profiler: RunProfiler,
+        out: Optional[np.ndarray] = None,
+        inputs_out: Optional[np.ndarray] = None,
+        uniforms_out: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+        """Sample, transform and evaluate ``chunks`` into one result array.
+        
+        Results are written straight into ``out``, which is allocated from
+        ``config.output_shape`` if not supplied, or else from the result of
+        the first chunk. Thread and serial workers fill their own slice of
+        it; process results are stored as they arrive. With
+        ``config.keep_inputs`` the input samples are collected the same way
+        into the columns of ``inputs_out``, and with ``config.keep_draws``
+        also the correlated uniforms into ``uniforms_out``. The timing of
+        every chunk is passed to ``profiler`` as it completes.
+        
+        Returns:
+            Results, the input sample matrix and the uniforms (None unless kept)
+        """
+        keep_inputs = self.config.keep_inputs or self.config.keep_draws
+        keep_uniforms = self.config.keep_draws
+        simulate = functools.partial(
+            _simulate_chunk,
+            model,
+            input_distributions,
+            correlation,
+            keep_inputs,
+            keep_uniforms,
+            profiler.chunk_profile
+        )
+        sizes = [stop - start for _, _, start, stop, _ in chunks]
+        bounds = list(zip(np.cumsum([0] + sizes[:-1]).tolist(), np.cumsum(sizes).tolist()))
+        total = bounds[-1][1]
+        if keep_inputs and inputs_out is None:
+            inputs_out = np.empty((total, len(input_distributions)), order="F")
+            profiler.allocated(inputs_out)
+        if keep_uniforms and uniforms_out is None:
+            uniforms_out = np.empty((total, len(input_distributions)), order="F")
+            profiler.allocated(uniforms_out)
+        if out is None:
+            if self.config.output_shape is not None:
+                out = np.empty((total,) + tuple(self.config.output_shape))
+            else:
+                # Probe the output shape and dtype with the first chunk
+                probe, probe_inputs, probe_uniforms, chunk = simulate(*chunks[0])
+                profiler.chunk(chunk)
+                out = np.empty((total,) + probe.shape[1:], dtype=probe.dtype)
+                out[:len(probe)] = probe
+                if keep_inputs:
+                    inputs_out[:len(probe)] = probe_inputs
+                if keep_uniforms:
+                    uniforms_out[:len(probe)] = probe_uniforms
+                del probe, probe_inputs, probe_uniforms
+                chunks, bounds = chunks[1:], bounds[1:]
+            profiler.allocated(out)
+            if not chunks:
+                return out, inputs_out, uniforms_out
+                
+        backend = self._backend()
+        if backend == "process" and not _picklable(input_distributions):
+            # Distributions such as lambdas cannot be sent to the workers, so
+            # the inputs are drawn here and shared with them instead
+            timer = StageTimer()
+            offset = bounds[0][0]
+            input_data = self._draw_all_inputs(
+                input_distributions,
+                correlation,
+                chunks,
+                None if uniforms_out is None else uniforms_out[offset:],
+                timer
+            )
+            if keep_inputs:
+                for j, values in enumerate(input_data.values()):
+                    inputs_out[offset:, j] = values
+            results = run_chunks(
+                backend,
+                model,
+                input_data,
+                [(lo - offset, hi - offset) for lo, hi in bounds],
+                executor
+            )
+            timer.lap("model")
+            for (lo, hi), result in zip(bounds, results):
+                _store_chunk(out[lo:hi], result)
+            timer.lap("store")
+            profiler.add_stages(timer.stages)
+        elif backend == "process":
+            results = run_tasks(backend, simulate, chunks, executor)
+            for (lo, hi), (result, inputs, uniforms, chunk) in zip(bounds, results):
+                stored = time.perf_counter()
+                _store_chunk(out[lo:hi], result)
+                if inputs is not None:
+                    inputs_out[lo:hi] = inputs
+                if uniforms is not None:
+                    uniforms_out[lo:hi] = uniforms
+                chunk.stages["store"] = chunk.stages.get("store", 0.0) + time.perf_counter() - stored
+                profiler.chunk(chunk)
+        else:
+            tasks = [
+                chunk + (
+                    out[lo:hi],
+                    None if inputs_out is None else inputs_out[lo:hi],
+                    None if uniforms_out is None else uniforms_out[lo:hi]
+                )
+                for chunk, (lo, hi) in zip(chunks, bounds)
+            ]
+            for chunk in run_tasks(backend, simulate, tasks, executor):
+                profiler.chunk(chunk)
+        return out, inputs_out, uniforms_out
+    
+    def _draw_all_inputs(
+        self,
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation: Optional[Correlation],
+        chunks: List[Tuple],
+        uniforms_out: Optional[np.ndarray] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Dict[str, np.ndarray]:
+        """Draw the inputs of all ``chunks`` into one contiguous array per variable."""
+        size = sum(stop - start for _, _, start, stop, _ in chunks)
+        input_data = {}
+        offset = 0
+        for sampler, n, start, stop, seed in chunks:
+            samples = sampler.sample_chunk(n, start, stop, seed)
+            if timer is not None:
+                timer.lap("sample")
+            uniforms = None if uniforms_out is None else uniforms_out[offset:offset + stop - start]
+            for name, values in _draw_inputs(samples, input_distributions, correlation, uniforms, timer).items():
+                if name not in input_data:
+                    input_data[name] = np.empty(size, dtype=np.asarray(values).dtype)
+                input_data[name][offset:offset + stop - start] = values
+            if timer is not None:
+                timer.lap("store")
+            offset += stop - start
+        return input_data
+
+def _check_buffers(
+    config: SimulationConfig,
+    num_inputs: int,
+    out: Optional[np.ndarray],
+    inputs_out: Optional[np.ndarray]
+) -> None:
+    """Validate caller-supplied result and input buffers."""
+    if out is not None and len(out) != config.iterations:
+        raise ValueError(f"Output buffer must have {config.iterations} rows, got {len(out)}")
+    if inputs_out is not None:
+        if not config.keep_inputs:
+            raise ValueError("An input buffer needs config.keep_inputs")
+        if inputs_out.shape != (config.iterations, num_inputs):
+            raise ValueError(
+                f"Input buffer must have shape {(config.iterations, num_inputs)}, "
+                f"got {inputs_out.shape}"
+            )
+
+def _simulate_chunk(
+    model: Callable[..., np.ndarray],
+    input_distributions: Dict[str, Callable[[], np.ndarray]],
+    correlation: Optional[Correlation],
+    keep_inputs: bool,
+    keep_uniforms: bool,
+    profile: Optional[str],
+    sampler: Sampler,
+    n: int,
+    start: int,
+    stop: int,
+    seed: np.random.SeedSequence,
+    out: Optional[np.ndarray] = None,
+    inputs_out: Optional[np.ndarray] = None,
+    uniforms_out: Optional[np.ndarray] = None
+) -> Union[ChunkStats, Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray], ChunkStats]]:
+    """Worker entry point: sample, transform and evaluate one chunk.
+    
+    The results (and, with ``keep_inputs`` and ``keep_uniforms``, the input
+    samples and correlated uniforms) are written into ``out``,
+    ``inputs_out`` and ``uniforms_out`` when given, else returned as a
+    ``(results, inputs, uniforms, chunk stats)`` tuple. The stages are
+    timed either way, and captured with the ``profile`` profiler if set.
+    """
+    timer = StageTimer()
+    with capture(profile) as captured:
+        samples = sampler.sample_chunk(n, start, stop, seed)
+        timer.lap("sample")
+        if keep_uniforms and uniforms_out is None:
+            uniforms_out = np.empty((stop - start, len(input_distributions)), order="F")
+        input_data = _draw_inputs(samples, input_distributions, correlation, uniforms_out, timer)
+        if keep_inputs:
+            if inputs_out is None:
+                inputs_out = np.empty((stop - start, len(input_data)), order="F")
+            for j, values in enumerate(input_data.values()):
+                inputs_out[:, j] = values
+            timer.lap("store")
+        del samples
+        result = model(**input_data)
+        timer.lap("model")
+        if out is not None:
+            _store_chunk(out, result)
+            timer.lap("store")
+    chunk = timer.chunk(start, stop, captured)
+    if out is None:
+        return np.asarray(result), inputs_out, uniforms_out, chunk
+    return chunk
+
+def _store_chunk(out: np.ndarray, result: np.ndarray) -> None:
+    """Copy a chunk's model results into its slice of the output array."""
+    result = np.asarray(result)
+    if result.shape != out.shape:
+        raise ValueError(
+            f"Model returned shape {result.shape} for a chunk of "
+            f"{len(out)} iterations, expected {out.shape}"
+        )
+    out[...] = result
+
+def _draw_inputs(
+    samples: np.ndarray,
+    input_distributions: Dict[str, Callable[[], np.ndarray]],
+    correlation: Optional[Correlation],
+    uniforms_out: Optional[np.ndarray] = None,
+    timer: Optional[StageTimer] = None
+) -> Dict[str, np.ndarray]:
+    """Transform uniform samples by the correlation and input distributions.
+    
+    Samples are column-major, so each variable is a contiguous column;
+    frozen distributions transform their column in place and the model
+    receives views of the sample matrix without copies. The correlated
+    uniforms are copied into ``uniforms_out`` first if given. ``timer``
+    laps the "correlate" and "transform" stages.
+    """
+    if correlation is not None:
+        # Apply correlation structure, in place
+        samples = correlation(samples)
+    if uniforms_out is not None:
+        uniforms_out[...] = samples
+    if timer is not None:
+        timer.lap("correlate")
+    
+    # Transform samples according to input distributions
+    input_data = {}
+    for idx, (name, dist_func) in enumerate(input_distributions.items()):
+        column = samples[:, idx]
+        if isinstance(dist_func, Distribution) and column.flags.writeable:
+            input_data[name] = dist_func.ppf(column, out=column)
+        else:
+            input_data[name] = dist_func(column)
+    if timer is not None:
+        timer.lap("transform")
+    return input_data
+
+def _input_columns(
+    input_distributions: Dict[str, Callable[[], np.ndarray]],
+    inputs: Optional[np.ndarray]
+) -> Optional[Dict[str, np.ndarray]]:
+    """Name the columns of the input sample matrix (views, no copies)."""
+    if inputs is None:
+        return None
+    return {name: inputs[:, j] for j, name in enumerate(input_distributions)}
+
+def _picklable(obj) -> bool:
+    """Whether ``obj`` can be sent to worker processes."""
+    try:
+        pickle.dumps(obj)
+    except (pickle.PicklingError, AttributeError, TypeError):
+        return False
+    return True
+
+def _convergence_point(
+    results: np.ndarray,
+    z: float,
+    percentile: Optional[float] = None
+) -> ConvergencePoint:
+    """Estimate the precision of the mean or a percentile of ``results``.
+    
+    The mean uses its standard error; a percentile uses the distribution-free
+    order-statistic interval around its rank.
+    """
+    n = len(results)
+    if percentile is None:
+        estimate = np.mean(results, axis=0)
+        std = np.std(results, axis=0, ddof=1) if n > 1 else np.full_like(estimate, np.inf)
+        return ConvergencePoint(n, estimate, z * std / np.sqrt(n))
+        
+    p = percentile / 100
+    spread = z * np.sqrt(n * p * (1 - p))
+    lo = int(np.clip(np.floor(n * p - spread), 0, n - 1))
+    hi = int(np.clip(np.ceil(n * p + spread), 0, n - 1))
+    ordered = np.partition(results, [lo, hi], axis=0)
+    return ConvergencePoint(
+        n,
+        np.percentile(results, percentile, axis=0),
+        (ordered[hi] - ordered[lo]) / 2
+    )
+
+def _replicate_means(
+    results: np.ndarray,
+    sizes: List[int]
+) -> Optional[np.ndarray]:
+    """Means of the results of every completed replicate design."""
+    if len(sizes) < 2:
+        return None
+    means = []
+    start = 0
+    for n in sizes:
+        if start + n > len(results):
+            break
+        means.append(np.mean(results[start:start + n], axis=0))
+        start += n
+    return np.array(means)
+
+def _available_cpus() -> int:
+    """Number of CPUs usable by this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
@@ -0,0 +1,231 @@
+"""
+On-disk storage of the full iteration data of simulation runs.
+
+Each run gets a directory named by its run ID, holding the outputs and
+the input samples as ``.npy`` files plus a ``run.json`` description. The
+files are created up front and memory-mapped as the engine's output
+buffers, so every chunk lands on disk as soon as it is simulated and runs
+larger than memory only ever occupy the page cache. Stored runs are opened
+again lazily by run ID: arrays are mapped, not read, and
+:meth:`StoredRun.stats` reduces them block by block.
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import numpy as np
+from dataclasses import asdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from ..utils.statistics import StatsAccumulator
+from .results import SimulationResult
+from .simulation import MonteCarloEngine, _input_columns
+
+# Run location, overridable per user
+DEFAULT_RUN_DIR = os.environ.get("MCSIM_RUN_DIR") or os.path.join(
+    os.path.expanduser("~"), ".mcsim", "runs"
+)
+
+class StoredRun:
+    """A run in a :class:`RunStore`, opened lazily.
+
+    Attributes:
+        run_id: Identifier of the run
+        directory: Directory holding its files
+        info: The run's description (configuration, inputs, model, timing)
+    """
+
+    def __init__(self, directory: str):
+        """Open a stored run.
+
+        Args:
+            directory: Directory of the run
+        """
+        self.directory = directory
+        self.run_id = os.path.basename(directory)
+        with open(os.path.join(directory, "run.json")) as f:
+            self.info = json.load(f)
+        if not self.info["complete"]:
+            raise ValueError(f"Run {self.run_id} did not complete")
+        self._results = None
+
+    @property
+    def results(self) -> SimulationResult:
+        """Outputs of every iteration, memory-mapped, with their inputs if stored."""
+        if self._results is None:
+            iterations = self.info["iterations"]
+            results = np.load(self._path("results.npy"), mmap_mode="r")[:iterations]
+            inputs = None
+            if self.info["inputs"]:
+                inputs = np.load(self._path("inputs.npy"), mmap_mode="r")[:iterations]
+                inputs = _input_columns(dict.fromkeys(self.info["inputs"]), inputs)
+            self._results = SimulationResult(
+                results,
+                converged=self.info["converged"],
+                inputs=inputs
+            )
+        return self._results
+
+    @property
+    def inputs(self) -> Optional[Dict[str, np.ndarray]]:
+        """Memory-mapped input samples by variable name, if stored."""
+        return self.results.inputs
+
+    def blocks(self, block_size: int = 65536) -> Iterator[np.ndarray]:
+        """Outputs in consecutive blocks of at most ``block_size`` iterations."""
+        results = self.results
+        for start in range(0, len(results), block_size):
+            yield np.asarray(results[start:start + block_size])
+
+    def stats(self, bins: Optional[int] = None, block_size: int = 65536) -> StatsAccumulator:
+        """Summary statistics (and histogram) reduced block by block.
+
+        The result can be passed to :func:`create_histogram` directly.
+        """
+        stats = StatsAccumulator(bins=bins)
+        for block in self.blocks(block_size):
+            stats.update(block)
+        return stats
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+class RunStore:
+    """Directory of stored runs, each reopenable by its run ID."""
+
+    def __init__(self, directory: Optional[str] = None):
+        """Open (or create) a run store.
+
+        Args:
+            directory: Where runs are stored; defaults to :data:`DEFAULT_RUN_DIR`
+        """
+        self.directory = directory or DEFAULT_RUN_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    def run(
+        self,
+        engine: MonteCarloEngine,
+        model: Callable[..., np.ndarray],
+        input_distributions: Dict[str, Callable[[], np.ndarray]],
+        correlation_matrix: Optional[np.ndarray] = None,
+        use_lhs: bool = False,
+        description: str = ""
+    ) -> StoredRun:
+        """Run a simulation, streaming its iterations into a new stored run.
+
+        Outputs are always stored; input samples when ``engine.config``
+        keeps them. The output shape is ``config.output_shape``, or probed
+        by evaluating the model once at the median of every input.
+
+        Args:
+            engine: Engine configured for the run
+            model: Function that takes input samples and returns output, or
+                a formula over the input names
+            input_distributions: Dictionary mapping variable names to their sampling functions
+            correlation_matrix: Optional rank correlation matrix of the input variables
+            use_lhs: Whether to use Latin Hypercube Sampling
+            description: Free text stored with the run, e.g. the model formula
+
+        Returns:
+            The stored run
+        """
+        config = engine.config
+        run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        directory = os.path.join(self.directory, run_id)
+        os.makedirs(directory)
+        shape, dtype = _output_layout(engine, model, input_distributions)
+        info = {
+            "run_id": run_id,
+            "created": time.time(),
+            "description": description,
+            "config": {
+                name: value for name, value in asdict(config).items()
+                if name != "stopping_criteria"
+            },
+            "distributions": {name: repr(dist) for name, dist in input_distributions.items()},
+            "correlation_matrix": None if correlation_matrix is None else np.asarray(correlation_matrix, dtype=float).tolist(),
+            "use_lhs": use_lhs,
+            "inputs": list(input_distributions) if config.keep_inputs else None,
+            "iterations": 0,
+            "converged": False,
+            "complete": False,
+        }
+        _write_info(directory, info)
+
+        out = np.lib.format.open_memmap(
+            os.path.join(directory, "results.npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=(config.iterations,) + shape
+        )
+        inputs_out = None
+        if config.keep_inputs:
+            inputs_out = np.lib.format.open_memmap(
+                os.path.join(directory, "inputs.npy"),
+                mode="w+",
+                dtype=float,
+                shape=(config.iterations, len(input_distributions)),
+                fortran_order=True
+            )
+        started = time.perf_counter()
+        results = engine.run_simulation(
+            model, input_distributions, correlation_matrix, use_lhs, out, inputs_out
+        )
+        out.flush()
+        if inputs_out is not None:
+            inputs_out.flush()
+        del out, inputs_out
+
+        info.update(
+            iterations=len(results),
+            converged=results.converged,
+            seconds=time.perf_counter() - started,
+            complete=True
+        )
+        _write_info(directory, info)
+        return StoredRun(directory)
+
+    def open(self, run_id: str) -> StoredRun:
+        """Open a stored run by its run ID."""
+        directory = os.path.join(self.directory, run_id)
+        if not os.path.exists(os.path.join(directory, "run.json")):
+            raise ValueError(f"Unknown run: {run_id}")
+        return StoredRun(directory)
+
+    def runs(self) -> List[str]:
+        """IDs of the stored runs, oldest first."""
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.exists(os.path.join(self.directory, name, "run.json"))
+        )
+
+    def delete(self, run_id: str) -> None:
+        """Remove a stored run and its files."""
+        if run_id not in self.runs():
+            raise ValueError(f"Unknown run: {run_id}")
+        shutil.rmtree(os.path.join(self.directory, run_id))
+
+def _output_layout(
+    engine: MonteCarloEngine,
+    model: Callable[..., np.ndarray],
+    input_distributions: Dict[str, Callable[[], np.ndarray]]
+) -> Tuple[Tuple[int, ...], np.dtype]:
+    """Per-iteration shape and dtype of the model's outputs."""
+    if engine.config.output_shape is not None:
+        return tuple(engine.config.output_shape), np.dtype(float)
+    if isinstance(model, str):
+        from .expressions import compile_model
+        model = compile_model(model)
+    # Two iterations, so per-iteration and broadcast shapes are told apart
+    medians = {name: dist(np.full(2, 0.5)) for name, dist in input_distributions.items()}
+    probe = np.asarray(model(**medians))
+    if probe.ndim == 0 or len(probe) != 2:
+        raise ValueError(f"Model returned shape {probe.shape} for 2 iterations")
+    return probe.shape[1:], probe.dtype
+
+def _write_info(directory: str, info: dict) -> None:
+    """Replace a run's description atomically."""
+    temporary = os.path.join(directory, "run.json.tmp")
+    with open(temporary, "w") as f:
+        json.dump(info, f, indent=1)
+    os.replace(temporary, os.path.join(directory, "run.json"))
@@ -1 +1,21 @@
+from .frozen import (
+    get_distribution,
+    Distribution,
+    Normal,
+    Lognormal,
+    Uniform,
+    Triangular,
+    Beta,
+    Gamma,
+    Weibull,
+    Custom,
+)
 
+# Fitting needs scipy.stats and scipy.optimize; load it on first use
+_FITTING = ("fit_distribution", "fit_candidates", "FitReport", "FitResult")
+
+def __getattr__(name):
+    if name in _FITTING:
+        from . import distributions
+        return getattr(distributions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,65 +1,47 @@
 """
-Probability distributions for Monte Carlo simulation.
+Fitting probability distributions to data.
+
+This module imports ``scipy.stats`` and ``scipy.optimize``, which take
+most of a second to load, so the package only imports it on first use of
+the fitting functions.
 """
+import time
 import numpy as np
-from typing import List, Callable, Union
-from scipy import stats
+from dataclasses import dataclass
+from typing import List, Callable, Optional, Sequence, Tuple, Union
+from scipy import optimize, special, stats
+from ..core.backends import open_executor
+from .frozen import DISTRIBUTIONS, Distribution, get_distribution
 
-def get_distribution(
-    dist_type: str,
-    params: List[float]
-) -> Callable[[np.ndarray], np.ndarray]:
-    """Get a distribution function based on type and parameters.
-    
-    Args:
-        dist_type: Type of distribution
-        params: Distribution parameters
-        
-    Returns:
-        Function that takes uniform random samples and returns distributed samples
-    """
-    dist_type = dist_type.lower()
+@dataclass
+class FitResult:
+    """Outcome of fitting one candidate distribution."""
+    dist_type: str
+    params: List[float]  # scipy.stats parameters (shapes, loc, scale)
+    log_likelihood: float
+    aic: float
+    bic: float
+    seconds: float
+    error: Optional[str] = None
+
+@dataclass
+class FitReport:
+    """Fits of every candidate distribution, best first."""
+    candidates: List[FitResult]
+    criterion: str
     
-    if dist_type == "normal":
-        mu, sigma = params
-        return lambda u: stats.norm.ppf(u, loc=mu, scale=sigma)
-        
-    elif dist_type == "lognormal":
-        mu, sigma = params
-        return lambda u: stats.lognorm.ppf(u, s=sigma, scale=np.exp(mu))
-        
-    elif dist_type == "uniform":
-        low, high = params
-        return lambda u: low + (high - low) * u
-        
-    elif dist_type == "triangular":
-        low, mode, high = params
-        return lambda u: stats.triang.ppf(
-            u,
-            c=(mode - low) / (high - low),
-            loc=low,
-            scale=high - low
-        )
-        
-    elif dist_type == "beta":
-        a, b, low, high = params
-        return lambda u: stats.beta.ppf(u, a, b) * (high - low) + low
-        
-    elif dist_type == "gamma":
-        shape, scale = params
-        return lambda u: stats.gamma.ppf(u, shape, scale=scale)
-        
-    elif dist_type == "weibull":
-        shape, scale = params
-        return lambda u: stats.weibull_min.ppf(u, shape, scale=scale)
-        
-    elif dist_type == "custom":
-        # Custom distribution using interpolation of empirical CDF
-        values, probs = params
-        return lambda u: np.interp(u, probs, values)
-        
-    else:
-        raise ValueError(f"Unknown distribution type: {dist_type}")
+    @property
+    def best(self) -> FitResult:
+        """Best candidate by the selection criterion."""
+        return self.candidates[0]
+
+# scipy.stats families behind the fittable distribution types
+FIT_FAMILIES = {
+    "normal": stats.norm,
+    "lognormal": stats.lognorm,
+    "gamma": stats.gamma,
+    "weibull": stats.weibull_min,
+}
 
 def fit_distribution(
     data: np.ndarray,
@@ -76,50 +58,210 @@ def fit_distribution(
     """
     if dist_type == "auto":
         # Try different distributions and select best fit
-        distributions = ["normal", "lognormal", "gamma", "weibull"]
-        best_aic = np.inf
-        best_dist = None
-        best_params = None
-        
-        for dist in distributions:
-            try:
-                if dist == "normal":
-                    params = stats.norm.fit(data)
-                    aic = stats.norm.nnlf(params, data)
-                elif dist == "lognormal":
-                    params = stats.lognorm.fit(data)
-                    aic = stats.lognorm.nnlf(params, data)
-                elif dist == "gamma":
-                    params = stats.gamma.fit(data)
-                    aic = stats.gamma.nnlf(params, data)
-                elif dist == "weibull":
-                    params = stats.weibull_min.fit(data)
-                    aic = stats.weibull_min.nnlf(params, data)
-                
-                if aic < best_aic:
-                    best_aic = aic
-                    best_dist = dist
-                    best_params = params
-                    
-            except Exception:
-                continue
-                
-        if best_dist is None:
+        report = fit_candidates(data)
+        if report.best.error is not None:
             raise ValueError("Could not fit any distribution to data")
-            
-        return best_dist, list(best_params)
+        return report.best.dist_type, report.best.params
         
     else:
         # Fit specified distribution
-        if dist_type == "normal":
-            params = stats.norm.fit(data)
-        elif dist_type == "lognormal":
-            params = stats.lognorm.fit(data)
-        elif dist_type == "gamma":
-            params = stats.gamma.fit(data)
-        elif dist_type == "weibull":
-            params = stats.weibull_min.fit(data)
-        else:
+        if dist_type not in FIT_FAMILIES:
             raise ValueError(f"Cannot fit distribution type: {dist_type}")
             
-        return dist_type, list(params)
+        data = np.asarray(data, dtype=float)
+        return dist_type, _fit_candidate(dist_type, data).params
+
+def fit_candidates(
+    data: np.ndarray,
+    candidates: Sequence[str] = ("normal", "lognormal", "gamma", "weibull"),
+    criterion: str = "aic",
+    subsample_size: int = 10000,
+    backend: str = "thread",
+    seed: Optional[int] = 0
+) -> FitReport:
+    """Fit several candidate distributions concurrently and rank them.
+    
+    Each candidate is fitted by maximum likelihood starting from
+    method-of-moments guesses, first on a stratified subsample and then
+    refined on the full data from the subsample optimum. Candidates are
+    ranked by AIC or BIC computed on the full data.
+    
+    Args:
+        data: Empirical data
+        candidates: Distribution types to try
+        criterion: "aic" or "bic"
+        subsample_size: Size of the stratified subsample used for the initial fit
+        backend: Execution backend ("thread", "process" or "serial")
+        seed: Seed for the subsample strata offsets
+        
+    Returns:
+        Fit report with one result per candidate, best first
+    """
+    if criterion not in ("aic", "bic"):
+        raise ValueError(f"Unknown selection criterion: {criterion}")
+    for dist_type in candidates:
+        if dist_type not in FIT_FAMILIES:
+            raise ValueError(f"Cannot fit distribution type: {dist_type}")
+            
+    data = np.asarray(data, dtype=float)
+    subsample = _stratified_subsample(
+        data,
+        subsample_size,
+        np.random.default_rng(seed)
+    )
+    
+    with open_executor(backend, len(candidates)) as executor:
+        if executor is None:
+            results = [
+                _fit_candidate(dist_type, data, subsample)
+                for dist_type in candidates
+            ]
+        else:
+            futures = [
+                executor.submit(_fit_candidate, dist_type, data, subsample)
+                for dist_type in candidates
+            ]
+            results = [f.result() for f in futures]
+            
+    results.sort(key=lambda r: getattr(r, criterion))
+    return FitReport(results, criterion)
+
+def _fit_candidate(
+    dist_type: str,
+    data: np.ndarray,
+    subsample: Optional[np.ndarray] = None
+) -> FitResult:
+    """Fit one distribution and score it on the full data."""
+    family = FIT_FAMILIES[dist_type]
+    start = time.perf_counter()
+    try:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if dist_type == "normal":
+                # Closed-form maximum likelihood estimate
+                params = [float(data.mean()), float(data.std())]
+            else:
+                if subsample is None:
+                    subsample = _stratified_subsample(data, 10000, np.random.default_rng(0))
+                shapes, loc, scale = _moment_guess(dist_type, subsample)
+                rough = family.fit(subsample, *shapes, loc=loc, scale=scale)
+                params = _refine_fit(dist_type, data, rough[-2])
+                
+            nnlf = family.nnlf(params, data)
+        if not np.isfinite(nnlf):
+            raise ValueError("Fitted distribution does not support the data")
+        k = len(params)
+        return FitResult(
+            dist_type,
+            params,
+            -nnlf,
+            2 * k + 2 * nnlf,
+            k * np.log(len(data)) + 2 * nnlf,
+            time.perf_counter() - start
+        )
+    except Exception as e:
+        return FitResult(
+            dist_type,
+            [],
+            -np.inf,
+            np.inf,
+            np.inf,
+            time.perf_counter() - start,
+            error=str(e)
+        )
+
+def _refine_fit(
+    dist_type: str,
+    data: np.ndarray,
+    loc: float
+) -> List[float]:
+    """Maximize the full-data likelihood, starting from a rough location.
+    
+    For a fixed location the shape and scale estimates are closed-form or
+    one-dimensional, so the full data only has to be swept by a bounded
+    scalar search over the location (profile likelihood).
+    """
+    family = FIT_FAMILIES[dist_type]
+    low = data.min()
+    gap = low - loc
+    if gap <= 0:
+        gap = 1e-3 * data.std()
+        
+    def objective(loc: float) -> float:
+        return family.nnlf(_fit_fixed_loc(dist_type, data, loc), data)
+        
+    result = optimize.minimize_scalar(
+        objective,
+        bounds=(low - 5 * gap, low - 1e-6 * gap),
+        method="bounded",
+        options={"xatol": 1e-4 * gap}
+    )
+    return _fit_fixed_loc(dist_type, data, result.x)
+
+def _fit_fixed_loc(
+    dist_type: str,
+    data: np.ndarray,
+    loc: float
+) -> List[float]:
+    """Maximum likelihood (shape, loc, scale) for a fixed location."""
+    if dist_type == "lognormal":
+        log_data = np.log(data - loc)
+        return [float(log_data.std()), float(loc), float(np.exp(log_data.mean()))]
+    elif dist_type == "gamma":
+        return [float(p) for p in stats.gamma.fit(data, floc=loc)]
+    else:
+        # Weibull: Newton iterations on the shape likelihood equation
+        log_data = np.log(data - loc)
+        shifted = log_data - log_data.max()  # avoid overflow in x ** c
+        mean_log = shifted.mean()
+        c = 1.2 / log_data.std()
+        for _ in range(50):
+            w = np.exp(c * shifted)
+            sw = w.sum()
+            swy = np.dot(w, shifted)
+            swy2 = np.dot(w, shifted * shifted)
+            f = swy / sw - 1 / c - mean_log
+            step = f / ((swy2 * sw - swy ** 2) / sw ** 2 + 1 / c ** 2)
+            c = max(c - step, c / 2)
+            if abs(step) < 1e-10 * c:
+                break
+        w = np.exp(c * shifted)
+        scale = np.exp(log_data.max() + np.log(w.mean()) / c)
+        return [float(c), float(loc), float(scale)]
+
+def _moment_guess(
+    dist_type: str,
+    data: np.ndarray
+) -> Tuple[Tuple[float, ...], float, float]:
+    """Method-of-moments starting values as (shapes, loc, scale)."""
+    mean = data.mean()
+    std = data.std()
+    if dist_type == "normal":
+        return (), mean, std
+        
+    # Positive families: shift just below the data when it is not positive
+    low = data.min()
+    loc = 0.0 if low > 0 else low - 1e-3 * std
+    mean -= loc
+    cv = std / mean
+    
+    if dist_type == "lognormal":
+        s = np.sqrt(np.log1p(cv ** 2))
+        return (s,), loc, mean / np.sqrt(1 + cv ** 2)
+    elif dist_type == "gamma":
+        return (1 / cv ** 2,), loc, std ** 2 / mean
+    else:
+        # Weibull shape from the coefficient of variation
+        c = cv ** -1.086
+        return (c,), loc, mean / special.gamma(1 + 1 / c)
+
+def _stratified_subsample(
+    data: np.ndarray,
+    size: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Draw one point from each of ``size`` equal-probability strata."""
+    if len(data) <= size:
+        return data
+    ordered = np.sort(data)
+    ranks = (np.arange(size) + rng.random(size)) * (len(data) / size)
+    return ordered[ranks.astype(np.intp)]
@@ -0,0 +1,336 @@
+"""
+Frozen distribution objects for Monte Carlo simulation.
+
+Each distribution precomputes its constants once at construction, is
+picklable (so it can be shipped to worker processes) and hashable by its
+parameters (so it can be used as a cache key). Instances are callable on
+uniform samples, like the functions historically returned by
+``get_distribution``.
+"""
+import numpy as np
+from typing import List, Optional, Tuple
+from scipy import special
+from .inverse_cdf import (
+    beta_ppf,
+    custom_ppf,
+    gamma_ppf,
+    lognormal_ppf,
+    normal_ppf,
+    triangular_ppf,
+    uniform_ppf,
+    weibull_ppf,
+)
+
+class Distribution:
+    """Base class of frozen distributions.
+
+    Subclasses set ``name``, store their parameters and precomputed
+    constants in ``__slots__``, and implement ``params`` and ``ppf``.
+    """
+    __slots__ = ("mean", "var")
+
+    name = ""
+
+    @property
+    def params(self) -> Tuple:
+        """Parameters the distribution was constructed with."""
+        raise NotImplementedError
+
+    @property
+    def support(self) -> Tuple[float, float]:
+        """Lower and upper bound of the distribution."""
+        return (-np.inf, np.inf)
+
+    @property
+    def std(self) -> float:
+        """Standard deviation."""
+        return float(np.sqrt(self.var))
+
+    def ppf(
+        self,
+        u: np.ndarray,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Transform uniform samples by the inverse CDF.
+
+        Args:
+            u: Uniform samples in [0, 1]
+            out: Optional buffer to write into (may be ``u`` itself)
+
+        Returns:
+            Distributed samples
+        """
+        raise NotImplementedError
+
+    def sample(
+        self,
+        rng: np.random.Generator,
+        n: int,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Draw ``n`` samples, transforming uniforms in place.
+
+        Args:
+            rng: Random number generator
+            n: Number of samples
+            out: Optional float64 buffer of length ``n`` to write into
+
+        Returns:
+            Array of samples
+        """
+        if out is None:
+            out = np.empty(n)
+        rng.random(n, out=out)
+        return self.ppf(out, out=out)
+
+    def __call__(
+        self,
+        u: np.ndarray,
+        out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        return self.ppf(u, out=out)
+
+    def __reduce__(self):
+        return (type(self), self.params)
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.params == other.params
+
+    def __hash__(self) -> int:
+        return hash((type(self).__name__, self.params))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self.params}"
+
+class Normal(Distribution):
+    """Normal distribution with mean ``mu`` and standard deviation ``sigma``."""
+    __slots__ = ("mu", "sigma")
+
+    name = "normal"
+
+    def __init__(self, mu: float, sigma: float):
+        self.mu = float(mu)
+        self.sigma = float(sigma)
+        self.mean = self.mu
+        self.var = self.sigma ** 2
+
+    @property
+    def params(self) -> Tuple:
+        return (self.mu, self.sigma)
+
+    def ppf(self, u, out=None):
+        return normal_ppf(u, self.mu, self.sigma, out=out)
+
+class Lognormal(Distribution):
+    """Lognormal distribution whose logarithm has mean ``mu`` and std ``sigma``."""
+    __slots__ = ("mu", "sigma")
+
+    name = "lognormal"
+
+    def __init__(self, mu: float, sigma: float):
+        self.mu = float(mu)
+        self.sigma = float(sigma)
+        s2 = self.sigma ** 2
+        self.mean = float(np.exp(self.mu + s2 / 2))
+        self.var = float(np.expm1(s2) * np.exp(2 * self.mu + s2))
+
+    @property
+    def params(self) -> Tuple:
+        return (self.mu, self.sigma)
+
+    @property
+    def support(self) -> Tuple[float, float]:
+        return (0.0, np.inf)
+
+    def ppf(self, u, out=None):
+        return lognormal_ppf(u, self.mu, self.sigma, out=out)
+
+class Uniform(Distribution):
+    """Uniform distribution on [low, high]."""
+    __slots__ = ("low", "high")
+
+    name = "uniform"
+
+    def __init__(self, low: float, high: float):
+        self.low = float(low)
+        self.high = float(high)
+        self.mean = (self.low + self.high) / 2
+        self.var = (self.high - self.low) ** 2 / 12
+
+    @property
+    def params(self) -> Tuple:
+        return (self.low, self.high)
+
+    @property
+    def support(self) -> Tuple[float, float]:
+        return (self.low, self.high)
+
+    def ppf(self, u, out=None):
+        return uniform_ppf(u, self.low, self.high, out=out)
+
+class Triangular(Distribution):
+    """Triangular distribution on [low, high] peaking at ``mode``."""
+    __slots__ = ("low", "mode", "high")
+
+    name = "triangular"
+
+    def __init__(self, low: float, mode: float, high: float):
+        self.low = float(low)
+        self.mode = float(mode)
+        self.high = float(high)
+        self.mean = (self.low + self.mode + self.high) / 3
+        self.var = (
+            self.low ** 2 + self.mode ** 2 + self.high ** 2
+            - self.low * self.mode - self.low * self.high - self.mode * self.high
+        ) / 18
+
+    @property
+    def params(self) -> Tuple:
+        return (self.low, self.mode, self.high)
+
+    @property
+    def support(self) -> Tuple[float, float]:
+        return (self.low, self.high)
+
+    def ppf(self, u, out=None):
+        return triangular_ppf(u, self.low, self.mode, self.high, out=out)
+
+class Beta(Distribution):
+    """Beta distribution with shapes ``a``, ``b`` scaled to [low, high]."""
+    __slots__ = ("a", "b", "low", "high")
+
+    name = "beta"
+
+    def __init__(self, a: float, b: float, low: float = 0.0, high: float = 1.0):
+        self.a = float(a)
+        self.b = float(b)
+        self.low = float(low)
+        self.high = float(high)
+        span = self.high - self.low
+        total = self.a + self.b
+        self.mean = self.low + span * self.a / total
+        self.var = span ** 2 * self.a * self.b / (total ** 2 * (total + 1))
+
+    @property
+    def params(self) -> Tuple:
+        return (self.a, self.b, self.low, self.high)
+
+    @property
+    def support(self) -> Tuple[float, float]:
+        return (self.low, self.high)
+
+    def ppf(self, u, out=None):
+        return beta_ppf(u, self.a, self.b, self.low, self.high, out=out)
+
+class Gamma(Distribution):
+    """Gamma distribution with ``shape`` and ``scale``."""
+    __slots__ = ("shape", "scale")
+
+    name = "gamma"
+
+    def __init__(self, shape: float, scale: float):
+        self.shape = float(shape)
+        self.scale = float(scale)
+        self.mean = self.shape * self.scale
+        self.var = self.shape * self.scale ** 2
+
+    @property
+    def params(self) -> Tuple:
+        return (self.shape, self.scale)
+
+    @property
+    def support(self) -> Tuple[float, float]:
+        return (0.0, np.inf)
+
+    def ppf(self, u, out=None):
+        return gamma_ppf(u, self.shape, self.scale, out=out)
+
+class Weibull(Distribution):
+    """(Minimum) Weibull distribution with ``shape`` and ``scale``."""
+    __slots__ = ("shape", "scale")
+
+    name = "weibull"
+
+    def __init__(self, shape: float, scale: float):
+        self.shape = float(shape)
+        self.scale = float(scale)
+        g1 = special.gamma(1 + 1 / self.shape)
+        g2 = special.gamma(1 + 2 / self.shape)
+        self.mean = float(self.scale * g1)
+        self.var = float(self.scale ** 2 * (g2 - g1 ** 2))
+
+    @property
+    def params(self) -> Tuple:
+        return (self.shape, self.scale)
+
+    @property
+    def support(self) -> Tuple[float, float]:
+        return (0.0, np.inf)
+
+    def ppf(self, u, out=None):
+        return weibull_ppf(u, self.shape, self.scale, out=out)
+
+class Custom(Distribution):
+    """Empirical distribution interpolating ``values`` at cumulative ``probs``."""
+    __slots__ = ("values", "probs")
+
+    name = "custom"
+
+    def __init__(self, values, probs):
+        self.values = np.array(values, dtype=float)
+        self.probs = np.array(probs, dtype=float)
+        self.values.flags.writeable = False
+        self.probs.flags.writeable = False
+
+        # The quantile function is piecewise linear between the points and
+        # constant outside them, so moments integrate segment by segment.
+        v0, v1 = self.values[:-1], self.values[1:]
+        dp = np.diff(self.probs)
+        p_low, p_high = self.probs[0], 1 - self.probs[-1]
+        first = (
+            p_low * self.values[0] + p_high * self.values[-1]
+            + np.sum(dp * (v0 + v1) / 2)
+        )
+        second = (
+            p_low * self.values[0] ** 2 + p_high * self.values[-1] ** 2
+            + np.sum(dp * (v0 ** 2 + v0 * v1 + v1 ** 2) / 3)
+        )
+        self.mean = float(first)
+        self.var = float(second - first ** 2)
+
+    @property
+    def params(self) -> Tuple:
+        return (tuple(self.values.tolist()), tuple(self.probs.tolist()))
+
+    @property
+    def support(self) -> Tuple[float, float]:
+        return (float(self.values.min()), float(self.values.max()))
+
+    def ppf(self, u, out=None):
+        return custom_ppf(u, self.values, self.probs, out=out)
+
+DISTRIBUTIONS = {
+    cls.name: cls
+    for cls in (Normal, Lognormal, Uniform, Triangular, Beta, Gamma, Weibull, Custom)
+}
+
+def get_distribution(
+    dist_type: str,
+    params: List[float]
+) -> Distribution:
+    """Get a distribution based on type and parameters.
+    
+    Args:
+        dist_type: Type of distribution
+        params: Distribution parameters
+        
+    Returns:
+        Frozen distribution; calling it on uniform random samples (with an
+        optional ``out`` buffer) returns distributed samples
+    """
+    dist_type = dist_type.lower()
+    
+    if dist_type not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution type: {dist_type}")
+        
+    return DISTRIBUTIONS[dist_type](*params)
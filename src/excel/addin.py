@@ -1,22 +1,50 @@
 """
 Excel add-in integration using xlwings.
+
+xlwings, openpyxl and the plotting libraries are imported by the features
+that need them, so loading the add-in only costs the engine's imports.
 """
 import os
 import numpy as np
-import xlwings as xw
 from typing import Dict, List, Optional, Tuple
+from ..core.expressions import compile_model
 from ..core.simulation import MonteCarloEngine, SimulationConfig
 from ..distributions import get_distribution
-from ..visualization import create_histogram, create_tornado_chart
+from .io import ExcelIO, XlwingsIO
+from ..utils.statistics import StatsAccumulator
 
 class MonteCarloAddin:
     """Excel add-in for Monte Carlo simulation."""
     
-    def __init__(self):
-        """Initialize the Excel add-in."""
+    def __init__(
+        self,
+        io: Optional[ExcelIO] = None,
+        client=None,
+        cache=None,
+        store=None
+    ):
+        """Initialize the Excel add-in.
+        
+        Args:
+            io: Workbook I/O to use; defaults to the active workbook,
+                looked up once per call
+            client: :class:`~src.server.SimulationClient` of a running
+                simulation server to send runs to instead of simulating in
+                this process
+            cache: :class:`~src.core.cache.ResultCache` answering repeated
+                seeded runs without simulating them again
+            store: :class:`~src.core.store.RunStore` that every run's outputs
+                and input samples are streamed to, so they need not fit in
+                memory and can be reopened with :meth:`open_run`
+        """
+        self.io = io
+        self.client = client
+        self.cache = cache
+        self.store = store
         self.engine = None
         self.current_results = None
         self.current_inputs = None
+        self.current_run_id = None
     
     def setup_ribbon(self) -> None:
         """Setup Excel ribbon with simulation controls."""
@@ -29,7 +57,14 @@ class MonteCarloAddin:
         output_range: str,
         num_iterations: int = 10000,
         use_lhs: bool = False,
-        correlation_matrix: Optional[np.ndarray] = None
+        correlation_matrix: Optional[np.ndarray] = None,
+        sampler: str = "random",
+        model: Optional[str] = None,
+        output_cell: Optional[str] = None,
+        keep_inputs: bool = False,
+        seed: Optional[int] = None,
+        what_if: bool = False,
+        profile: Optional[str] = None
     ) -> None:
         """Run Monte Carlo simulation using inputs from Excel.
         
@@ -39,27 +74,134 @@ class MonteCarloAddin:
             num_iterations: Number of iterations
             use_lhs: Whether to use Latin Hypercube Sampling
             correlation_matrix: Optional correlation matrix
+            sampler: Sampling method ("random", "lhs", "sobol" or "halton")
+            model: Model formula over the input names, e.g.
+                ``revenue*(1-cost_ratio)-capex``; defaults to the sum of the inputs
+            output_cell: Address or defined name of a formula cell to use as
+                the model instead. Input names must then be the addresses or
+                defined names of the input cells; the formulas in between are
+                read from the saved workbook file and evaluated vectorized.
+            keep_inputs: Keep the input samples of every iteration, so
+                :meth:`dump_results` can write them next to the outputs and
+                a tornado chart can be drawn
+            seed: Random seed; seeded runs are reproducible and, with a
+                cache, reused
+            what_if: Keep this run's random numbers, and if the previous
+                run kept them with the same settings, only redraw the inputs
+                whose distribution changed from its uniforms (common random
+                numbers) and re-evaluate the model; not available with a
+                run store or a server client
+            profile: "cprofile" or "tracemalloc" to capture a profile or the
+                memory peak of the run for :meth:`write_run_stats`
         """
-        wb = xw.books.active
+        if model and output_cell:
+            raise ValueError("Specify either a model formula or an output cell, not both")
+        if what_if and (self.store is not None or self.client is not None):
+            # Resimulated runs reuse draws kept in this process and are not stored
+            raise ValueError("what_if runs cannot be combined with a run store or a server client")
+            
+        io = self._io()
         
-        # Read input parameters
-        inputs = wb.range(input_range).value
+        # Read input parameters in one block
+        inputs = io.read(input_range)
         self.current_inputs = self._process_inputs(inputs)
         
-        # Create simulation config
-        config = SimulationConfig(iterations=num_iterations)
-        self.engine = MonteCarloEngine(config)
-        
-        # Run simulation
-        self.current_results = self.engine.run_simulation(
-            model=self._model_function,
-            input_distributions=self.current_inputs,
-            correlation_matrix=correlation_matrix,
-            use_lhs=use_lhs
-        )
-        
+        if self.client is not None:
+            self.engine = None
+            self.current_results = self.client.run(
+                inputs,
+                model=model,
+                correlation_matrix=None if correlation_matrix is None else np.asarray(correlation_matrix).tolist(),
+                use_lhs=use_lhs,
+                workbook=io.path if output_cell else None,
+                output_cell=output_cell,
+                sheet=io.active_sheet if output_cell else None,
+                iterations=num_iterations,
+                sampler=sampler,
+                keep_inputs=keep_inputs,
+                seed=seed,
+                profile=profile
+            )
+            summary = None
+        else:
+            # Create simulation config; stored runs always keep their inputs
+            config = SimulationConfig(
+                iterations=num_iterations,
+                sampler="lhs" if use_lhs else sampler,
+                keep_inputs=keep_inputs or self.store is not None,
+                seed=seed,
+                keep_draws=what_if,
+                profile=profile
+            )
+            previous = self.engine
+            self.engine = MonteCarloEngine(config)
+            
+            if output_cell:
+                from .formulas import WorkbookModel
+                model_function = WorkbookModel.from_file(
+                    io.path,
+                    list(self.current_inputs),
+                    output_cell,
+                    sheet=io.active_sheet
+                )
+            elif model:
+                model_function = compile_model(model)
+            else:
+                model_function = self._model_function
+            
+            # Run simulation
+            summary = None
+            self.current_run_id = None
+            if (
+                what_if
+                and previous is not None
+                and previous.config == config
+                and previous.can_resimulate(self.current_inputs, correlation_matrix)
+            ):
+                self.engine = previous
+                self.current_results = previous.resimulate(
+                    model_function,
+                    self.current_inputs,
+                    correlation_matrix
+                )
+            elif self.store is not None:
+                run = self.store.run(
+                    self.engine,
+                    model_function,
+                    self.current_inputs,
+                    correlation_matrix,
+                    use_lhs,
+                    description=model or output_cell or "sum of inputs"
+                )
+                self.current_run_id = run.run_id
+                self.current_results = run.results
+                summary = run.stats().summary()
+            elif self.cache is not None:
+                model_key = None
+                if output_cell:
+                    # The formulas are identified by the saved file they come from
+                    model_key = f"{os.path.abspath(io.path)}:{os.path.getmtime(io.path)}:{io.active_sheet}!{output_cell}"
+                elif not model:
+                    # A method of the add-in, which the cache cannot identify
+                    model_key = "sum of inputs"
+                self.current_results, summary = self.cache.run(
+                    self.engine,
+                    model_function,
+                    self.current_inputs,
+                    correlation_matrix,
+                    use_lhs,
+                    model_key
+                )
+            else:
+                self.current_results = self.engine.run_simulation(
+                    model=model_function,
+                    input_distributions=self.current_inputs,
+                    correlation_matrix=correlation_matrix,
+                    use_lhs=use_lhs
+                )
+            
         # Write results
-        self._write_results(output_range)
+        self._write_results(io, output_range, summary)
     
     def create_charts(
         self,
@@ -69,33 +211,120 @@ class MonteCarloAddin:
         """Create visualization charts.
         
         Args:
-            chart_type: Type of chart to create
+            chart_type: "histogram", or "tornado" (needs a run with
+                ``keep_inputs=True``)
             target_range: Excel range for chart placement
         """
         if self.current_results is None:
             raise ValueError("No simulation results available")
             
-        wb = xw.books.active
-        sheet = wb.sheets.active
-        
+        from ..visualization import create_histogram, create_tornado_chart
         if chart_type == "histogram":
             fig = create_histogram(self.current_results)
         elif chart_type == "tornado":
-            fig = create_tornado_chart(
-                self.current_results,
-                self.current_inputs
-            )
+            fig = create_tornado_chart(self.current_results)
         else:
             raise ValueError(f"Unknown chart type: {chart_type}")
             
         if target_range:
-            sheet.pictures.add(
-                fig,
-                name=f"MCSim_{chart_type}",
-                update=True,
-                left=wb.range(target_range).left,
-                top=wb.range(target_range).top
-            )
+            self._io().add_picture(fig, f"MCSim_{chart_type}", target_range)
+    
+    def open_run(self, run_id: str) -> None:
+        """Make a stored run the current results, for charts and dumps.
+        
+        Args:
+            run_id: ID of a run in the add-in's store
+        """
+        if self.store is None:
+            raise ValueError("No run store configured")
+        run = self.store.open(run_id)
+        self.engine = None
+        self.current_run_id = run.run_id
+        self.current_results = run.results
+    
+    def dump_results(self, sheet: str = "MC Iterations") -> None:
+        """Write the output (and, if kept, the inputs) of every iteration.
+        
+        One row per iteration, with a header row, on a sheet that is created
+        or cleared first. The block is written in a few large calls.
+        
+        Args:
+            sheet: Name of the sheet to write to
+        """
+        if self.current_results is None:
+            raise ValueError("No simulation results available")
+            
+        results = np.asarray(self.current_results)
+        outputs = results.reshape(len(results), -1)
+        if outputs.shape[1] == 1:
+            header = ["Output"]
+        else:
+            header = [f"Output {i + 1}" for i in range(outputs.shape[1])]
+        columns = [outputs]
+        inputs = self.current_results.inputs
+        if inputs:
+            header += list(inputs)
+            columns.append(np.column_stack(list(inputs.values())))
+            
+        io = self._io()
+        with io.batch():
+            io.ensure_sheet(sheet)
+            io.write_table(f"'{sheet}'!A1", np.hstack(columns), header)
+    
+    def write_run_stats(self, sheet: str = "MC Profile", limit: int = 30) -> None:
+        """Write where the time of the current run went.
+        
+        The summary (iterations per second, worker utilisation, bytes
+        allocated) comes first, then the seconds of every phase and stage,
+        the busy time of every worker, the functions of the cProfile profile
+        when captured, and the timing of the slowest chunks, each as a table
+        on a sheet that is created or cleared first. Runs answered from the
+        cache were not run and have no statistics.
+        
+        Args:
+            sheet: Name of the sheet to write to
+            limit: Number of profiled functions to list
+        """
+        stats = getattr(self.current_results, "run_stats", None)
+        if stats is None and self.engine is not None:
+            # Results read back from the store; the run was timed
+            stats = self.engine.last_stats
+        if stats is None:
+            raise ValueError("No run statistics available")
+            
+        tables = [
+            (["Statistic", "Value"], [[name, value] for name, value in stats.summary().items()]),
+            (["Phase", "Seconds"], [[name, seconds] for name, seconds in stats.phases.items()]),
+            (["Stage", "Seconds"], [[name, seconds] for name, seconds in stats.stages.items()]),
+            (["Worker", "Busy seconds"], [[name, seconds] for name, seconds in stats.busy_seconds.items()]),
+        ]
+        if stats.profile:
+            tables.append((
+                ["Function", "Calls", "Own seconds", "Cumulative seconds"],
+                stats.profile_table(limit)
+            ))
+        stages = list(stats.stages)
+        tables.append((
+            ["Start", "Stop", "Worker", "Seconds"] + stages,
+            [
+                [chunk.start, chunk.stop, chunk.worker, chunk.seconds]
+                + [chunk.stages.get(stage, 0.0) for stage in stages]
+                for chunk in stats.slowest_chunks
+            ]
+        ))
+        
+        io = self._io()
+        with io.batch():
+            io.ensure_sheet(sheet)
+            row = 1
+            for header, rows in tables:
+                # One blank row between the tables
+                io.write(f"'{sheet}'!A{row}", [header] + rows)
+                row += len(rows) + 2
+    
+    def _io(self) -> ExcelIO:
+        """Workbook I/O for one call: the injected one or the active workbook."""
+        return self.io if self.io is not None else XlwingsIO()
     
     def _process_inputs(
         self,
@@ -120,24 +349,23 @@ class MonteCarloAddin:
         # This will be customized based on the Excel model
         return sum(kwargs.values())
     
-    def _write_results(self, output_range: str) -> None:
+    def _write_results(
+        self,
+        io: ExcelIO,
+        output_range: str,
+        summary: Optional[Dict[str, float]] = None
+    ) -> None:
         """Write simulation results to Excel.
         
         Args:
+            io: Workbook I/O
             output_range: Excel range for output
+            summary: Summary statistics if already known, e.g. from the cache
         """
-        wb = xw.books.active
-        results_range = wb.range(output_range)
-        
-        # Write summary statistics
-        summary = [
-            ["Statistic", "Value"],
-            ["Mean", np.mean(self.current_results)],
-            ["Std Dev", np.std(self.current_results)],
-            ["Min", np.min(self.current_results)],
-            ["Max", np.max(self.current_results)],
-            ["5th Percentile", np.percentile(self.current_results, 5)],
-            ["95th Percentile", np.percentile(self.current_results, 95)]
-        ]
+        if summary is None:
+            # Summary statistics, computed in a single pass
+            summary = StatsAccumulator().update(self.current_results).summary()
+        rows = [["Statistic", "Value"]]
+        rows += [[name, value] for name, value in summary.items()]
         
-        results_range.value = summary
+        io.write(output_range, rows)
@@ -0,0 +1,540 @@
+"""
+Vectorized evaluation of workbook formula graphs.
+
+Models built as Excel cell formulas are read with openpyxl, parsed once,
+and evaluated over all iterations at once with numpy: every cell between
+the input cells and the output cell holds an array of per-iteration values
+(or a scalar when it does not depend on any input). Recalculating the
+workbook once per iteration over COM is avoided entirely, and the model
+can be evaluated offline from the saved file.
+
+Supported are numbers, booleans, cell and range references (also across
+sheets and through workbook-level defined names), the operators
+``+ - * / ^ %`` and comparisons, and the functions ABS, AND, AVERAGE,
+CHOOSE, EXP, HLOOKUP, IF, INDEX, LN, LOG, LOG10, MATCH, MAX, MIN, NOT, NPV,
+OR, POWER, PRODUCT, ROUND, SQRT, SUM and VLOOKUP. Lookup tables must not
+depend on the inputs. As in Excel, empty cells are zero when referenced
+directly and skipped by the functions over ranges. Errors such as
+division by zero propagate as inf/NaN rather than Excel error values.
+"""
+import re
+import functools
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from openpyxl import load_workbook
+from openpyxl.formula import Tokenizer
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+
+# (sheet title, row, column)
+CellKey = Tuple[str, int, int]
+
+_REFERENCE = re.compile(
+    r"^(?:(?P<sheet>'(?:[^']|'')+'|[^'!]+)!)?"
+    r"\$?(?P<col1>[A-Za-z]{1,3})\$?(?P<row1>\d+)"
+    r"(?::\$?(?P<col2>[A-Za-z]{1,3})\$?(?P<row2>\d+))?$"
+)
+
+class _Blank:
+    """Value of an empty cell: 0 when referenced directly, skipped in ranges."""
+
+    def __repr__(self) -> str:
+        return "_BLANK"
+
+    def __reduce__(self):
+        # Unpickle to the module's instance, so identity checks still hold
+        return "_BLANK"
+
+_BLANK = _Blank()
+
+# Binary operator -> precedence (all left associative, as in Excel)
+_PRECEDENCE = {
+    "=": 1, "<>": 1, "<": 1, ">": 1, "<=": 1, ">=": 1,
+    "+": 3, "-": 3,
+    "*": 4, "/": 4,
+    "^": 5,
+}
+
+_BINARY = {
+    "=": np.equal,
+    "<>": np.not_equal,
+    "<": np.less,
+    ">": np.greater,
+    "<=": np.less_equal,
+    ">=": np.greater_equal,
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.true_divide,
+    "^": np.power,
+}
+
+class WorkbookModel:
+    """Model evaluating the formula graph between input and output cells.
+
+    The graph is collected from the output cells back to the inputs,
+    topologically sorted and compiled into a flat program, so calls only
+    evaluate numpy operations. Instances are callable like any model
+    function, taking the input values as keyword arguments named by the
+    input references, and are picklable for worker processes.
+
+    Attributes:
+        inputs: Input references, also the keyword names of the model
+        outputs: Output references
+        cells: Formula cells in evaluation order
+    """
+
+    def __init__(
+        self,
+        workbook,
+        inputs: Sequence[str],
+        output: Union[str, Sequence[str]],
+        sheet: Optional[str] = None
+    ):
+        """Compile the formula graph of a workbook.
+
+        Args:
+            workbook: openpyxl workbook loaded with formulas (not data_only)
+            inputs: Cell addresses (e.g. ``"B2"`` or ``"Inputs!B2"``) or
+                defined names of the input cells
+            output: Address or defined name of the output cell, or a list of
+                them for a model with several outputs
+            sheet: Sheet of unqualified addresses (defaults to the active sheet)
+        """
+        self._workbook = workbook
+        self._names = {
+            name.lower(): definition
+            for name, definition in workbook.defined_names.items()
+        }
+        default_sheet = sheet or workbook.active.title
+        self.inputs = tuple(inputs)
+        self.single_output = isinstance(output, str)
+        self.outputs = (output,) if self.single_output else tuple(output)
+
+        self._input_keys = {}
+        for name in self.inputs:
+            key = self._resolve(name, default_sheet)
+            if len(key) != 3:
+                raise ValueError(f"Input {name!r} must refer to a single cell")
+            self._input_keys[key] = name
+        self._output_keys = []
+        for name in self.outputs:
+            key = self._resolve(name, default_sheet)
+            if len(key) != 3:
+                raise ValueError(f"Output {name!r} must refer to a single cell")
+            self._output_keys.append(key)
+
+        self.constants: Dict[CellKey, object] = {}
+        self.program: List[Tuple[CellKey, tuple]] = []
+        state: Dict[CellKey, bool] = {}
+        for key in self._output_keys:
+            self._visit(key, state)
+        self.cells = [_address(key) for key, _ in self.program]
+        self._release = self._release_schedule()
+        # Only needed while compiling; the compiled model must pickle
+        del self._workbook, self._names
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        inputs: Sequence[str],
+        output: Union[str, Sequence[str]],
+        sheet: Optional[str] = None
+    ) -> "WorkbookModel":
+        """Compile the formula graph of a saved workbook file.
+
+        Args:
+            path: Path of the .xlsx/.xlsm file
+            inputs: Cell addresses or defined names of the input cells
+            output: Address or defined name of the output cell(s)
+            sheet: Sheet of unqualified addresses (defaults to the active sheet)
+
+        Returns:
+            Compiled model
+        """
+        return cls(load_workbook(path), inputs, output, sheet)
+
+    def __call__(self, **inputs) -> np.ndarray:
+        """Evaluate the outputs for arrays of input values.
+
+        Returns:
+            Array of shape (n,) for a single output, else (n, len(outputs))
+        """
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing model inputs: {', '.join(missing)}")
+        values = dict(self.constants)
+        for key, name in self._input_keys.items():
+            values[key] = np.asarray(inputs[name], dtype=float)
+        n = max((np.size(values[key]) for key in self._input_keys), default=1)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for (key, node), release in zip(self.program, self._release):
+                values[key] = _evaluate(node, values)
+                for done in release:
+                    del values[done]
+
+        outputs = [
+            np.broadcast_to(np.asarray(_cell_value(values[key]), dtype=float), (n,))
+            for key in self._output_keys
+        ]
+        if self.single_output:
+            return np.array(outputs[0])
+        return np.column_stack(outputs)
+
+    def _resolve(self, reference: str, sheet: str):
+        """Resolve an address or defined name to a cell key or range node."""
+        match = _REFERENCE.match(reference.strip())
+        if match is None:
+            definition = self._names.get(reference.strip().lower())
+            if definition is None:
+                raise ValueError(f"Unknown reference or defined name: {reference!r}")
+            destinations = list(definition.destinations)
+            if len(destinations) != 1:
+                raise ValueError(f"Defined name {reference!r} must refer to one range")
+            target_sheet, target = destinations[0]
+            return self._resolve(f"'{target_sheet}'!{target}", sheet)
+
+        if match["sheet"]:
+            sheet = match["sheet"]
+            if sheet.startswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+        if sheet not in self._workbook.sheetnames:
+            raise ValueError(f"Unknown sheet in reference {reference!r}")
+        row1, col1 = int(match["row1"]), column_index_from_string(match["col1"].upper())
+        if match["col2"] is None:
+            return (sheet, row1, col1)
+        row2, col2 = int(match["row2"]), column_index_from_string(match["col2"].upper())
+        return (
+            "range", sheet,
+            min(row1, row2), min(col1, col2), max(row1, row2), max(col1, col2)
+        )
+
+    def _visit(self, key: CellKey, state: Dict[CellKey, bool]) -> None:
+        """Depth-first collection of the cells ``key`` depends on."""
+        if state.get(key) is True or key in self.constants:
+            return
+        if state.get(key) is False:
+            raise ValueError(f"Circular reference involving {_address(key)}")
+        if key in self._input_keys:
+            state[key] = True
+            return
+
+        value = self._workbook[key[0]].cell(row=key[1], column=key[2]).value
+        if not (isinstance(value, str) and value.startswith("=")):
+            self.constants[key] = _BLANK if value is None else value
+            return
+
+        state[key] = False
+        try:
+            node = _Parser(value, lambda ref: self._resolve(ref, key[0])).parse()
+        except ValueError as e:
+            raise ValueError(f"{_address(key)}: {e}") from None
+        for dependency in _dependencies(node):
+            self._visit(dependency, state)
+        state[key] = True
+        self.program.append((key, node))
+
+    def _release_schedule(self) -> List[List[CellKey]]:
+        """Intermediate cells that are no longer needed after each step."""
+        last_use = {}
+        for step, (_, node) in enumerate(self.program):
+            for dependency in _dependencies(node):
+                last_use[dependency] = step
+        keep = set(self._output_keys) | set(self._input_keys) | set(self.constants)
+        schedule = [[] for _ in self.program]
+        for key, step in last_use.items():
+            if key not in keep:
+                schedule[step].append(key)
+        return schedule
+
+    def __repr__(self) -> str:
+        return f"WorkbookModel(inputs={list(self.inputs)}, outputs={list(self.outputs)})"
+
+class _Parser:
+    """Precedence-climbing parser over openpyxl formula tokens.
+
+    Nodes are tuples: ``("const", value)``, ``("cell", key)``,
+    ``("range", sheet, min_row, min_col, max_row, max_col)``,
+    ``("neg", operand)``, ``("binary", operator, left, right)`` and
+    ``("call", name, args)``.
+    """
+
+    def __init__(self, formula: str, resolve):
+        self.tokens = [
+            token for token in Tokenizer(formula).items
+            if token.type != "WHITE-SPACE"
+        ]
+        self.position = 0
+        self.resolve = resolve
+
+    def parse(self) -> tuple:
+        node = self._expression(0)
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected token {self.tokens[self.position].value!r}")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise ValueError("Unexpected end of formula")
+        self.position += 1
+        return token
+
+    def _expression(self, min_precedence: int) -> tuple:
+        left = self._unary()
+        while True:
+            token = self._peek()
+            if token is None or token.type != "OPERATOR-INFIX":
+                return left
+            if token.value not in _PRECEDENCE:
+                raise ValueError(f"Unsupported operator {token.value!r}")
+            precedence = _PRECEDENCE[token.value]
+            if precedence < min_precedence:
+                return left
+            self._next()
+            right = self._expression(precedence + 1)
+            left = ("binary", token.value, left, right)
+
+    def _unary(self) -> tuple:
+        token = self._peek()
+        if token is not None and token.type == "OPERATOR-PREFIX":
+            self._next()
+            operand = self._unary()
+            node = ("neg", operand) if token.value == "-" else operand
+        else:
+            node = self._primary()
+        while self._peek() is not None and self._peek().type == "OPERATOR-POSTFIX":
+            self._next()
+            node = ("binary", "/", node, ("const", 100.0))
+        return node
+
+    def _primary(self) -> tuple:
+        token = self._next()
+        if token.type == "OPERAND":
+            if token.subtype == "NUMBER":
+                return ("const", float(token.value))
+            if token.subtype == "LOGICAL":
+                return ("const", token.value.upper() == "TRUE")
+            if token.subtype == "TEXT":
+                return ("const", token.value[1:-1].replace('""', '"'))
+            if token.subtype == "RANGE":
+                target = self.resolve(token.value)
+                return ("cell", target) if len(target) == 3 else target
+            raise ValueError(f"Unsupported operand {token.value!r}")
+        if token.type == "FUNC" and token.subtype == "OPEN":
+            name = token.value[:-1].upper()
+            if name.startswith("_XLFN."):
+                name = name[len("_XLFN."):]
+            if name not in _FUNCTIONS:
+                raise ValueError(f"Unsupported function {name}")
+            return ("call", name, self._arguments())
+        if token.type == "PAREN" and token.subtype == "OPEN":
+            node = self._expression(0)
+            if self._next().type != "PAREN":
+                raise ValueError("Unbalanced parentheses")
+            return node
+        raise ValueError(f"Unexpected token {token.value!r}")
+
+    def _arguments(self) -> Tuple[tuple, ...]:
+        args = []
+        while True:
+            token = self._peek()
+            if token is not None and token.type == "FUNC" and token.subtype == "CLOSE":
+                self._next()
+                if self.tokens[self.position - 2].type == "SEP":
+                    # Trailing empty argument
+                    args.append(("const", 0.0))
+                return tuple(args)
+            if token is not None and token.type == "SEP":
+                # Empty argument
+                self._next()
+                args.append(("const", 0.0))
+                continue
+            args.append(self._expression(0))
+            token = self._next()
+            if token.type == "FUNC" and token.subtype == "CLOSE":
+                return tuple(args)
+            if token.type != "SEP":
+                raise ValueError(f"Unexpected token {token.value!r} in arguments")
+
+class _Range:
+    """Evaluated range: cell values in row-major order with their shape."""
+
+    def __init__(self, values: list, shape: Tuple[int, int]):
+        self.values = values
+        self.shape = shape
+
+    def table(self) -> np.ndarray:
+        """The range as a constant float table, with blanks as zero."""
+        if any(np.ndim(v) for v in self.values):
+            raise ValueError("Lookup ranges must not depend on the inputs")
+        return np.array([_cell_value(v) for v in self.values], dtype=float).reshape(self.shape)
+
+def _range_keys(node: tuple) -> List[CellKey]:
+    _, sheet, row1, col1, row2, col2 = node
+    return [
+        (sheet, row, col)
+        for row in range(row1, row2 + 1)
+        for col in range(col1, col2 + 1)
+    ]
+
+def _dependencies(node: tuple) -> List[CellKey]:
+    """Cells referenced by a node."""
+    kind = node[0]
+    if kind == "cell":
+        return [node[1]]
+    if kind == "range":
+        return _range_keys(node)
+    if kind == "neg":
+        return _dependencies(node[1])
+    if kind == "binary":
+        return _dependencies(node[2]) + _dependencies(node[3])
+    if kind == "call":
+        return [key for arg in node[2] for key in _dependencies(arg)]
+    return []
+
+def _evaluate(node: tuple, values: Dict[CellKey, object]):
+    """Evaluate a node given the values of the cells it references."""
+    kind = node[0]
+    if kind == "const":
+        return node[1]
+    if kind == "cell":
+        return _cell_value(values[node[1]])
+    if kind == "range":
+        return _Range(
+            [values[key] for key in _range_keys(node)],
+            (node[4] - node[2] + 1, node[5] - node[3] + 1)
+        )
+    if kind == "neg":
+        return np.negative(_evaluate(node[1], values))
+    if kind == "binary":
+        return _BINARY[node[1]](_evaluate(node[2], values), _evaluate(node[3], values))
+    return _FUNCTIONS[node[1]](*[_evaluate(arg, values) for arg in node[2]])
+
+def _cell_value(value):
+    """Value of a directly referenced cell; empty cells count as zero."""
+    return 0.0 if value is _BLANK else value
+
+def _flatten(args) -> list:
+    """Numeric values of all arguments, expanding ranges and skipping text
+    and, as Excel does, the empty cells of ranges."""
+    flat = []
+    for arg in args:
+        items = arg.values if isinstance(arg, _Range) else [arg]
+        flat.extend(v for v in items if not isinstance(v, str) and v is not _BLANK)
+    return flat
+
+def _reduce(ufunc, args, initial=None):
+    flat = _flatten(args)
+    if not flat:
+        return 0.0 if initial is None else initial
+    return functools.reduce(ufunc, flat)
+
+def _average(*args):
+    flat = _flatten(args)
+    if not flat:
+        # #DIV/0! in Excel
+        return np.nan
+    return functools.reduce(np.add, flat) / len(flat)
+
+def _round(x, digits=0.0):
+    scale = 10.0 ** np.asarray(digits)
+    # Excel rounds halves away from zero
+    return np.sign(x) * np.floor(np.abs(x) * scale + 0.5) / scale
+
+def _npv(rate, *args):
+    flat = _flatten(args)
+    return functools.reduce(
+        np.add,
+        (v / (1 + rate) ** (i + 1) for i, v in enumerate(flat)),
+        0.0
+    )
+
+def _lookup_position(x, keys: np.ndarray, match_type=1.0):
+    """0-based position of ``x`` in ``keys`` (NaN where not found)."""
+    x = np.asarray(x, dtype=float)
+    if match_type == 0:
+        order = np.argsort(keys, kind="stable")
+        ordered = keys[order]
+        pos = np.clip(np.searchsorted(ordered, x), 0, len(keys) - 1)
+        return np.where(ordered[pos] == x, order[pos], np.nan)
+    if match_type > 0:
+        # Largest key <= x in ascending keys
+        pos = np.searchsorted(keys, x, side="right") - 1
+    else:
+        # Smallest key >= x in descending keys
+        pos = len(keys) - np.searchsorted(keys[::-1], x, side="left") - 1
+    return np.where(pos >= 0, pos, np.nan)
+
+def _take(column: np.ndarray, position):
+    """Values at (possibly NaN) positions."""
+    valid = ~np.isnan(position)
+    index = np.where(valid, position, 0).astype(np.intp)
+    return np.where(valid, column[index], np.nan)
+
+def _vlookup(x, table: _Range, column, approximate=True):
+    data = table.table()
+    position = _lookup_position(x, data[:, 0], 1.0 if approximate else 0)
+    return _take(data[:, int(column) - 1], position)
+
+def _hlookup(x, table: _Range, row, approximate=True):
+    data = table.table()
+    position = _lookup_position(x, data[0], 1.0 if approximate else 0)
+    return _take(data[int(row) - 1], position)
+
+def _match(x, table: _Range, match_type=1.0):
+    data = table.table()
+    if min(data.shape) != 1:
+        raise ValueError("MATCH needs a single row or column")
+    return _lookup_position(x, data.ravel(), match_type) + 1
+
+def _index(table: _Range, row, column=None):
+    data = table.table()
+    if column is None:
+        if data.shape[0] == 1:
+            data, row, column = data.T, row, 1.0
+        else:
+            column = 1.0
+    rows = np.asarray(row, dtype=np.intp) - 1
+    columns = np.asarray(column, dtype=np.intp) - 1
+    return data[rows, columns]
+
+def _choose(index, *choices):
+    index = np.asarray(index, dtype=np.intp) - 1
+    if index.ndim == 0:
+        return choices[int(index)]
+    return np.choose(index, np.broadcast_arrays(*choices, index)[:-1])
+
+_FUNCTIONS = {
+    "ABS": np.abs,
+    "AND": lambda *args: _reduce(np.logical_and, args, True),
+    "AVERAGE": _average,
+    "CHOOSE": _choose,
+    "EXP": np.exp,
+    "HLOOKUP": _hlookup,
+    "IF": lambda condition, true, false=False: np.where(condition, true, false),
+    "INDEX": _index,
+    "LN": np.log,
+    "LOG": lambda x, base=10.0: np.log(x) / np.log(base),
+    "LOG10": np.log10,
+    "MATCH": _match,
+    "MAX": lambda *args: _reduce(np.maximum, args),
+    "MIN": lambda *args: _reduce(np.minimum, args),
+    "NOT": np.logical_not,
+    "NPV": _npv,
+    "OR": lambda *args: _reduce(np.logical_or, args, False),
+    "POWER": np.power,
+    "PRODUCT": lambda *args: _reduce(np.multiply, args, 0.0),
+    "ROUND": _round,
+    "SQRT": np.sqrt,
+    "SUM": lambda *args: _reduce(np.add, args),
+    "VLOOKUP": _vlookup,
+}
+
+def _address(key: CellKey) -> str:
+    """Display address of a cell key."""
+    return f"{key[0]}!{get_column_letter(key[2])}{key[1]}"
@@ -0,0 +1,487 @@
+"""
+Block I/O between numpy arrays and workbook ranges.
+
+Every COM call to Excel is a cross-process round-trip, so values are
+read and written as whole 2-D blocks in a single call, using raw value
+conversion to skip xlwings' per-cell converters. Very large writes are
+split into row chunks that stay well below Excel's per-call limits, and
+screen updating and recalculation are suspended while writing.
+
+:class:`XlwingsIO` talks to a live workbook; :class:`MemoryIO` is an
+in-memory fake with the same interface, so code using the I/O layer can be
+tested and benchmarked without Excel.
+"""
+import re
+import numpy as np
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# (sheet name or None for the active sheet, first row, first column,
+# last row, last column); rows and columns are 1-based
+Address = Tuple[Optional[str], int, int, int, int]
+
+_CELL = re.compile(r"^\$?([A-Za-z]{1,3})\$?([1-9]\d*)$")
+_COLUMNS = re.compile(r"^\$?([A-Za-z]{1,3}):\$?([A-Za-z]{1,3})$")
+_ROWS = re.compile(r"^\$?([1-9]\d*):\$?([1-9]\d*)$")
+
+def parse_address(address: str) -> Address:
+    """Split an address such as ``Sheet1!A1:C10`` into its parts.
+
+    Args:
+        address: Cell or range address, optionally qualified by a sheet
+
+    Returns:
+        Sheet name (None when unqualified) and the range boundaries
+    """
+    sheet = None
+    if "!" in address:
+        sheet, address = address.rsplit("!", 1)
+        if sheet.startswith("'") and sheet.endswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    corners = [_CELL.match(part) for part in address.split(":")]
+    if not 1 <= len(corners) <= 2 or not all(corners):
+        raise ValueError(f"Invalid range address: {address}")
+    rows = [int(corner.group(2)) for corner in corners]
+    cols = [_column_index(corner.group(1)) for corner in corners]
+    return sheet, min(rows), min(cols), max(rows), max(cols)
+
+def _to_rows(values: Any) -> List[list]:
+    """Convert a scalar, sequence or array to a list of row lists.
+
+    One-dimensional input becomes a single column. Missing values (NaN)
+    are written as empty cells.
+    """
+    if isinstance(values, (list, tuple)) and values and isinstance(values[0], (list, tuple)):
+        # Mixed rows such as labels next to numbers are kept as they are
+        return [list(row) for row in values]
+    array = np.asarray(values)
+    if array.ndim == 0:
+        array = array.reshape(1, 1)
+    elif array.ndim == 1:
+        array = array.reshape(-1, 1)
+    elif array.ndim != 2:
+        raise ValueError(f"Can only write 2-D blocks, got shape {array.shape}")
+    if array.dtype.kind == "f" and np.isnan(array).any():
+        array = array.astype(object)
+        array[np.isnan(array.astype(float))] = None
+    return array.tolist()
+
+class ExcelIO:
+    """Block reads and writes against a workbook.
+
+    Subclasses implement the primitives :meth:`_read_block` and
+    :meth:`_write_block`, which transfer one rectangular block in a single
+    call, together with :meth:`batch`, :meth:`sheet_names`,
+    :meth:`add_sheet`, :meth:`clear` and :meth:`add_picture`.
+    """
+
+    # Cells transferred per write call; larger writes are split by rows
+    max_cells = 1 << 18
+
+    @property
+    def path(self) -> Optional[str]:
+        """Full path of the workbook file, if it has one."""
+        return None
+
+    @property
+    def active_sheet(self) -> str:
+        """Name of the active sheet."""
+        raise NotImplementedError
+
+    def read(self, address: str) -> List[list]:
+        """Read a range as raw values.
+
+        Args:
+            address: Range address, e.g. ``Inputs!A2:D20``, or another
+                reference such as a defined name (see :meth:`resolve`)
+
+        Returns:
+            List of rows; empty cells are None
+        """
+        sheet, min_row, min_col, max_row, max_col = self.resolve(address)
+        return self._read_block(
+            sheet or self.active_sheet,
+            min_row,
+            min_col,
+            max_row - min_row + 1,
+            max_col - min_col + 1
+        )
+
+    def read_array(self, address: str, dtype=float) -> np.ndarray:
+        """Read a numeric range into a 2-D array; empty cells become NaN.
+
+        Args:
+            address: Range address
+            dtype: Data type of the array
+
+        Returns:
+            Array with the shape of the range
+        """
+        values = np.array(self.read(address), dtype=object)
+        values[values == None] = np.nan  # noqa: E711 (elementwise comparison)
+        return values.astype(dtype)
+
+    def write(self, address: str, values: Any) -> None:
+        """Write a block of values starting at the top-left cell of a range.
+
+        The block is transferred in as few calls as possible, each at most
+        ``max_cells`` cells, with screen updating and calculation suspended.
+
+        Args:
+            address: Top-left cell (or any range starting there)
+            values: Scalar, 1-D (written as a column) or 2-D array-like
+        """
+        sheet, row, col = self.resolve(address)[:3]
+        sheet = sheet or self.active_sheet
+        if isinstance(values, np.ndarray) and values.ndim == 2 and values.dtype != object:
+            # Converted to Python values one chunk at a time
+            rows, convert = values, _to_rows
+        else:
+            rows, convert = _to_rows(values), list
+        n_rows, n_cols = len(rows), len(rows[0]) if len(rows) else 0
+        if not n_rows or not n_cols:
+            return
+        rows_per_call = max(1, self.max_cells // n_cols)
+        with self.batch():
+            for start in range(0, n_rows, rows_per_call):
+                self._write_block(
+                    sheet,
+                    row + start,
+                    col,
+                    convert(rows[start:start + rows_per_call])
+                )
+
+    def write_table(
+        self,
+        address: str,
+        values: np.ndarray,
+        header: Sequence[str]
+    ) -> None:
+        """Write a header row followed by a block of values below it.
+
+        Args:
+            address: Top-left cell of the header
+            values: 2-D array with one column per header entry
+            header: Column names
+        """
+        sheet, row, col = self.resolve(address)[:3]
+        prefix = "" if sheet is None else f"'{sheet.replace(chr(39), chr(39) * 2)}'!"
+        with self.batch():
+            self.write(address, [list(header)])
+            self.write(f"{prefix}{_cell(row + 1, col)}", values)
+
+    def resolve(self, address: str) -> Address:
+        """Sheet and bounds of an A1-style address or any other reference
+        the workbook understands, such as a defined name or whole columns.
+
+        References other than A1-style addresses are cut down to the
+        cells in use, so whole columns are read without their empty tail.
+
+        Args:
+            address: Range address or reference
+
+        Returns:
+            Sheet name (None for the active sheet) and the range boundaries
+        """
+        try:
+            return parse_address(address)
+        except ValueError:
+            resolved = self._resolve_reference(address)
+            if resolved is None:
+                raise
+            return resolved
+
+    def ensure_sheet(self, name: str, clear: bool = True) -> None:
+        """Create a sheet if it does not exist, else optionally clear it."""
+        if name not in self.sheet_names():
+            self.add_sheet(name)
+        elif clear:
+            self.clear(name)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Suspend screen updating and recalculation for a series of writes."""
+        yield
+
+    def sheet_names(self) -> List[str]:
+        raise NotImplementedError
+
+    def add_sheet(self, name: str) -> None:
+        raise NotImplementedError
+
+    def clear(self, sheet: str) -> None:
+        raise NotImplementedError
+
+    def add_picture(self, figure: Any, name: str, address: str) -> None:
+        """Place a matplotlib figure with its top-left corner at ``address``."""
+        raise NotImplementedError
+
+    def _resolve_reference(self, reference: str) -> Optional[Address]:
+        """Resolve a reference that is not an A1-style address, or None."""
+        return None
+
+    def _read_block(
+        self,
+        sheet: str,
+        row: int,
+        col: int,
+        n_rows: int,
+        n_cols: int
+    ) -> List[list]:
+        raise NotImplementedError
+
+    def _write_block(self, sheet: str, row: int, col: int, rows: List[list]) -> None:
+        raise NotImplementedError
+
+def _column_index(letters: str) -> int:
+    """1-based index of a column given by its letters."""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index
+
+def _clip(
+    sheet: Optional[str],
+    min_row: int,
+    min_col: int,
+    max_row: int,
+    max_col: int,
+    last_row: int,
+    last_col: int
+) -> Address:
+    """Range bounds cut down to the cells in use, keeping at least one cell."""
+    return (
+        sheet,
+        min_row,
+        min_col,
+        max(min_row, min(max_row, last_row)),
+        max(min_col, min(max_col, last_col))
+    )
+
+def _cell(row: int, col: int) -> str:
+    """A1-style address of a cell."""
+    letters = ""
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return f"{letters}{row}"
+
+class XlwingsIO(ExcelIO):
+    """Block I/O against a live workbook through xlwings."""
+
+    def __init__(self, book=None):
+        """Wrap a workbook.
+
+        Args:
+            book: xlwings Book; defaults to the active workbook
+        """
+        import xlwings as xw
+        self.book = book if book is not None else xw.books.active
+        self._depth = 0
+
+    @property
+    def path(self) -> Optional[str]:
+        return self.book.fullname
+
+    @property
+    def active_sheet(self) -> str:
+        return self.book.sheets.active.name
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        if self._depth:
+            # Already suspended by an enclosing batch
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+            return
+
+        app = self.book.app
+        screen_updating, calculation = app.screen_updating, app.calculation
+        app.screen_updating = False
+        app.calculation = "manual"
+        self._depth = 1
+        try:
+            yield
+        finally:
+            self._depth = 0
+            app.calculation = calculation
+            app.screen_updating = screen_updating
+
+    def sheet_names(self) -> List[str]:
+        return [sheet.name for sheet in self.book.sheets]
+
+    def add_sheet(self, name: str) -> None:
+        self.book.sheets.add(name, after=self.book.sheets[-1])
+
+    def clear(self, sheet: str) -> None:
+        self.book.sheets[sheet].clear_contents()
+
+    def add_picture(self, figure: Any, name: str, address: str) -> None:
+        sheet, row, col = self.resolve(address)[:3]
+        sheet = self.book.sheets[sheet or self.active_sheet]
+        anchor = sheet.range((row, col))
+        sheet.pictures.add(
+            figure,
+            name=name,
+            update=True,
+            left=anchor.left,
+            top=anchor.top
+        )
+
+    def _resolve_reference(self, reference: str) -> Optional[Address]:
+        # Excel resolves defined names, whole columns and rows, and table
+        # references to a range
+        if self.book.names.contains(reference):
+            rng = self.book.names[reference].refers_to_range
+        else:
+            sheet = None
+            if "!" in reference:
+                sheet, reference = reference.rsplit("!", 1)
+                if sheet.startswith("'") and sheet.endswith("'"):
+                    sheet = sheet[1:-1].replace("''", "'")
+            try:
+                rng = self.book.sheets[sheet or self.active_sheet].range(reference)
+            except Exception:
+                return None
+        last = rng.sheet.used_range.last_cell
+        return _clip(
+            rng.sheet.name,
+            rng.row,
+            rng.column,
+            rng.row + rng.rows.count - 1,
+            rng.column + rng.columns.count - 1,
+            last.row,
+            last.column
+        )
+
+    def _read_block(self, sheet, row, col, n_rows, n_cols) -> List[list]:
+        values = self.book.sheets[sheet].range((row, col)).resize(n_rows, n_cols).raw_value
+        # Raw values are a scalar for one cell and a flat tuple for one row
+        if n_rows == 1 and n_cols == 1:
+            return [[values]]
+        if n_rows == 1 or n_cols == 1:
+            values = list(values)
+            if values and isinstance(values[0], (list, tuple)):
+                return [list(r) for r in values]
+            return [values] if n_rows == 1 else [[v] for v in values]
+        return [list(r) for r in values]
+
+    def _write_block(self, sheet, row, col, rows) -> None:
+        self.book.sheets[sheet].range((row, col)).resize(len(rows), len(rows[0])).raw_value = rows
+
+class MemoryIO(ExcelIO):
+    """In-memory stand-in for a workbook.
+
+    Sheets are object arrays that grow as they are written. The number of
+    block transfers is counted in :attr:`calls`, so the cost of a sequence
+    of operations against a real workbook can be estimated offline.
+
+    Attributes:
+        sheets: Cell values of each sheet (None for empty cells)
+        names: Defined names with the sheet-qualified address they refer to
+        pictures: Placed figures by name, with their anchor address
+        calls: Number of "read" and "write" block transfers
+        screen_updating: Whether screen updating is on
+        calculation: "automatic", or "manual" inside :meth:`batch`
+    """
+
+    def __init__(
+        self,
+        sheets: Optional[Dict[str, Any]] = None,
+        path: Optional[str] = None,
+        names: Optional[Dict[str, str]] = None
+    ):
+        """Create a fake workbook.
+
+        Args:
+            sheets: Initial contents by sheet name as 2-D array-likes; the
+                first sheet is active. Defaults to one empty "Sheet1".
+            path: Workbook path to report
+            names: Defined names, e.g. ``{"Inputs": "Sheet1!A1:D2"}``
+        """
+        self.sheets: Dict[str, np.ndarray] = {}
+        for name, values in (sheets or {"Sheet1": [[None]]}).items():
+            self.sheets[name] = np.array(_to_rows(values), dtype=object)
+        self._active = next(iter(self.sheets))
+        self._path = path
+        self.names = dict(names or {})
+        self.pictures: Dict[str, Tuple[Any, str]] = {}
+        self.calls = {"read": 0, "write": 0}
+        self.screen_updating = True
+        self.calculation = "automatic"
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._path
+
+    @property
+    def active_sheet(self) -> str:
+        return self._active
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        saved = self.screen_updating, self.calculation
+        self.screen_updating, self.calculation = False, "manual"
+        try:
+            yield
+        finally:
+            self.screen_updating, self.calculation = saved
+
+    def sheet_names(self) -> List[str]:
+        return list(self.sheets)
+
+    def add_sheet(self, name: str) -> None:
+        self.sheets[name] = np.empty((0, 0), dtype=object)
+
+    def clear(self, sheet: str) -> None:
+        self.sheets[sheet] = np.empty((0, 0), dtype=object)
+
+    def add_picture(self, figure: Any, name: str, address: str) -> None:
+        self.pictures[name] = (figure, address)
+
+    def _resolve_reference(self, reference: str) -> Optional[Address]:
+        # Names are case-insensitive, as in Excel
+        for name, address in self.names.items():
+            if name.lower() == reference.lower():
+                sheet, min_row, min_col, max_row, max_col = parse_address(address)
+                last_row, last_col = self.sheets[sheet or self.active_sheet].shape
+                return _clip(sheet, min_row, min_col, max_row, max_col, last_row, last_col)
+        sheet = None
+        if "!" in reference:
+            sheet, reference = reference.rsplit("!", 1)
+            if sheet.startswith("'") and sheet.endswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+        last_row, last_col = self.sheets[sheet or self.active_sheet].shape
+        columns, rows = _COLUMNS.match(reference), _ROWS.match(reference)
+        if columns:
+            cols = sorted(_column_index(letters) for letters in columns.groups())
+            return _clip(sheet, 1, cols[0], 1 << 20, cols[1], last_row, last_col)
+        if rows:
+            bounds = sorted(int(number) for number in rows.groups())
+            return _clip(sheet, bounds[0], 1, bounds[1], 1 << 14, last_row, last_col)
+        return None
+
+    def _read_block(self, sheet, row, col, n_rows, n_cols) -> List[list]:
+        self.calls["read"] += 1
+        block = np.full((n_rows, n_cols), None, dtype=object)
+        cells = self.sheets[sheet][row - 1:row - 1 + n_rows, col - 1:col - 1 + n_cols]
+        block[:cells.shape[0], :cells.shape[1]] = cells
+        return block.tolist()
+
+    def _write_block(self, sheet, row, col, rows) -> None:
+        self.calls["write"] += 1
+        if sheet not in self.sheets:
+            raise ValueError(f"Unknown sheet: {sheet}")
+        cells = self.sheets[sheet]
+        n_rows = max(cells.shape[0], row - 1 + len(rows))
+        n_cols = max(cells.shape[1], col - 1 + len(rows[0]))
+        if (n_rows, n_cols) != cells.shape:
+            grown = np.full((n_rows, n_cols), None, dtype=object)
+            grown[:cells.shape[0], :cells.shape[1]] = cells
+            self.sheets[sheet] = cells = grown
+        block = np.empty((len(rows), len(rows[0])), dtype=object)
+        block[...] = rows
+        cells[row - 1:row - 1 + len(rows), col - 1:col - 1 + len(rows[0])] = block
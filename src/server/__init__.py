@@ -0,0 +1,9 @@
+from .protocol import DEFAULT_ADDRESS, ServerError, default_authkey, parse_address
+from .client import SimulationClient, connect
+
+def __getattr__(name):
+    # The server preloads the engine; import it only when asked for
+    if name == "SimulationServer":
+        from .server import SimulationServer
+        return SimulationServer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
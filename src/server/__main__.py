@@ -0,0 +1,98 @@
+"""
+Command line for the simulation server.
+
+    python -m src.server serve [--address HOST:PORT]
+    python -m src.server run --input "revenue normal 100 15" \
+        --input "cost uniform 40 60" --model "revenue - cost" --iterations 100000
+    python -m src.server ping | stats | stop
+
+``run`` starts a server in the background when none is running, so
+repeated runs only pay the Python start-up cost of this thin client.
+"""
+import sys
+import json
+import argparse
+from .protocol import parse_address
+from .client import SimulationClient, connect
+
+def _input_row(text: str) -> list:
+    """Parse ``"name distribution param ..."`` into an input row."""
+    name, dist_type, *params = text.split()
+    return [name, dist_type, *map(float, params)]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.server", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--address", help="HOST:PORT or named pipe path of the server")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    serve = commands.add_parser("serve", help="run the server in the foreground")
+    serve.add_argument("--threads", type=int, default=-1, help="workers per pool")
+    
+    run = commands.add_parser("run", help="run a simulation on the server")
+    run.add_argument("--input", action="append", type=_input_row, required=True,
+                     metavar='"NAME DIST P1 P2 ..."', help="input variable (repeatable)")
+    run.add_argument("--model", help="model formula over the input names")
+    run.add_argument("--workbook", help="workbook file holding the model formulas")
+    run.add_argument("--output-cell", help="formula cell of the workbook to simulate")
+    run.add_argument("--sheet", help="sheet of unqualified addresses in the workbook")
+    run.add_argument("--iterations", type=int, default=10000)
+    run.add_argument("--seed", type=int)
+    run.add_argument("--sampler", default="random")
+    run.add_argument("--backend", default="thread")
+    run.add_argument("--save", metavar="FILE.npy", help="save all results to a .npy file")
+    run.add_argument("--json", action="store_true", help="print the summary as JSON")
+    
+    for name in ("ping", "stats", "stop"):
+        commands.add_parser(name)
+    args = parser.parse_args(argv)
+    address = parse_address(args.address)
+    
+    if args.command == "serve":
+        from .server import SimulationServer
+        server = SimulationServer(address, num_threads=args.threads)
+        print(f"Serving simulations on {server.address}", flush=True)
+        server.serve_forever()
+        return 0
+        
+    if args.command == "run":
+        with connect(address) as client:
+            job = dict(
+                model=args.model,
+                workbook=args.workbook,
+                output_cell=args.output_cell,
+                sheet=args.sheet,
+                iterations=args.iterations,
+                seed=args.seed,
+                sampler=args.sampler,
+                backend=args.backend
+            )
+            if args.save:
+                import numpy as np
+                from ..utils.statistics import StatsAccumulator
+                results = client.run(args.input, **job)
+                np.save(args.save, np.asarray(results))
+                summary = StatsAccumulator().update(results).summary()
+            else:
+                summary = client.run_summary(args.input, **job)
+        if args.json:
+            print(json.dumps(summary))
+        else:
+            for name, value in summary.items():
+                print(f"{name}\t{value:.6g}")
+        return 0
+        
+    with SimulationClient(address) as client:
+        try:
+            if args.command == "ping":
+                print(json.dumps(client.ping()))
+            elif args.command == "stats":
+                print(json.dumps(client.stats()))
+            else:
+                client.shutdown()
+        except OSError:
+            print(f"No simulation server running on {address}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Thin client for the simulation server.
+
+Only the standard library is imported here, so a client starts in a
+fraction of the time the engine takes; numpy is loaded only when full
+results are received.
+"""
+import os
+import sys
+import time
+import subprocess
+from multiprocessing.connection import Client
+from typing import Any, Dict, Optional, Sequence
+from .protocol import DEFAULT_ADDRESS, Address, default_authkey, remote_error
+
+class SimulationClient:
+    """Submit jobs to a running :class:`SimulationServer`.
+
+    One connection is opened lazily and reused for every request. Errors
+    raised by a job on the server are raised again here, rebuilt from their
+    type name and message.
+    """
+
+    def __init__(
+        self,
+        address: Optional[Address] = None,
+        authkey: Optional[bytes] = None
+    ):
+        """Create a client.
+
+        Args:
+            address: Server address; defaults to :data:`DEFAULT_ADDRESS`
+            authkey: Key shared with the server; defaults to
+                :func:`default_authkey`
+        """
+        self.address = address or DEFAULT_ADDRESS
+        self._authkey = authkey or default_authkey()
+        self._conn = None
+
+    def ping(self) -> Dict[str, Any]:
+        """Check that the server is up; returns its process id and job count."""
+        return self._request({"op": "ping"})
+
+    def stats(self) -> Dict[str, Any]:
+        """Jobs run, warm worker pools and cached workbook models."""
+        return self._request({"op": "stats"})
+
+    def run(
+        self,
+        inputs: Sequence[Sequence],
+        model: Optional[str] = None,
+        correlation_matrix: Optional[Sequence[Sequence[float]]] = None,
+        use_lhs: bool = False,
+        workbook: Optional[str] = None,
+        output_cell: Optional[str] = None,
+        sheet: Optional[str] = None,
+        **config
+    ) -> Any:
+        """Run a simulation on the server.
+
+        Args:
+            inputs: Input rows ``[name, distribution type, *params]`` as read
+                from the input range
+            model: Model formula over the input names; defaults to their sum
+            correlation_matrix: Optional rank correlation matrix
+            use_lhs: Whether to use Latin Hypercube Sampling
+            workbook: Saved workbook file holding the model formulas, used
+                with ``output_cell``
+            output_cell: Formula cell (or defined name) to use as the model
+            sheet: Sheet of unqualified addresses in the workbook
+            **config: :class:`SimulationConfig` fields, e.g. ``iterations``
+
+        Returns:
+            Simulation results (a :class:`SimulationResult`)
+        """
+        return self._submit(
+            inputs, model, correlation_matrix, use_lhs, workbook, output_cell, sheet, False, config
+        )["results"]
+
+    def run_summary(
+        self,
+        inputs: Sequence[Sequence],
+        model: Optional[str] = None,
+        correlation_matrix: Optional[Sequence[Sequence[float]]] = None,
+        use_lhs: bool = False,
+        workbook: Optional[str] = None,
+        output_cell: Optional[str] = None,
+        sheet: Optional[str] = None,
+        **config
+    ) -> Dict[str, float]:
+        """Like :meth:`run`, but only the summary statistics are sent back."""
+        return self._submit(
+            inputs, model, correlation_matrix, use_lhs, workbook, output_cell, sheet, True, config
+        )["summary"]
+
+    def shutdown(self) -> None:
+        """Ask the server to exit."""
+        self._request({"op": "shutdown"})
+        self.close()
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "SimulationClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _submit(
+        self,
+        inputs,
+        model,
+        correlation_matrix,
+        use_lhs,
+        workbook,
+        output_cell,
+        sheet,
+        summary_only,
+        config
+    ) -> Dict[str, Any]:
+        if model and output_cell:
+            raise ValueError("Specify either a model formula or an output cell, not both")
+        if output_cell and not workbook:
+            raise ValueError("An output cell needs the workbook file it is in")
+        return self._request({
+            "op": "run",
+            "inputs": [list(row) for row in inputs],
+            "model": model,
+            "correlation_matrix": correlation_matrix,
+            "use_lhs": use_lhs,
+            "workbook": workbook,
+            "output_cell": output_cell,
+            "sheet": sheet,
+            "summary_only": summary_only,
+            "config": config,
+        })
+
+    def _request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if self._conn is None:
+            self._conn = Client(self.address, authkey=self._authkey)
+        try:
+            self._conn.send(request)
+            response = self._conn.recv()
+        except (EOFError, OSError):
+            self.close()
+            raise
+        if not response["ok"]:
+            raise remote_error(response["error"])
+        return response
+
+def connect(
+    address: Optional[Address] = None,
+    authkey: Optional[bytes] = None,
+    start: bool = True,
+    timeout: float = 30.0
+) -> SimulationClient:
+    """Connect to the server, starting it in the background if needed.
+
+    Args:
+        address: Server address; defaults to :data:`DEFAULT_ADDRESS`
+        authkey: Key shared with the server; defaults to
+            :func:`default_authkey`
+        start: Launch ``python -m src.server serve`` when none is running
+        timeout: Seconds to wait for a launched server to come up
+
+    Returns:
+        Connected client
+    """
+    client = SimulationClient(address, authkey)
+    try:
+        client.ping()
+        return client
+    except OSError:
+        if not start:
+            raise
+
+    # The server reads the same key file unless another key was given
+    env = dict(os.environ)
+    if authkey is not None:
+        env["MCSIM_AUTHKEY"] = authkey.decode()
+    command = [sys.executable, "-m", "src.server"]
+    if address is not None:
+        command += ["--address", address if isinstance(address, str) else f"{address[0]}:{address[1]}"]
+    command.append("serve")
+    subprocess.Popen(
+        command,
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        # Outlive the calling process (e.g. an Excel macro)
+        start_new_session=True,
+        creationflags=getattr(subprocess, "DETACHED_PROCESS", 0)
+    )
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client.ping()
+            return client
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Simulation server did not start within {timeout} seconds")
+            time.sleep(0.1)
@@ -0,0 +1,80 @@
+"""
+Addressing shared by the simulation server and its clients.
+
+Kept free of numpy and the engine, so clients start quickly.
+"""
+import os
+import sys
+import stat
+import secrets
+import builtins
+from typing import Optional, Tuple, Union
+
+Address = Union[str, Tuple[str, int]]
+
+DEFAULT_ADDRESS: Address = (
+    r"\\.\pipe\monte_carlo_excel" if sys.platform == "win32" else ("127.0.0.1", 52713)
+)
+
+# Per-user key authenticating clients, created on first use
+AUTHKEY_FILE = os.path.join(os.path.expanduser("~"), ".mcsim", "authkey")
+
+class ServerError(RuntimeError):
+    """A job failed on the server with an exception that is not a builtin."""
+
+def default_authkey() -> bytes:
+    """Key shared by the user's server and clients.
+
+    ``MCSIM_AUTHKEY`` if set, else the contents of :data:`AUTHKEY_FILE`,
+    which is created with a random key readable by the user only. Anyone
+    holding the key can run code in the server, so a key file other users
+    can read is refused.
+    """
+    key = os.environ.get("MCSIM_AUTHKEY")
+    if key:
+        return key.encode()
+    try:
+        fd = os.open(AUTHKEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(AUTHKEY_FILE), mode=0o700, exist_ok=True)
+        return default_authkey()
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_bytes(32).hex())
+    if os.name == "posix" and os.stat(AUTHKEY_FILE).st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise PermissionError(f"{AUTHKEY_FILE} must only be accessible by its owner (chmod 600)")
+    with open(AUTHKEY_FILE) as f:
+        key = f.read().strip()
+    if not key:
+        raise ValueError(f"{AUTHKEY_FILE} is empty")
+    return key.encode()
+
+def error_message(error: BaseException) -> dict:
+    """Describe a job's exception by type name and message, for the client."""
+    return {"type": type(error).__name__, "message": str(error)}
+
+def remote_error(error: dict) -> Exception:
+    """Rebuild a server error locally: builtin exception types are kept,
+    anything else becomes a :class:`ServerError`."""
+    name, message = str(error.get("type")), str(error.get("message"))
+    cls = getattr(builtins, name, None)
+    if isinstance(cls, type) and issubclass(cls, Exception):
+        try:
+            return cls(message)
+        except TypeError:
+            # Builtins such as UnicodeDecodeError take other arguments
+            pass
+    return ServerError(f"{name}: {message}")
+
+def parse_address(address: Optional[str]) -> Address:
+    """Parse ``host:port`` or a named pipe path; None gives the default."""
+    if address is None:
+        return DEFAULT_ADDRESS
+    if address.startswith("\\\\"):
+        return address
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Server address must be host:port or a pipe path, got {address}")
+    return host, int(port)
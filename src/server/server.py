@@ -0,0 +1,245 @@
+"""
+Long-lived simulation server.
+
+Starting Python and importing numpy, scipy and the engine costs seconds,
+which the add-in and command line would otherwise pay on every run. The
+server pays it once: it preloads the engine, keeps worker pools alive and
+keeps compiled models, workbook formula graphs and correlation
+factorizations cached between jobs. Jobs arrive over a local socket (a
+named pipe on Windows) using :mod:`multiprocessing.connection`, which
+authenticates clients with a per-user key (see :func:`default_authkey`)
+and exchanges pickled messages.
+
+Requests are dicts with an ``op`` of "ping", "run", "stats" or
+"shutdown"; see :class:`~src.server.client.SimulationClient` for the
+fields of a run. Responses are dicts with ``ok`` set, plus the type name
+and message of the exception raised by the job when it failed.
+"""
+import os
+import time
+import pickle
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, Executor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, Optional
+from ..core.backends import open_executor
+from ..core.expressions import compile_model
+from ..core.simulation import MonteCarloEngine, SimulationConfig, _available_cpus
+from ..distributions import get_distribution
+from ..utils.statistics import StatsAccumulator
+from .protocol import DEFAULT_ADDRESS, Address, default_authkey, error_message
+
+# Workbook formula graphs kept compiled between jobs
+_WORKBOOK_CACHE_SIZE = 8
+
+class SimulationServer:
+    """Serve simulation jobs from one warm process.
+
+    Each connection is handled on its own thread, so several clients can
+    submit jobs at once; they share the worker pools.
+
+    Attributes:
+        address: Address the server listens on (with the actual port when
+            port 0 was requested)
+        jobs: Number of jobs run so far
+    """
+
+    def __init__(
+        self,
+        address: Optional[Address] = None,
+        authkey: Optional[bytes] = None,
+        num_threads: int = -1
+    ):
+        """Bind the listener.
+
+        Args:
+            address: ``(host, port)`` or a named pipe path; defaults to
+                :data:`DEFAULT_ADDRESS`
+            authkey: Key clients must present; defaults to
+                :func:`default_authkey`
+            num_threads: Workers per pool, -1 for all cores but one
+        """
+        authkey = authkey or default_authkey()
+        self._listener = Listener(address or DEFAULT_ADDRESS, authkey=authkey)
+        self.address = self._listener.address
+        self._authkey = authkey
+        self.num_threads = num_threads if num_threads > 0 else max(1, _available_cpus() - 1)
+        self.jobs = 0
+        self._pools: Dict[str, Executor] = {}
+        self._workbooks: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def serve_forever(self) -> None:
+        """Accept connections until a client requests shutdown."""
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn = self._listener.accept()
+                except (OSError, EOFError, AuthenticationError):
+                    # Failed handshake, or the listener was closed
+                    if self._stopping.is_set():
+                        break
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self._listener.close()
+            for pool in self._pools.values():
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def start(self) -> "SimulationServer":
+        """Serve on a background thread, e.g. when embedded in tests."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop accepting connections and release the worker pools."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        # Wake the accept() call blocking the serving thread
+        try:
+            Client(self.address, authkey=self._authkey).close()
+        except OSError:
+            pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _handle(self, conn: Connection) -> None:
+        """Answer the requests of one connection until it closes."""
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    response = self._dispatch(request)
+                except Exception as e:
+                    response = {"ok": False, "error": error_message(e)}
+                try:
+                    conn.send(response)
+                except (pickle.PicklingError, AttributeError, TypeError) as e:
+                    conn.send({"ok": False, "error": error_message(RuntimeError(f"Cannot send response: {e}"))})
+                except (EOFError, OSError):
+                    return
+                if request.get("op") == "shutdown":
+                    threading.Thread(target=self.stop, daemon=True).start()
+                    return
+
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "jobs": self.jobs}
+        if op == "run":
+            return self._run(request)
+        if op == "stats":
+            with self._lock:
+                workbooks = len(self._workbooks)
+            return {
+                "ok": True,
+                "jobs": self.jobs,
+                "pools": sorted(self._pools),
+                "workbooks": workbooks,
+            }
+        if op == "shutdown":
+            return {"ok": True}
+        raise ValueError(f"Unknown server request: {op}")
+
+    def _run(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one simulation job.
+
+        Args:
+            job: Run request, see :meth:`SimulationClient.run`
+
+        Returns:
+            Response with the summary statistics and, unless only the
+            summary was asked for, the results
+        """
+        start = time.perf_counter()
+        inputs = {
+            name: get_distribution(dist_type, list(params))
+            for name, dist_type, *params in job["inputs"]
+        }
+        config = SimulationConfig(**job.get("config", {}))
+        pool = self._pool(config.backend)
+        engine = MonteCarloEngine(config, executor=pool)
+
+        if job.get("output_cell"):
+            model = self._workbook_model(
+                job["workbook"],
+                list(inputs),
+                job["output_cell"],
+                job.get("sheet")
+            )
+        elif job.get("model"):
+            model = compile_model(job["model"])
+        else:
+            model = _sum_inputs
+
+        correlation_matrix = job.get("correlation_matrix")
+        try:
+            results = engine.run_simulation(
+                model,
+                inputs,
+                correlation_matrix=None if correlation_matrix is None else np.asarray(correlation_matrix),
+                use_lhs=job.get("use_lhs", False)
+            )
+        except BrokenExecutor:
+            # A worker died (e.g. killed for memory); the next job gets a new pool
+            self._discard_pool(config.backend, pool)
+            raise
+        with self._lock:
+            self.jobs += 1
+        return {
+            "ok": True,
+            "summary": StatsAccumulator().update(results).summary(),
+            "results": None if job.get("summary_only") else results,
+            "seconds": time.perf_counter() - start,
+        }
+
+    def _pool(self, backend: str) -> Optional[Executor]:
+        """Worker pool of a backend, created on first use and kept warm."""
+        if backend == "serial":
+            return None
+        with self._lock:
+            if backend not in self._pools:
+                self._pools[backend] = open_executor(backend, self.num_threads)
+            return self._pools[backend]
+
+    def _discard_pool(self, backend: str, pool: Executor) -> None:
+        """Drop a broken pool, unless another job has replaced it already."""
+        with self._lock:
+            if self._pools.get(backend) is pool:
+                del self._pools[backend]
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _workbook_model(
+        self,
+        path: str,
+        inputs: list,
+        output: str,
+        sheet: Optional[str]
+    ) -> Callable[..., np.ndarray]:
+        """Compiled workbook model, reused until the file changes."""
+        key = (os.path.abspath(path), os.path.getmtime(path), tuple(inputs), output, sheet)
+        with self._lock:
+            if key in self._workbooks:
+                self._workbooks.move_to_end(key)
+                return self._workbooks[key]
+        from ..excel.formulas import WorkbookModel
+        model = WorkbookModel.from_file(path, inputs, output, sheet=sheet)
+        with self._lock:
+            self._workbooks[key] = model
+            while len(self._workbooks) > _WORKBOOK_CACHE_SIZE:
+                self._workbooks.popitem(last=False)
+        return model
+
+def _sum_inputs(**inputs) -> np.ndarray:
+    """Default model when a job names none: the sum of the inputs."""
+    return sum(inputs.values())
@@ -0,0 +1,205 @@
+"""
+Correlation of uniform samples for Monte Carlo simulation.
+
+Both methods induce a target rank correlation between the columns of a
+uniform sample matrix while leaving every column uniform, so any inverse
+CDF applied afterwards keeps its marginal distribution exactly.
+"""
+import warnings
+import numpy as np
+from functools import lru_cache
+from typing import Dict, Type
+from scipy import special
+
+# Largest float64 below one; keeps transformed uniforms inside [0, 1)
+_ONE_BELOW = np.nextafter(1.0, 0.0)
+
+# Smallest eigenvalue kept when repairing a matrix, so Cholesky succeeds
+_MIN_EIGENVALUE = 1e-10
+
+def nearest_correlation(correlation_matrix: np.ndarray) -> np.ndarray:
+    """Repair a symmetric matrix that is not positive definite.
+
+    Negative (or zero) eigenvalues, typically from rounding or from
+    correlations estimated pairwise, are raised to a small positive floor
+    and the result is rescaled to a unit diagonal.
+
+    Args:
+        correlation_matrix: Symmetric matrix with unit diagonal
+
+    Returns:
+        Positive definite correlation matrix; the input if it already is one
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation_matrix)
+    if eigenvalues.min() >= _MIN_EIGENVALUE:
+        return correlation_matrix
+    repaired = (eigenvectors * np.maximum(eigenvalues, _MIN_EIGENVALUE)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(repaired))
+    repaired /= np.outer(scale, scale)
+    np.fill_diagonal(repaired, 1.0)
+    return repaired
+
+class Correlation:
+    """Transform inducing a rank correlation between uniform columns.
+
+    The target is read as Spearman rank correlations. They are mapped to
+    the equivalent normal-score correlations ``2 sin(pi r / 6)``, repaired
+    if the result is not positive definite, and factorized once.
+    Subclasses implement :meth:`__call__`, which transforms a sample matrix
+    in place.
+    """
+
+    name = ""
+
+    def __init__(self, correlation_matrix: np.ndarray):
+        """Validate and factorize the target correlation.
+
+        Args:
+            correlation_matrix: Symmetric matrix of rank correlations
+        """
+        matrix = np.array(correlation_matrix, dtype=float)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+            raise ValueError(f"Correlation matrix must be square, got shape {matrix.shape}")
+        if not np.allclose(matrix, matrix.T, atol=1e-8):
+            raise ValueError("Correlation matrix must be symmetric")
+        if not np.allclose(np.diag(matrix), 1.0):
+            raise ValueError("Correlation matrix must have a unit diagonal")
+        if np.abs(matrix).max() > 1:
+            raise ValueError("Correlations must lie in [-1, 1]")
+
+        normal = 2 * np.sin(np.pi / 6 * matrix)
+        repaired = nearest_correlation(normal)
+        change = np.abs(repaired - normal).max()
+        if change > 1e-6:
+            warnings.warn(
+                f"Correlation matrix is not positive definite; "
+                f"repaired with a maximum change of {change:.3g}",
+                RuntimeWarning
+            )
+
+        self.matrix = repaired
+        # Lower triangular Cholesky factor, column-major for BLAS
+        self.cholesky = np.asfortranarray(np.linalg.cholesky(repaired))
+        self.matrix.flags.writeable = False
+        self.cholesky.flags.writeable = False
+
+    @property
+    def n_dims(self) -> int:
+        """Number of correlated variables."""
+        return len(self.matrix)
+
+    def __call__(self, samples: np.ndarray) -> np.ndarray:
+        """Correlate the columns of ``samples``.
+
+        Args:
+            samples: Uniform samples of shape (n, n_dims), transformed in
+                place when a writable column-major float64 array
+
+        Returns:
+            Correlated uniform samples
+        """
+        raise NotImplementedError
+
+    def _check(self, samples: np.ndarray) -> np.ndarray:
+        """Validate the shape and make ``samples`` a writable column-major array."""
+        if samples.ndim != 2 or samples.shape[1] != self.n_dims:
+            raise ValueError(
+                f"Correlation matrix is {self.n_dims}x{self.n_dims} but "
+                f"samples have shape {samples.shape}"
+            )
+        if samples.dtype != np.float64 or not samples.flags.f_contiguous or not samples.flags.writeable:
+            samples = np.array(samples, dtype=float, order="F")
+        return samples
+
+class GaussianCopula(Correlation):
+    """Gaussian copula: correlate normal scores and map them back to uniforms.
+
+    Exact in distribution for any sample size; the triangular factor is
+    applied in place, so no temporary larger than one column is allocated.
+    """
+
+    name = "copula"
+
+    def __call__(self, samples: np.ndarray) -> np.ndarray:
+        # scipy.linalg is imported on first use; it is slow to load
+        from scipy.linalg import blas
+        samples = self._check(samples)
+        # Normal scores, column by column; the clip keeps ndtri finite
+        for column in samples.T:
+            np.clip(column, np.finfo(float).tiny, _ONE_BELOW, out=column)
+            special.ndtri(column, out=column)
+        # samples := samples @ L.T, in place
+        samples = blas.dtrmm(
+            1.0, self.cholesky, samples,
+            side=1, lower=1, trans_a=1, overwrite_b=1
+        )
+        for column in samples.T:
+            special.ndtr(column, out=column)
+            np.minimum(column, _ONE_BELOW, out=column)
+        return samples
+
+class ImanConover(Correlation):
+    """Iman-Conover rank reordering.
+
+    Values of every column are kept as they are and only re-paired, so
+    stratification (e.g. Latin Hypercube) is preserved exactly. The ranks
+    of the input serve as the random permutations of the normal scores,
+    whose sample correlation is corrected to match the target.
+    """
+
+    name = "iman_conover"
+
+    def __call__(self, samples: np.ndarray) -> np.ndarray:
+        samples = self._check(samples)
+        n = len(samples)
+        if n < 3:
+            return samples
+        scores = special.ndtri(np.arange(1, n + 1) / (n + 1))
+
+        ranks = np.empty((n, self.n_dims), dtype=np.intp, order="F")
+        order = np.empty(n, dtype=np.intp)
+        for j, column in enumerate(samples.T):
+            order[:] = np.argsort(column)
+            ranks[order, j] = np.arange(n)
+        normal = scores[ranks]
+
+        # Remove the sample correlation of the scores, then impose the target
+        sample_cholesky = np.linalg.cholesky(nearest_correlation(np.corrcoef(normal.T)))
+        normal = normal @ np.linalg.solve(sample_cholesky.T, self.cholesky.T)
+
+        # Reorder each column to the ranks of the correlated scores
+        for j, column in enumerate(samples.T):
+            column.sort()
+            ranks[np.argsort(normal[:, j]), j] = np.arange(n)
+            column[:] = column[ranks[:, j]]
+        return samples
+
+CORRELATIONS: Dict[str, Type[Correlation]] = {
+    cls.name: cls for cls in (GaussianCopula, ImanConover)
+}
+
+def get_correlation(
+    correlation_matrix: np.ndarray,
+    method: str = "copula"
+) -> Correlation:
+    """Create (or reuse) the correlation transform of a matrix.
+
+    Transforms are cached by method and matrix contents, so repeated runs
+    with the same matrix factorize it only once.
+
+    Args:
+        correlation_matrix: Symmetric matrix of rank correlations
+        method: "copula" or "iman_conover"
+
+    Returns:
+        Correlation transform
+    """
+    if method not in CORRELATIONS:
+        raise ValueError(f"Unknown correlation method: {method}")
+    matrix = np.ascontiguousarray(correlation_matrix, dtype=float)
+    return _cached_correlation(method, matrix.shape, matrix.tobytes())
+
+@lru_cache(maxsize=32)
+def _cached_correlation(method: str, shape, data: bytes) -> Correlation:
+    """Cached transform keyed by the raw matrix contents."""
+    return CORRELATIONS[method](np.frombuffer(data).reshape(shape))
@@ -1,40 +1,343 @@
 """
 Sampling utilities for Monte Carlo simulation.
 """
+import warnings
 import numpy as np
-from typing import Optional
+from typing import Dict, Iterator, Optional, Type, Union
+
+# Anything accepted by ``np.random.default_rng``
+SeedLike = Union[None, int, np.random.SeedSequence, np.random.Generator]
 
 def latin_hypercube_sampling(
     n_samples: int,
     n_dims: int,
-    rng: Optional[np.random.Generator] = None
+    rng: Optional[np.random.Generator] = None,
+    out: Optional[np.ndarray] = None
 ) -> np.ndarray:
     """Generate Latin Hypercube samples.
-    
+
+    The strata of all dimensions are shuffled in place in one batched call
+    and jittered in bounded slabs, without index temporaries or clipping.
+    Samples are stored column-major, so each dimension is contiguous.
+
     Args:
         n_samples: Number of samples to generate
         n_dims: Number of dimensions
         rng: Random number generator (optional)
-        
+        out: Optional float64 array of shape (n_samples, n_dims) to fill;
+            Fortran order is fastest
+
     Returns:
         Array of shape (n_samples, n_dims) containing Latin Hypercube samples
     """
     if rng is None:
         rng = np.random.default_rng()
-        
-    # Generate the intervals
-    intervals = np.linspace(0, 1, n_samples + 1)
-    
-    # Create center points of the intervals
-    centers = (intervals[1:] + intervals[:-1]) / 2
-    
-    # Generate points for each dimension
-    points = np.zeros((n_samples, n_dims))
-    
-    for i in range(n_dims):
-        # Randomly permute the sample indices
-        perm = rng.permutation(n_samples)
-        # Add some random noise within each interval
-        points[:, i] = centers[perm] + rng.uniform(-0.5, 0.5, n_samples) / n_samples
-        
-    return np.clip(points, 0, 1)  # Ensure points are within [0, 1]
+    out = _check_out(out, n_samples, n_dims)
+
+    columns = out.T
+    slab = max(1, _SLAB_ELEMENTS // max(1, n_samples))
+    for i in range(0, n_dims, slab):
+        rows = columns[i:i + slab]
+        # Independent random permutation of the strata in every dimension
+        rows[:] = np.arange(n_samples)
+        rng.permuted(rows, axis=1, out=rows)
+        # Uniform position within each stratum: (stratum + U) / n lies in [0, 1)
+        rows += rng.random(rows.shape)
+    columns /= n_samples
+    return out
+
+def latin_hypercube_blocks(
+    n_samples: int,
+    n_dims: int,
+    block_size: int,
+    rng: Optional[np.random.Generator] = None,
+    out: Optional[np.ndarray] = None
+) -> Iterator[np.ndarray]:
+    """Generate one Latin Hypercube design block by block.
+
+    Together the blocks form a Latin Hypercube of ``n_samples`` points, but
+    the permutation of the strata is never materialised: the stratum of
+    row ``i`` in each dimension is given by a keyed pseudo-random bijection
+    of ``range(n_samples)`` (a Feistel network with cycle walking), so
+    memory stays O(block_size x n_dims).
+
+    Args:
+        n_samples: Total number of samples
+        n_dims: Number of dimensions
+        block_size: Number of samples per block
+        rng: Random number generator (optional)
+        out: Optional float64 array of shape (block_size, n_dims) reused for
+            every block; each block must be consumed before the next.
+            A fresh array is allocated per block if omitted.
+
+    Yields:
+        Arrays of shape (rows, n_dims) with consecutive rows of the design
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if block_size <= 0:
+        raise ValueError(f"Block size must be positive, got {block_size}")
+    permutation = _IndexPermutation(n_samples, n_dims, rng)
+    if out is not None:
+        _check_out(out, block_size, n_dims)
+
+    for start in range(0, n_samples, block_size):
+        stop = min(start + block_size, n_samples)
+        block = _check_out(None if out is None else out[:stop - start], stop - start, n_dims)
+        columns = block.T
+        if columns.flags.c_contiguous:
+            rng.random(columns.shape, out=columns)
+        else:
+            columns[:] = rng.random(columns.shape)
+        columns += permutation(np.arange(start, stop))
+        columns /= n_samples
+        yield block
+
+class _IndexPermutation:
+    """Keyed pseudo-random bijections of ``range(n)``, one per dimension.
+
+    An unbalanced Feistel network permutes the smallest power-of-two domain
+    covering ``range(n)``; values landing outside are permuted again
+    (cycle walking) until they fall inside, which keeps the map a bijection.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, n: int, n_dims: int, rng: np.random.Generator):
+        self.n = n
+        bits = max(2, int(n - 1).bit_length())
+        self.bits = (bits // 2, bits - bits // 2)
+        # 32-bit arithmetic halves memory traffic whenever the domain fits
+        self.dtype = np.uint32 if bits <= 32 else np.uint64
+        self.keys = rng.integers(
+            0, np.iinfo(self.dtype).max, size=(self.ROUNDS, n_dims, 1),
+            dtype=self.dtype, endpoint=True
+        )
+
+    def __call__(self, index: np.ndarray) -> np.ndarray:
+        """Map row indices to strata, returning shape (n_dims, len(index))."""
+        result = self._feistel(index.astype(self.dtype)[None, :], self.keys)
+        pending = np.nonzero(result >= self.n)
+        # Cycle walking on the few values outside range(n)
+        while len(pending[0]):
+            keys = self.keys[:, pending[0], 0]
+            values = self._feistel(result[pending], keys)
+            result[pending] = values
+            inside = values < self.n
+            pending = (pending[0][~inside], pending[1][~inside])
+        return result
+
+    def _feistel(self, x: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Unbalanced Feistel network over ``sum(self.bits)`` bits."""
+        t = self.dtype
+        if t is np.uint32:
+            multipliers, shifts = (0x9E3779B9, 0x85EBCA6B), (16, 13)
+        else:
+            multipliers, shifts = (0x9E3779B97F4A7C15, 0xBF58476D1CE4E5B9), (29, 32)
+        left_bits, right_bits = self.bits
+        left = x >> t(right_bits)
+        right = x & t((1 << right_bits) - 1)
+        for key in keys:
+            h = right + key
+            h *= t(multipliers[0])
+            h ^= h >> t(shifts[0])
+            h *= t(multipliers[1])
+            h ^= h >> t(shifts[1])
+            h &= t((1 << left_bits) - 1)
+            h ^= left
+            left, right = right, h
+            left_bits, right_bits = right_bits, left_bits
+        return (left << t(right_bits)) | right
+
+# Upper bound on the elements of temporaries allocated while sampling
+_SLAB_ELEMENTS = 1 << 20
+
+class Sampler:
+    """Source of uniform samples on the unit hypercube.
+
+    Subclasses implement :meth:`sample` and :meth:`sample_chunk`;
+    :meth:`blocks` draws a design of ``n`` points in consecutive blocks and
+    by default just continues the sampler block after block.
+
+    :meth:`sample_chunk` instead gives random access to the rows of a
+    design: randomization shared by the whole design (LHS strata, QMC
+    scrambling) derives from ``design_seed``, drawn once from ``rng``, and
+    the rest from the seed of the chunk. Any worker can therefore produce
+    any chunk, and a chunk only depends on its seed and position.
+    """
+
+    name = ""
+
+    def __init__(self, n_dims: int, rng: Optional[np.random.Generator] = None):
+        """Initialize the sampler.
+
+        Args:
+            n_dims: Number of dimensions
+            rng: Random number generator used for sampling or scrambling
+        """
+        self.n_dims = n_dims
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.design_seed = int(self.rng.integers(2 ** 63))
+
+    def sample(self, n: int) -> np.ndarray:
+        """Draw ``n`` points as an array of shape (n, n_dims)."""
+        raise NotImplementedError
+
+    def sample_chunk(
+        self,
+        n: int,
+        start: int,
+        stop: int,
+        seed: SeedLike
+    ) -> np.ndarray:
+        """Draw rows ``start:stop`` of a design of ``n`` points.
+
+        Args:
+            n: Total number of points in the design
+            start: First row of the chunk
+            stop: End of the chunk (exclusive)
+            seed: Seed of the chunk, typically a spawned ``SeedSequence``
+
+        Returns:
+            Array of shape (stop - start, n_dims), column-major
+        """
+        raise NotImplementedError
+
+    def blocks(self, n: int, block_size: int) -> Iterator[np.ndarray]:
+        """Draw a design of ``n`` points in blocks of at most ``block_size``."""
+        if block_size <= 0:
+            raise ValueError(f"Block size must be positive, got {block_size}")
+        for start in range(0, n, block_size):
+            yield self.sample(min(block_size, n - start))
+
+class RandomSampler(Sampler):
+    """Plain pseudo-random Monte Carlo sampling."""
+
+    name = "random"
+
+    def sample(self, n: int) -> np.ndarray:
+        return self.rng.random((n, self.n_dims))
+
+    def sample_chunk(self, n, start, stop, seed):
+        rng = np.random.default_rng(seed)
+        return rng.random((self.n_dims, stop - start)).T
+
+class LatinHypercubeSampler(Sampler):
+    """Latin Hypercube sampling; every design is stratified over all its points."""
+
+    name = "lhs"
+
+    def sample(self, n: int) -> np.ndarray:
+        return latin_hypercube_sampling(n, self.n_dims, self.rng)
+
+    def blocks(self, n: int, block_size: int) -> Iterator[np.ndarray]:
+        return latin_hypercube_blocks(n, self.n_dims, block_size, self.rng)
+
+    def sample_chunk(self, n, start, stop, seed):
+        # The keyed permutation is a handful of integers, cheap to rebuild
+        permutation = _IndexPermutation(
+            n, self.n_dims, np.random.default_rng(self.design_seed)
+        )
+        columns = np.random.default_rng(seed).random((self.n_dims, stop - start))
+        columns += permutation(np.arange(start, stop))
+        columns /= n
+        return columns.T
+
+class _QMCSampler(Sampler):
+    """Randomized quasi-Monte Carlo sampling via ``scipy.stats.qmc``.
+
+    ``scipy.stats`` is slow to import, so it is loaded when the first
+    quasi-random sampler is created.
+    """
+
+    engine_name = ""
+
+    def __init__(self, n_dims: int, rng: Optional[np.random.Generator] = None):
+        super().__init__(n_dims, rng)
+        self.engine = self._engine(self.rng)
+
+    def sample(self, n: int) -> np.ndarray:
+        return _draw(self.engine, n)
+
+    def sample_chunk(self, n, start, stop, seed):
+        # Every chunk continues the same scrambled sequence from ``start``
+        engine = self._engine(np.random.default_rng(self.design_seed))
+        self._fast_forward(engine, start)
+        return _draw(engine, stop - start)
+
+    def _engine(self, rng: np.random.Generator):
+        """New scrambled engine randomized by ``rng``."""
+        from scipy.stats import qmc
+        return getattr(qmc, self.engine_name)(self.n_dims, scramble=True, seed=rng)
+
+    def _fast_forward(self, engine, n: int) -> None:
+        """Skip the first ``n`` points of ``engine``."""
+        if n:
+            engine.fast_forward(n)
+
+class SobolSampler(_QMCSampler):
+    """Scrambled Sobol' sequence (linear matrix scrambling plus digital shift).
+
+    Balance properties hold for powers of two, so iteration and block sizes
+    that are powers of two give the best convergence.
+    """
+
+    name = "sobol"
+    engine_name = "Sobol"
+
+class HaltonSampler(_QMCSampler):
+    """Scrambled Halton sequence."""
+
+    name = "halton"
+    engine_name = "Halton"
+
+    def _fast_forward(self, engine, n: int) -> None:
+        # Points are computed from their index, so skipping is free (the
+        # generic fast_forward draws and discards them)
+        engine.num_generated += n
+
+SAMPLERS: Dict[str, Type[Sampler]] = {
+    cls.name: cls
+    for cls in (RandomSampler, LatinHypercubeSampler, SobolSampler, HaltonSampler)
+}
+
+def get_sampler(
+    name: str,
+    n_dims: int,
+    rng: Optional[np.random.Generator] = None
+) -> Sampler:
+    """Create a sampler by name.
+
+    Args:
+        name: One of "random", "lhs", "sobol" or "halton"
+        n_dims: Number of dimensions
+        rng: Random number generator used for sampling or scrambling
+
+    Returns:
+        Sampler instance
+    """
+    if name not in SAMPLERS:
+        raise ValueError(f"Unknown sampler: {name}")
+    return SAMPLERS[name](n_dims, rng)
+
+def _draw(engine, n: int) -> np.ndarray:
+    """Draw ``n`` points from a ``scipy.stats.qmc`` engine, column-major."""
+    with warnings.catch_warnings():
+        # Sobol' balance warnings for non powers of two are expected
+        warnings.simplefilter("ignore", UserWarning)
+        return np.asfortranarray(engine.random(n))
+
+def _check_out(
+    out: Optional[np.ndarray],
+    n_samples: int,
+    n_dims: int
+) -> np.ndarray:
+    """Allocate or validate an output buffer of shape (n_samples, n_dims)."""
+    if out is None:
+        return np.empty((n_samples, n_dims), order="F")
+    if out.shape != (n_samples, n_dims) or out.dtype != np.float64:
+        raise ValueError(
+            f"Output buffer must be float64 of shape {(n_samples, n_dims)}, "
+            f"got {out.dtype} of shape {out.shape}"
+        )
+    return out
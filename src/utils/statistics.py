@@ -0,0 +1,504 @@
+"""
+Streaming statistics for Monte Carlo simulation outputs.
+"""
+import math
+import numpy as np
+from typing import Dict, Optional, Tuple, Union
+
+class TDigest:
+    """Mergeable quantile sketch (merging t-digest with the k1 scale function).
+
+    Values are buffered and periodically compressed into at most about
+    ``compression`` weighted centroids. Centroids are small near the tails,
+    so extreme percentiles stay accurate while memory stays O(compression).
+    """
+
+    def __init__(self, compression: int = 200, buffer_size: int = 65536):
+        """Initialize an empty digest.
+
+        Args:
+            compression: Approximate maximum number of centroids
+            buffer_size: Number of values buffered before compressing
+        """
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+        self._buffered = 0
+
+    @property
+    def count(self) -> float:
+        """Total weight of all values added."""
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values: np.ndarray) -> "TDigest":
+        """Add a batch of values to the digest.
+
+        Args:
+            values: Values to add (flattened; NaNs are ignored)
+
+        Returns:
+            The digest itself
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._buffer.append(values)
+            self._buffered += len(values)
+            if self._buffered >= self.buffer_size:
+                self._flush()
+        return self
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        """Merge another digest into this one.
+
+        Args:
+            other: Digest built from a disjoint part of the data
+
+        Returns:
+            The digest itself
+        """
+        other._flush()
+        self._flush()
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights])
+        )
+        return self
+
+    def quantile(self, q: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Estimate quantiles of the values added so far.
+
+        Args:
+            q: Quantile(s) in [0, 1]
+
+        Returns:
+            Estimated quantile value(s)
+        """
+        self._flush()
+        if not len(self.means):
+            return np.full(np.shape(q), np.nan)[()]
+
+        total = self.weights.sum()
+        # Each centroid sits at the middle of the rank range it covers; the
+        # outermost centroids are anchored to the exact extremes.
+        centers = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.concatenate([[0.0], centers, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(np.asarray(q) * total, ranks, values)[()]
+
+    def _flush(self) -> None:
+        """Compress buffered values into the centroids."""
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._compress(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))])
+        )
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        """Merge sorted centroids whose left rank falls in the same k-unit."""
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+
+        total = weights.sum()
+        q_left = (np.cumsum(weights) - weights) / total
+        k = self.compression * (np.arcsin(2 * q_left - 1) / np.pi + 0.5)
+        cluster = np.floor(k)
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+
+        new_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / new_weights
+        self.weights = new_weights
+
+class Histogram:
+    """Streaming, mergeable histogram.
+
+    With a fixed ``range`` the bin edges never move and values outside it
+    are counted as underflow or overflow. Otherwise the bins adapt to the
+    data: their width is a power of two and their edges are multiples of
+    the width, so when new values fall outside the current range the width
+    doubles (merging neighbouring bins exactly) until they fit. The same
+    alignment lets histograms from different chunks be merged exactly.
+    """
+
+    def __init__(self, bins: int = 1024, range: Optional[Tuple[float, float]] = None):
+        """Initialize an empty histogram.
+
+        Args:
+            bins: Number of bins
+            range: Fixed (low, high) range of the bins; adaptive if omitted
+        """
+        if bins < 2:
+            raise ValueError(f"Histogram needs at least 2 bins, got {bins}")
+        if range is not None and not range[0] < range[1]:
+            raise ValueError(f"Invalid histogram range: {range}")
+        self.bins = bins
+        self.range = None if range is None else (float(range[0]), float(range[1]))
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        # Adaptive grid: bin width 2**exponent, left edge offset * width
+        self._exponent: Optional[int] = None
+        self._offset = 0
+
+    @property
+    def count(self) -> int:
+        """Number of values added, including those outside the bins."""
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    @property
+    def edges(self) -> np.ndarray:
+        """Bin edges (``bins + 1`` values)."""
+        if self.range is not None:
+            return np.linspace(self.range[0], self.range[1], self.bins + 1)
+        if self._exponent is None:
+            return np.linspace(0.0, 1.0, self.bins + 1)
+        return (self._offset + np.arange(self.bins + 1)) * math.ldexp(1.0, self._exponent)
+
+    def update(self, values: np.ndarray) -> "Histogram":
+        """Add a batch of values.
+
+        Args:
+            values: Values to add (flattened; NaNs are ignored)
+
+        Returns:
+            The histogram itself
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if self.range is not None:
+            low, high = self.range
+            below = values < low
+            above = values > high
+            self.underflow += int(below.sum())
+            self.overflow += int(above.sum())
+            inside = values[~(below | above)]
+            index = ((inside - low) * (self.bins / (high - low))).astype(np.intp)
+            # The last bin is closed, as in np.histogram
+            np.minimum(index, self.bins - 1, out=index)
+        else:
+            self.underflow += int(np.count_nonzero(values == -np.inf))
+            self.overflow += int(np.count_nonzero(values == np.inf))
+            values = values[np.isfinite(values)]
+            if not len(values):
+                return self
+            self._rescale(values.min(), values.max(), self._exponent)
+            width = math.ldexp(1.0, self._exponent)
+            # Division by a power of two is exact, so are the bin indices
+            index = np.floor(values / width).astype(np.int64)
+            index -= self._offset
+        self.counts += np.bincount(index, minlength=self.bins)
+        return self
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        """Merge a histogram built from a disjoint part of the data.
+
+        Args:
+            other: Histogram with the same number of bins and range
+
+        Returns:
+            The histogram itself
+        """
+        if other.bins != self.bins or other.range != self.range:
+            raise ValueError("Can only merge histograms with the same bins and range")
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        if self.range is not None:
+            self.counts += other.counts
+            return self
+            
+        filled = np.flatnonzero(other.counts)
+        if not len(filled):
+            return self
+        width = math.ldexp(1.0, other._exponent)
+        self._rescale(
+            (other._offset + filled[0]) * width,
+            (other._offset + filled[-1]) * width,
+            other._exponent if self._exponent is None else max(self._exponent, other._exponent)
+        )
+        positions = (other._offset + filled) >> (self._exponent - other._exponent)
+        np.add.at(self.counts, positions - self._offset, other.counts[filled])
+        return self
+
+    def rebin(self, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Coarsen the occupied bins to about ``bins`` bins for display.
+
+        Args:
+            bins: Approximate number of bins wanted
+
+        Returns:
+            Counts and edges covering the occupied range
+        """
+        filled = np.flatnonzero(self.counts)
+        if not len(filled):
+            return np.zeros(0, dtype=np.int64), self.edges[:1]
+        first, last = filled[0], filled[-1] + 1
+        factor = max(1, -(-(last - first) // bins))
+        last = first + -(-(last - first) // factor) * factor
+        counts = np.zeros(last - first, dtype=np.int64)
+        stop = min(last, self.bins)
+        counts[:stop - first] = self.counts[first:stop]
+        edges = self.edges
+        width = edges[1] - edges[0]
+        coarse_edges = edges[first] + width * factor * np.arange((last - first) // factor + 1)
+        return counts.reshape(-1, factor).sum(axis=1), coarse_edges
+
+    def _rescale(self, low: float, high: float, min_exponent: Optional[int]) -> None:
+        """Grow the adaptive grid to cover [low, high] and the filled bins."""
+        filled = np.flatnonzero(self.counts)
+        if self._exponent is not None and len(filled):
+            width = math.ldexp(1.0, self._exponent)
+            low = min(low, (self._offset + filled[0]) * width)
+            high = max(high, (self._offset + filled[-1]) * width)
+        if min_exponent is not None:
+            exponent = min_exponent
+        elif high > low:
+            exponent = math.frexp((high - low) / self.bins)[1]
+        else:
+            # A single value so far; start narrow and widen as needed
+            exponent = math.frexp(max(abs(low), 1.0))[1] - 40
+
+        width = math.ldexp(1.0, exponent)
+        while math.floor(high / width) - math.floor(low / width) >= self.bins:
+            exponent += 1
+            width *= 2
+        offset = math.floor(low / width)
+        if exponent == self._exponent and offset >= self._offset and \
+                math.floor(high / width) < self._offset + self.bins:
+            return
+
+        counts = np.zeros(self.bins, dtype=np.int64)
+        if self._exponent is not None and len(filled):
+            positions = (self._offset + filled) >> (exponent - self._exponent)
+            np.add.at(counts, positions - offset, self.counts[filled])
+        self.counts = counts
+        self._exponent = exponent
+        self._offset = offset
+
+class Reservoir:
+    """Uniform random sample of a fixed number of rows from a stream.
+
+    Algorithm R, vectorized per batch: the i-th row seen (0-based) enters
+    the sample with probability ``size / (i + 1)``, replacing a random
+    slot, so after any number of rows every row is equally likely to be in
+    the sample and memory stays bounded by ``size`` rows.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        """Initialize an empty reservoir.
+
+        Args:
+            size: Maximum number of rows kept
+            seed: Random seed
+        """
+        if size < 1:
+            raise ValueError(f"Reservoir size must be at least 1, got {size}")
+        self.size = size
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+        self._rows: Optional[np.ndarray] = None
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Sampled rows, at most ``size`` of them, in no particular order."""
+        if self._rows is None:
+            return np.empty((0, 0))
+        return self._rows[:min(self.seen, self.size)]
+
+    def update(self, rows: np.ndarray) -> "Reservoir":
+        """Offer a batch of rows (a 1-D array is one column).
+
+        Args:
+            rows: Batch of rows, all with the same number of columns
+
+        Returns:
+            The reservoir itself
+        """
+        rows = np.asarray(rows)
+        if rows.ndim == 1:
+            rows = rows[:, None]
+        if self._rows is None:
+            self._rows = np.empty((self.size, rows.shape[1]), dtype=rows.dtype)
+
+        # Fill the free slots first
+        fill = min(max(self.size - self.seen, 0), len(rows))
+        self._rows[self.seen:self.seen + fill] = rows[:fill]
+        rest = rows[fill:]
+        positions = self.seen + fill + np.arange(len(rest))
+        self.seen += len(rows)
+        if not len(rest):
+            return self
+
+        accepted = np.flatnonzero(self._rng.random(len(rest)) * (positions + 1) < self.size)
+        slots = self._rng.integers(0, self.size, len(accepted))
+        # Later rows win when they hit the same slot, as in the sequential algorithm
+        _, last = np.unique(slots[::-1], return_index=True)
+        keep = len(slots) - 1 - last
+        self._rows[slots[keep]] = rest[accepted[keep]]
+        return self
+
+def binned_kde(
+    histogram: Histogram,
+    bandwidth: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Gaussian kernel density estimate from binned counts.
+
+    The kernel is sampled on the bin grid and convolved with the counts by
+    FFT, so the cost depends on the number of bins, not of values.
+
+    Args:
+        histogram: Histogram of the values
+        bandwidth: Kernel standard deviation; Silverman's rule if omitted
+
+    Returns:
+        Grid points (bin centres, extended into the tails) and density
+    """
+    filled = np.flatnonzero(histogram.counts)
+    if not len(filled):
+        return np.zeros(0), np.zeros(0)
+    counts = histogram.counts[filled[0]:filled[-1] + 1].astype(float)
+    edges = histogram.edges
+    width = edges[1] - edges[0]
+    centers = edges[filled[0]] + width * (np.arange(len(counts)) + 0.5)
+    total = counts.sum()
+    
+    if bandwidth is None:
+        mean = np.dot(counts, centers) / total
+        std = np.sqrt(np.dot(counts, (centers - mean) ** 2) / total)
+        q25, q75 = np.interp([0.25, 0.75], np.cumsum(counts) / total, centers)
+        spread = min(std, (q75 - q25) / 1.34) or std
+        bandwidth = 0.9 * spread * total ** -0.2
+    bandwidth = max(bandwidth, width / 2)
+    
+    half = int(math.ceil(4 * bandwidth / width))
+    kernel = np.exp(-0.5 * (np.arange(-half, half + 1) * width / bandwidth) ** 2)
+    kernel /= kernel.sum() * width * total
+    size = len(counts) + len(kernel) - 1
+    fft_size = 1 << (size - 1).bit_length()
+    density = np.fft.irfft(
+        np.fft.rfft(counts, fft_size) * np.fft.rfft(kernel, fft_size),
+        fft_size
+    )[:size]
+    np.maximum(density, 0.0, out=density)
+    grid = centers[0] + width * np.arange(-half, len(counts) + half)
+    return grid, density
+
+class StatsAccumulator:
+    """Single-pass, mergeable summary statistics.
+
+    Moments are combined with the Welford/Chan parallel update, so batches
+    from different chunks or workers can be accumulated independently and
+    merged. Quantiles come from a :class:`TDigest` sketch, so the raw
+    outputs never need to be kept; with ``bins`` an adaptive
+    :class:`Histogram` is kept as well, for charts.
+    """
+
+    def __init__(self, compression: int = 200, bins: Optional[int] = None):
+        """Initialize an empty accumulator.
+
+        Args:
+            compression: Compression of the quantile sketch
+            bins: Number of bins of the histogram to keep, if any
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.digest = TDigest(compression)
+        self.histogram = None if bins is None else Histogram(bins)
+
+    def update(self, values: np.ndarray) -> "StatsAccumulator":
+        """Add a batch of values.
+
+        Args:
+            values: Values to add (flattened; NaNs are ignored)
+
+        Returns:
+            The accumulator itself
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return self
+
+        mean = values.mean()
+        m2 = np.dot(values - mean, values - mean)
+        self._combine(n, mean, m2, values.min(), values.max())
+        self.digest.update(values)
+        if self.histogram is not None:
+            self.histogram.update(values)
+        return self
+
+    def merge(self, other: "StatsAccumulator") -> "StatsAccumulator":
+        """Merge an accumulator built from a disjoint part of the data.
+
+        Args:
+            other: Accumulator to merge
+
+        Returns:
+            The accumulator itself
+        """
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.digest.merge(other.digest)
+            if self.histogram is not None and other.histogram is not None:
+                self.histogram.merge(other.histogram)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Population variance (matches ``np.var``)."""
+        return self.m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (matches ``np.std``)."""
+        return float(np.sqrt(self.variance))
+
+    def percentile(self, p: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Estimate percentile(s) in [0, 100]."""
+        return self.digest.quantile(np.asarray(p) / 100)
+
+    def summary(self) -> Dict[str, float]:
+        """Summary statistics in the order written to Excel."""
+        return {
+            "Mean": float(self.mean) if self.count else np.nan,
+            "Std Dev": self.std,
+            "Min": float(self.min) if self.count else np.nan,
+            "Max": float(self.max) if self.count else np.nan,
+            "5th Percentile": float(self.percentile(5)),
+            "95th Percentile": float(self.percentile(95)),
+        }
+
+    def _combine(
+        self,
+        n: int,
+        mean: float,
+        m2: float,
+        low: float,
+        high: float
+    ) -> None:
+        """Chan et al. pairwise update of count, mean and M2."""
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
@@ -0,0 +1 @@
+from .charts import create_histogram, create_tornado_chart, create_scatter_matrix
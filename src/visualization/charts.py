@@ -3,38 +3,69 @@ Visualization functions for Monte Carlo simulation results.
 """
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import Dict, List, Optional, Tuple
-import seaborn as sns
+from typing import Dict, List, Optional, Tuple, Union
+from ..core.backends import open_executor
+from ..core.sensitivity import SensitivityResult, analyze_sensitivity
+from ..utils.statistics import Histogram, Reservoir, StatsAccumulator, binned_kde
+
+# Fine bins behind the displayed histogram and density of raw results
+_KDE_BINS = 2048
+
+# Worker threads binning scatter matrix panels
+_MAX_PANEL_WORKERS = 8
+
+# Rows offered to the point sample at a time
+_SAMPLE_BLOCK = 65536
 
 def create_histogram(
-    data: np.ndarray,
+    data: Union[np.ndarray, StatsAccumulator],
     title: str = "Simulation Results",
     bins: int = 50,
-    figsize: Tuple[int, int] = (10, 6)
+    figsize: Tuple[int, int] = (10, 6),
+    kde: bool = True
 ) -> plt.Figure:
     """Create a histogram of simulation results.
     
+    The chart is drawn from binned counts: a kernel density estimate is
+    convolved on the bin grid and percentiles come from the accumulator,
+    so rendering time does not depend on the number of iterations.
+    
     Args:
-        data: Simulation results
+        data: Simulation results, or a :class:`StatsAccumulator` that kept
+            a histogram (``bins`` set) during the simulation
         title: Plot title
         bins: Number of histogram bins
         figsize: Figure size
+        kde: Whether to overlay a kernel density estimate
         
     Returns:
         Matplotlib figure
     """
+    if isinstance(data, StatsAccumulator):
+        if data.histogram is None:
+            raise ValueError("Accumulator has no histogram; create it with bins set")
+        histogram = data.histogram
+        values = data.percentile([5, 50, 95])
+    else:
+        data = np.asarray(data, dtype=float).ravel()
+        histogram = Histogram(_KDE_BINS).update(data)
+        # One selection pass for all three percentiles
+        values = np.nanpercentile(data, [5, 50, 95])
+        
     fig, ax = plt.subplots(figsize=figsize)
     
-    # Plot histogram with kernel density estimate
-    sns.histplot(data, bins=bins, kde=True, ax=ax)
+    counts, edges = histogram.rebin(bins)
+    ax.stairs(counts, edges, fill=True, alpha=0.6)
+    if kde and len(counts):
+        # Density scaled to the counts of the displayed bins
+        grid, density = binned_kde(histogram)
+        ax.plot(grid, density * counts.sum() * (edges[1] - edges[0]))
     
     # Add percentile lines
-    percentiles = [5, 50, 95]
     colors = ['r', 'g', 'r']
     labels = ['5th', 'Median', '95th']
     
-    for p, c, l in zip(percentiles, colors, labels):
-        val = np.percentile(data, p)
+    for val, c, l in zip(values, colors, labels):
         ax.axvline(val, color=c, linestyle='--', label=f'{l}: {val:.2f}')
     
     ax.set_title(title)
@@ -45,58 +76,55 @@ def create_histogram(
     return fig
 
 def create_tornado_chart(
-    results: np.ndarray,
-    inputs: Dict[str, callable],
+    results: Union[np.ndarray, SensitivityResult],
+    inputs: Optional[Dict[str, np.ndarray]] = None,
     figsize: Tuple[int, int] = (10, 6)
 ) -> plt.Figure:
     """Create a tornado chart for sensitivity analysis.
     
+    Each bar spans the mean output over the iterations in which an input
+    is in its lowest and in its highest decile, relative to the overall
+    mean, with the inputs ordered by the width of that swing.
+    
     Args:
-        results: Simulation results
-        inputs: Dictionary of input distributions
+        results: Simulation results, or a finished
+            :func:`analyze_sensitivity` result
+        inputs: Input samples by name; defaults to those kept on the
+            results (``SimulationConfig(keep_inputs=True)``)
         figsize: Figure size
         
     Returns:
         Matplotlib figure
     """
-    # Calculate base case (mean)
-    base = np.mean(results)
-    
-    # Calculate impact of each variable
-    impacts = []
-    
-    for name in inputs.keys():
-        # Get percentiles for this input
-        low_val = np.percentile(results[results[name] < np.median(results[name])], 50)
-        high_val = np.percentile(results[results[name] > np.median(results[name])], 50)
-        
-        impacts.append({
-            'name': name,
-            'low': low_val - base,
-            'high': high_val - base
-        })
-    
-    # Sort by total impact
-    impacts.sort(key=lambda x: abs(x['high'] - x['low']), reverse=True)
+    if isinstance(results, SensitivityResult):
+        analysis = results
+    else:
+        if inputs is None:
+            inputs = getattr(results, "inputs", None)
+        if not inputs:
+            raise ValueError("Tornado chart needs the input samples; run with keep_inputs=True")
+        analysis = analyze_sensitivity(inputs, results)
+    impacts = analysis.tornado()
     
     # Create tornado chart
     fig, ax = plt.subplots(figsize=figsize)
     
     y_pos = np.arange(len(impacts))
     
-    # Plot bars
-    for i, impact in enumerate(impacts):
+    # Plot bars, largest swing on top
+    for i, (name, low, high) in enumerate(impacts):
         ax.barh(
             y_pos[i],
-            impact['high'] - impact['low'],
-            left=min(impact['low'], impact['high']),
+            high - low,
+            left=low - analysis.base,
             height=0.8,
             color='lightblue'
         )
     
     # Customize plot
     ax.set_yticks(y_pos)
-    ax.set_yticklabels([i['name'] for i in impacts])
+    ax.set_yticklabels([name for name, _, _ in impacts])
+    ax.invert_yaxis()
     ax.axvline(0, color='black', linestyle='-', linewidth=0.5)
     
     ax.set_title("Sensitivity Analysis")
@@ -106,23 +134,108 @@ def create_tornado_chart(
 
 def create_scatter_matrix(
     data: Dict[str, np.ndarray],
-    figsize: Optional[Tuple[int, int]] = None
+    figsize: Optional[Tuple[int, int]] = None,
+    max_points: int = 5000,
+    density_threshold: int = 100000,
+    bins: int = 40,
+    seed: Optional[int] = 0
 ) -> plt.Figure:
     """Create a scatter matrix to visualize correlations.
     
+    The diagonal shows each variable's histogram and the upper triangle
+    the correlation coefficients, from a single ``corrcoef`` over all
+    variables. Below the diagonal, up to ``max_points`` iterations drawn
+    by reservoir sampling are scattered; above ``density_threshold``
+    iterations the panels instead show binned 2-D densities of all
+    iterations, computed on worker threads.
+    
     Args:
         data: Dictionary of variable names and their values
         figsize: Optional figure size
+        max_points: Maximum number of points per scatter panel
+        density_threshold: Iteration count above which densities are drawn
+        bins: Bins per axis of the histograms and densities
+        seed: Seed of the point sample
         
     Returns:
         Matplotlib figure
     """
-    df = pd.DataFrame(data)
+    names = list(data)
+    columns = [np.asarray(data[name], dtype=float).ravel() for name in names]
+    n = len(columns[0])
+    if any(len(column) != n for column in columns):
+        raise ValueError("All variables must have the same number of values")
+    d = len(names)
     
     if figsize is None:
-        figsize = (2 * len(data), 2 * len(data))
-    
-    fig = sns.pairplot(df, diag_kind="kde")
-    fig.fig.set_size_inches(figsize)
-    
-    return fig.fig
+        figsize = (2 * d, 2 * d)
+        
+    correlation = np.corrcoef(np.vstack(columns)) if n > 1 else np.eye(d)
+    edges = [_edges(column, bins) for column in columns]
+    with open_executor("thread", min(d * d, _MAX_PANEL_WORKERS)) as executor:
+        indices = list(executor.map(_bin_indices, columns, edges))
+        diagonal = [np.bincount(index, minlength=bins) for index in indices]
+        if n > density_threshold:
+            pairs = [(i, j) for i in range(d) for j in range(i)]
+            densities = dict(zip(pairs, executor.map(
+                lambda pair: _pair_counts(indices[pair[0]], indices[pair[1]], bins),
+                pairs
+            )))
+        else:
+            densities = None
+            reservoir = Reservoir(max_points, seed)
+            for start in range(0, n, _SAMPLE_BLOCK):
+                reservoir.update(np.column_stack([c[start:start + _SAMPLE_BLOCK] for c in columns]))
+            points = reservoir.rows
+            
+    fig, axes = plt.subplots(d, d, figsize=figsize, squeeze=False)
+    for i in range(d):
+        for j in range(d):
+            ax = axes[i, j]
+            if i == j:
+                ax.stairs(diagonal[i], edges[i], fill=True, alpha=0.6)
+            elif i < j:
+                r = correlation[i, j]
+                ax.text(
+                    0.5, 0.5, f"{r:.2f}",
+                    ha="center", va="center", transform=ax.transAxes,
+                    fontsize=8 + 10 * abs(r) if np.isfinite(r) else 8
+                )
+                ax.set_xticks([])
+                ax.set_yticks([])
+            elif densities is not None:
+                ax.pcolormesh(edges[j], edges[i], densities[i, j], cmap="Blues")
+            else:
+                ax.scatter(points[:, j], points[:, i], s=2, alpha=0.5)
+            # Tick labels only along the outer edges, as in a pairs plot
+            if i == d - 1:
+                ax.set_xlabel(names[j])
+            else:
+                ax.tick_params(labelbottom=False)
+            if j == 0:
+                ax.set_ylabel(names[i])
+            else:
+                ax.tick_params(labelleft=False)
+                
+    # A fixed layout; tight_layout measures every tick label of every panel
+    fig.subplots_adjust(left=0.08, bottom=0.08, right=0.98, top=0.98, wspace=0.08, hspace=0.08)
+    return fig
+
+def _edges(values: np.ndarray, bins: int) -> np.ndarray:
+    """Equal-width bin edges over the finite range of ``values``."""
+    finite = values[np.isfinite(values)]
+    low, high = (finite.min(), finite.max()) if len(finite) else (0.0, 1.0)
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+def _bin_indices(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Bin of each value (non-finite values go to bin 0)."""
+    bins = len(edges) - 1
+    scaled = (values - edges[0]) * (bins / (edges[-1] - edges[0]))
+    index = np.nan_to_num(scaled, nan=0.0, posinf=0.0, neginf=0.0).astype(np.intp)
+    return np.clip(index, 0, bins - 1, out=index)
+
+def _pair_counts(rows: np.ndarray, cols: np.ndarray, bins: int) -> np.ndarray:
+    """2-D histogram of two binned variables, rows by columns."""
+    return np.bincount(rows * bins + cols, minlength=bins * bins).reshape(bins, bins)
@@ -0,0 +1,41 @@
+"""
+Tests for the benchmark runner.
+"""
+from benchmarks import runner
+
+class Counter:
+    params = [[1, 2], ["a"]]
+    param_names = ["n", "name"]
+
+    def setup(self, n, name):
+        self.calls = 0
+
+    def time_count(self, n, name):
+        self.calls += n
+
+    def items(self, n, name):
+        return n
+
+def test_time_case():
+    """Parameter combinations are labelled and timed with a throughput."""
+    combinations = list(runner._combinations(Counter))
+    assert combinations == [(1, "a"), (2, "a")]
+    assert runner._label(Counter, combinations[1]) == "(n=2, name='a')"
+
+    case = runner.Case("Counter.time_count", Counter, "time_count", (2, "a"))
+    result = runner.time_case(case, min_time=0.0, min_repeat=3, max_repeat=5)
+    assert result["repeat"] == 3
+    assert result["min"] <= result["median"]
+    assert result["items_per_second"] > 0
+
+def test_compare():
+    """Cases beyond the threshold are flagged as slower or faster."""
+    base = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}, "c": {"median": 1.0}}}
+    head = {"results": {"a": {"median": 1.5}, "b": {"median": 0.5}, "c": {"median": 1.05}, "d": {"median": 1.0}}}
+    changes = {name: change for name, *_, change in runner.compare(base, head, 1.1)}
+    assert changes == {"a": "slower", "b": "faster", "c": ""}
+
+def test_discover():
+    """Every benchmark module is found, filtered by name."""
+    cases = runner.discover("Ppf")
+    assert cases and all("Ppf" in case.name for case in cases)
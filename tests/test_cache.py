@@ -0,0 +1,136 @@
+"""
+Tests for the disk cache of simulation results.
+"""
+import numpy as np
+import pytest
+from src.core.cache import ResultCache
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import Normal, Uniform
+
+DISTS = {"a": Normal(10, 2), "b": Uniform(0, 5)}
+
+def _engine(iterations, **config):
+    return MonteCarloEngine(SimulationConfig(iterations=iterations, seed=5, chunk_size=512, **config))
+
+def test_cache_hit(tmp_path):
+    """A repeated run is served memory-mapped with the stored summary."""
+    cache = ResultCache(str(tmp_path))
+    first, summary = cache.run(_engine(3000, keep_inputs=True), "a * b", DISTS)
+    again, cached = cache.run(_engine(3000, keep_inputs=True), "a * b", DISTS)
+    
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert cached == summary
+    assert isinstance(again.base, np.memmap) or isinstance(again.base.base, np.memmap)
+    np.testing.assert_array_equal(again, first)
+    np.testing.assert_array_equal(again.inputs["b"], first.inputs["b"])
+    
+    # Any change to the setup is a different entry
+    cache.run(_engine(3000, keep_inputs=True), "a * b + 1", DISTS)
+    cache.run(_engine(3000, keep_inputs=True), "a * b", {"a": Normal(10, 3), "b": Uniform(0, 5)})
+    assert cache.misses == 3
+
+def test_cache_extends_runs(tmp_path):
+    """More iterations extend the cached run; fewer are taken from it."""
+    cache = ResultCache(str(tmp_path))
+    cache.run(_engine(1800), "a + b", DISTS)
+    longer, _ = cache.run(_engine(5000), "a + b", DISTS)
+    prefix, summary = cache.run(_engine(1024), "a + b", DISTS)
+    shorter, _ = cache.run(_engine(1000), "a + b", DISTS)
+    
+    assert (cache.misses, cache.extended, cache.hits) == (1, 2, 1)
+    np.testing.assert_array_equal(longer, _engine(5000).run_simulation("a + b", DISTS))
+    np.testing.assert_array_equal(prefix, longer[:1024])
+    np.testing.assert_array_equal(shorter, _engine(1000).run_simulation("a + b", DISTS))
+    assert summary["Max"] == longer[:1024].max()
+    # The replaced arrays were removed
+    assert len(list(tmp_path.glob("*.npy"))) == 1
+    
+    # A Latin Hypercube depends on the iteration count, so it is not extended
+    cache.run(_engine(1800), "a + b", DISTS, use_lhs=True)
+    cache.run(_engine(5000), "a + b", DISTS, use_lhs=True)
+    assert cache.misses == 3
+
+def test_cache_eviction(tmp_path):
+    """Least recently used entries go once the size limit is exceeded."""
+    cache = ResultCache(str(tmp_path), max_bytes=3 * 8 * 1000 + 500)
+    for offset in range(3):
+        cache.run(_engine(1000), f"a + {offset}", DISTS)
+    cache.run(_engine(1000), "a + 0", DISTS)  # used again, so kept
+    cache.run(_engine(1000), "a + 3", DISTS)
+    
+    assert cache.size <= cache.max_bytes
+    cache.run(_engine(1000), "a + 0", DISTS)
+    cache.run(_engine(1000), "a + 1", DISTS)
+    assert (cache.hits, cache.misses) == (2, 5)
+    
+    cache.clear()
+    assert cache.size == 0 and not list(tmp_path.iterdir())
+    
+    # Unseeded runs are never stored
+    cache.run(MonteCarloEngine(SimulationConfig(iterations=100)), "a", DISTS)
+    assert not list(tmp_path.iterdir())
+
+SCALE = 2.0
+
+def _scaled(a, b):
+    return SCALE * a + b
+
+def _closure(weights):
+    def model(a, b):
+        return a * weights[0] + b
+    return model
+
+class _Weights:
+    def __getitem__(self, index):
+        return 1.0
+
+def test_function_identity(tmp_path, monkeypatch):
+    """Function keys cover the globals they read and whole closure arrays."""
+    cache = ResultCache(str(tmp_path))
+    engine = _engine(1000)
+    key = cache.key(engine, _scaled, DISTS)
+    assert cache.key(engine, _scaled, DISTS) == key
+    monkeypatch.setattr(__import__(__name__), "SCALE", 3.0)
+    assert cache.key(engine, _scaled, DISTS) != key
+    
+    # Equal reprs, different contents
+    weights, changed = np.zeros(2000), np.zeros(2000)
+    changed[1000] = 1
+    assert repr(weights) == repr(changed)
+    assert cache.key(engine, _closure(weights), DISTS) != cache.key(engine, _closure(changed), DISTS)
+    
+    # Models that hold arbitrary objects are not cached without a key
+    opaque = _closure(_Weights())
+    with pytest.raises(ValueError, match="model_key"):
+        cache.key(engine, opaque, DISTS)
+    cache.run(_engine(1000), opaque, DISTS)
+    assert cache.misses == 0 and not list(tmp_path.iterdir())
+    cache.run(_engine(1000), opaque, DISTS, model_key="opaque")
+    assert cache.misses == 1
+
+def test_reused_engine_is_not_cached(tmp_path):
+    """An engine's second run draws new streams, so the cache is bypassed."""
+    cache = ResultCache(str(tmp_path))
+    engine = _engine(1000)
+    first, _ = cache.run(engine, "a + b", DISTS)
+    second, _ = cache.run(engine, "a + b", DISTS)
+    
+    assert (cache.misses, cache.hits) == (1, 0)
+    assert not np.array_equal(second, first)
+    reference = _engine(1000)
+    reference.run_simulation("a + b", DISTS)
+    np.testing.assert_array_equal(second, reference.run_simulation("a + b", DISTS))
+
+def test_numpy_seed_and_run_stats(tmp_path):
+    """numpy integer seeds key like ints; only simulated runs carry timing."""
+    cache = ResultCache(str(tmp_path))
+    engine = MonteCarloEngine(SimulationConfig(iterations=1000, seed=np.int64(5), chunk_size=512))
+    assert cache.key(engine, "a + b", DISTS) == cache.key(_engine(1000), "a + b", DISTS)
+    
+    first, _ = cache.run(engine, "a + b", DISTS)
+    assert first.run_stats is engine.last_stats and first.run_stats.iterations == 1000
+    
+    hit_engine = _engine(1000)
+    again, _ = cache.run(hit_engine, "a + b", DISTS)
+    assert cache.hits == 1
+    assert again.run_stats is None and hit_engine.last_stats is None
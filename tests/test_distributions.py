@@ -0,0 +1,113 @@
+"""
+Tests for probability distributions.
+"""
+import pickle
+import numpy as np
+import pytest
+from scipy import stats
+from src.distributions import get_distribution, fit_distribution
+from src.distributions.distributions import FIT_FAMILIES, fit_candidates
+
+U = np.concatenate([
+    np.random.default_rng(42).random(100000),
+    [1e-12, 1e-7, 0.5, 1 - 1e-7, 1 - 1e-12]
+])
+
+CASES = [
+    ("normal", [1.0, 2.0], stats.norm(loc=1.0, scale=2.0), 1e-12),
+    ("lognormal", [0.1, 0.5], stats.lognorm(s=0.5, scale=np.exp(0.1)), 1e-12),
+    ("uniform", [-1.0, 3.0], stats.uniform(loc=-1.0, scale=4.0), 1e-12),
+    ("triangular", [1.0, 2.0, 5.0], stats.triang(c=0.25, loc=1.0, scale=4.0), 1e-12),
+    ("weibull", [1.5, 2.0], stats.weibull_min(1.5, scale=2.0), 1e-12),
+    ("gamma", [0.3, 2.0], stats.gamma(0.3, scale=2.0), 1e-8),
+    ("gamma", [2.5, 2.0], stats.gamma(2.5, scale=2.0), 1e-8),
+    ("beta", [2.0, 5.0, 1.0, 3.0], stats.beta(2.0, 5.0, loc=1.0, scale=2.0), 1e-8),
+    ("beta", [0.2, 3.0, 0.0, 1.0], stats.beta(0.2, 3.0), 1e-8),
+]
+
+@pytest.mark.parametrize("dist_type,params,reference,tol", CASES)
+def test_ppf_matches_scipy(dist_type, params, reference, tol):
+    """Test every inverse CDF agrees with scipy.stats to within tolerance."""
+    dist = get_distribution(dist_type, params)
+    expected = reference.ppf(U)
+    
+    np.testing.assert_allclose(dist(U), expected, rtol=tol, atol=tol)
+    assert dist(0.3) == pytest.approx(reference.ppf(0.3), rel=tol, abs=tol)
+
+@pytest.mark.parametrize("dist_type,params,reference,tol", CASES)
+def test_ppf_out_buffer(dist_type, params, reference, tol):
+    """Test inverse CDFs write into a caller-supplied buffer."""
+    dist = get_distribution(dist_type, params)
+    out = np.empty_like(U)
+    
+    result = dist(U, out=out)
+    
+    assert result is out
+    np.testing.assert_array_equal(out, dist(U))
+
+@pytest.mark.parametrize("dist_type,params,reference,tol", CASES)
+def test_distribution_moments(dist_type, params, reference, tol):
+    """Test precomputed moments and support match scipy.stats."""
+    dist = get_distribution(dist_type, params)
+    
+    assert dist.mean == pytest.approx(reference.mean(), rel=1e-10)
+    assert dist.var == pytest.approx(reference.var(), rel=1e-10)
+    assert dist.support == pytest.approx(reference.support())
+
+def test_custom_distribution_moments():
+    """Test moments of a piecewise-linear empirical distribution."""
+    dist = get_distribution("custom", [[0.0, 1.0, 4.0], [0.1, 0.5, 0.9]])
+    samples = dist(np.linspace(0, 1, 2000001))
+    
+    assert dist.mean == pytest.approx(np.mean(samples), abs=1e-6)
+    assert dist.var == pytest.approx(np.var(samples), abs=1e-5)
+
+@pytest.mark.parametrize("dist_type,params,reference,tol", CASES)
+def test_distribution_pickle_and_hash(dist_type, params, reference, tol):
+    """Test distributions round-trip through pickle and hash by parameters."""
+    dist = get_distribution(dist_type, params)
+    clone = pickle.loads(pickle.dumps(dist))
+    
+    assert clone == dist
+    assert hash(clone) == hash(get_distribution(dist_type, params))
+    np.testing.assert_array_equal(clone(U), dist(U))
+    
+    with pytest.raises(AttributeError):
+        dist.extra = 1
+
+def test_distribution_sample_in_place():
+    """Test sampling into a caller-supplied buffer."""
+    dist = get_distribution("gamma", [2.0, 3.0])
+    out = np.empty(1000)
+    
+    result = dist.sample(np.random.default_rng(1), 1000, out=out)
+    expected = dist(np.random.default_rng(1).random(1000))
+    
+    assert result is out
+    np.testing.assert_array_equal(out, expected)
+
+@pytest.mark.parametrize("dist_type,sampler", [
+    ("normal", lambda rng: rng.normal(3.0, 2.0, 20000)),
+    ("gamma", lambda rng: rng.gamma(2.0, 2.0, 20000) + 1.0),
+    ("weibull", lambda rng: 3.0 * rng.weibull(1.5, 20000) + 1.0),
+])
+def test_fit_distribution_auto(dist_type, sampler):
+    """Test automatic fitting selects the generating family."""
+    data = sampler(np.random.default_rng(42))
+    
+    best, params = fit_distribution(data)
+    report = fit_candidates(data, criterion="bic")
+    
+    assert best == dist_type
+    assert report.best.dist_type == dist_type
+    assert [r.bic for r in report.candidates] == sorted(r.bic for r in report.candidates)
+    assert all(r.seconds > 0 and r.error is None for r in report.candidates)
+
+def test_fit_matches_scipy_likelihood():
+    """Test subsample-then-refine fits reach scipy's full-data likelihood."""
+    data = np.random.default_rng(42).lognormal(1.0, 0.5, 50000)
+    
+    for result in fit_candidates(data, subsample_size=2000).candidates:
+        family = FIT_FAMILIES[result.dist_type]
+        reference = -family.nnlf(family.fit(data), data)
+        assert result.log_likelihood >= reference - 1e-3
@@ -0,0 +1,73 @@
+"""
+Tests for block workbook I/O against the in-memory workbook.
+"""
+import numpy as np
+import pytest
+from src.excel.addin import MonteCarloAddin
+from src.excel.io import MemoryIO, parse_address
+
+def test_parse_address():
+    assert parse_address("A1") == (None, 1, 1, 1, 1)
+    assert parse_address("Data!$B$2:D10") == ("Data", 2, 2, 10, 4)
+    assert parse_address("'My ''Sheet'''!C3") == ("My 'Sheet'", 3, 3, 3, 3)
+    with pytest.raises(ValueError):
+        parse_address("A:C")
+
+def test_block_round_trip():
+    io = MemoryIO({"Inputs": [["x", "Normal", 0, 1], ["y", "Uniform", 2, 3]]})
+    assert io.read("Inputs!A1:D2") == [["x", "Normal", 0, 1], ["y", "Uniform", 2, 3]]
+    assert io.read("B2:E2") == [["Uniform", 2, 3, None]]
+    
+    values = np.arange(12.0).reshape(4, 3)
+    values[1, 2] = np.nan
+    io.write("C5", values)
+    np.testing.assert_array_equal(io.read_array("C5:E8"), values)
+    assert io.read("E6")[0][0] is None
+    
+    # Mixed rows keep their labels and numbers
+    io.write("A1", [["Mean", 1.5], ["Std", 2]])
+    assert io.read("A1:B2") == [["Mean", 1.5], ["Std", 2]]
+
+def test_large_writes_are_chunked():
+    io = MemoryIO()
+    io.max_cells = 1000
+    values = np.random.default_rng(0).random((2500, 4))
+    io.write("Sheet1!B2", values)
+    
+    # 250 rows of 4 columns per call
+    assert io.calls["write"] == 10
+    np.testing.assert_array_equal(io.read_array("B2:E2501"), values)
+    assert io.calls["read"] == 1
+    assert io.screen_updating and io.calculation == "automatic"
+
+def test_table_and_batch():
+    io = MemoryIO()
+    io.ensure_sheet("Dump")
+    with io.batch():
+        assert not io.screen_updating and io.calculation == "manual"
+        io.write_table("Dump!A1", np.ones((3, 2)), ["a", "b"])
+        assert io.calculation == "manual"
+    assert io.screen_updating and io.calculation == "automatic"
+    assert io.read("Dump!A1:B4") == [["a", "b"]] + [[1.0, 1.0]] * 3
+    
+    io.ensure_sheet("Dump")
+    assert io.read("Dump!A1") == [[None]]
+
+def test_references():
+    """Defined names and whole columns or rows resolve like Excel ranges."""
+    io = MemoryIO(
+        {"Inputs": [["x", "Normal", 0, 1], ["y", "Uniform", 2, 3]], "Out": [[None]]},
+        names={"Params": "Inputs!$A$1:$D$2", "Report": "Out!B2"}
+    )
+    assert io.read("params") == [["x", "Normal", 0, 1], ["y", "Uniform", 2, 3]]
+    assert io.read("Inputs!B:B") == [["Normal"], ["Uniform"]]
+    assert io.read("Inputs!2:2") == [["y", "Uniform", 2, 3]]
+    
+    io.write("Report", [["Mean", 1.5]])
+    assert io.read("Out!B2:C2") == [["Mean", 1.5]]
+    with pytest.raises(ValueError, match="Invalid range address"):
+        io.read("Missing")
+    
+    # The add-in takes names as its ranges
+    MonteCarloAddin(io=io).run_simulation("Params", "Report", num_iterations=100, seed=1)
+    assert io.read("Out!B2:B3") == [["Statistic"], ["Mean"]]
@@ -0,0 +1,82 @@
+"""
+Tests for compiled model expressions.
+"""
+import ast
+import pickle
+import numpy as np
+import pytest
+from src.core.expressions import _Translator, _numexpr, compile_model
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import Normal, Uniform
+
+def test_expression_matches_numpy():
+    """Test formulas evaluate like the equivalent numpy code, blockwise."""
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=10000), rng.random(10000)
+    
+    model = compile_model("IF(x > 0, x^2, -x) * LN(1 + y) - MAX(x, y, 0.5) + abs(x) % 3", "numpy")
+    expected = (
+        np.where(x > 0, x ** 2, -x) * np.log(1 + y)
+        - np.maximum(np.maximum(x, y), 0.5) + np.abs(x) % 3
+    )
+    
+    np.testing.assert_allclose(model(x=x, y=y, unused=y), expected)
+    assert model.variables == ("x", "y")
+    assert compile_model("x + 1", "numpy")(x=2.0) == 3.0
+
+def test_expression_cache_and_pickle():
+    """Test compilations are cached by text and pickle as their formula."""
+    model = compile_model("revenue*(1-cost_ratio)-capex")
+    
+    assert compile_model("revenue*(1-cost_ratio)-capex") is model
+    assert pickle.loads(pickle.dumps(model)) is model
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os')",
+    "x.real",
+    "x[0]",
+    "lambda: 1",
+    "SUMPRODUCT(x)",
+    "IF(x, 1)",
+    "x +",
+])
+def test_expression_rejects_invalid(expression):
+    """Test anything outside the restricted syntax is rejected."""
+    with pytest.raises(ValueError):
+        compile_model(expression)
+
+def test_expression_reductions():
+    """Test MIN/MAX of many arguments stay small for numexpr, and constants broadcast."""
+    names = [f"x{i}" for i in range(15)]
+    expression = f"MAX({', '.join(names)}) - MIN({', '.join(names)}, 0)"
+    translator = _Translator()
+    source = translator.translate(ast.parse(expression, mode="eval").body, numexpr_syntax=True)
+    assert source == "(_reduced0 - _reduced1)"
+    assert [(ufunc, len(args)) for _, ufunc, args in translator.reductions] == [("maximum", 15), ("minimum", 16)]
+    
+    rng = np.random.default_rng(0)
+    inputs = {name: rng.normal(size=1000) for name in names}
+    values = np.array(list(inputs.values()))
+    expected = values.max(axis=0) - np.minimum(values.min(axis=0), 0)
+    evaluators = ["numpy"] + (["numexpr"] if _numexpr() is not None else [])
+    for evaluator in evaluators:
+        np.testing.assert_allclose(compile_model(expression, evaluator)(**inputs), expected)
+        np.testing.assert_array_equal(compile_model("2*3", evaluator)(x=np.zeros(4)), np.full(4, 6.0))
+    
+    results = MonteCarloEngine(SimulationConfig(iterations=100, seed=1)).run_simulation("2*3", {"x": Normal(0, 1)})
+    np.testing.assert_array_equal(results, np.full(100, 6.0))
+
+def test_expression_model_in_engine():
+    """Test the engine accepts a formula in place of a model function."""
+    config = SimulationConfig(iterations=20000, seed=1, backend="process", num_threads=2)
+    
+    results = MonteCarloEngine(config).run_simulation(
+        "revenue*(1-cost_ratio)-capex",
+        {
+            'revenue': Normal(100, 10),
+            'cost_ratio': Uniform(0.2, 0.4),
+            'capex': Normal(20, 2)
+        }
+    )
+    
+    assert abs(np.mean(results) - 50) < 0.3
@@ -0,0 +1,116 @@
+"""
+Tests for vectorized workbook formula evaluation.
+"""
+import pickle
+import numpy as np
+import pytest
+from openpyxl import Workbook
+from openpyxl.workbook.defined_name import DefinedName
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import Normal, Uniform
+from src.excel.formulas import WorkbookModel
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    """Small project model with a cross-sheet lookup table."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Model"
+    ws["B1"] = 100  # revenue
+    ws["B2"] = 0.3  # cost ratio
+    ws["B3"] = 20  # capex
+    ws["B4"] = "=B1*(1-B2)-B3"
+    ws["B5"] = "=IF(B4>0,B4*(1-Rates!B1),B4)"
+    ws["B6"] = "=NPV(0.1,B5,B5,B5)+VLOOKUP(B1,Rates!A3:B5,2)-MAX(B1,B3)+SUM(B1:B3)"
+    ws["B7"] = "=-B2^2+10%+ROUND(2.5,0)+INDEX(Rates!B3:B5,MATCH(Capex,Rates!A3:A5))"
+    ws["C1"] = "=C2+1"
+    ws["C2"] = "=C1*2"
+    ws["C3"] = "=OFFSET(B1,1,1)"
+    
+    rates = wb.create_sheet("Rates")
+    rates["B1"] = 0.25
+    for row, (key, value) in enumerate([(0, 1), (50, 2), (110, 3)], start=3):
+        rates.cell(row=row, column=1, value=key)
+        rates.cell(row=row, column=2, value=value)
+    wb.defined_names["Capex"] = DefinedName("Capex", attr_text="Model!$B$3")
+    
+    path = tmp_path / "model.xlsx"
+    wb.save(path)
+    return str(path)
+
+def _reference(revenue, cost_ratio, capex):
+    """The workbook model written out in numpy."""
+    profit = revenue * (1 - cost_ratio) - capex
+    taxed = np.where(profit > 0, profit * 0.75, profit)
+    npv = sum(taxed / 1.1 ** i for i in (1, 2, 3))
+    tier = np.array([1, 2, 3])[np.searchsorted([0, 50, 110], revenue, side="right") - 1]
+    capex_tier = np.array([1, 2, 3])[np.searchsorted([0, 50, 110], capex, side="right") - 1]
+    return np.column_stack([
+        npv + tier - np.maximum(revenue, capex) + revenue + cost_ratio + capex,
+        cost_ratio ** 2 + 0.1 + 3 + capex_tier
+    ])
+
+def test_workbook_model(workbook_path):
+    """Test the formula graph evaluates like the equivalent numpy code."""
+    model = WorkbookModel.from_file(workbook_path, ["B1", "Model!B2", "Capex"], ["B6", "B7"])
+    rng = np.random.default_rng(0)
+    revenue = rng.uniform(0, 200, 1000)
+    cost_ratio = rng.uniform(0, 1, 1000)
+    capex = rng.uniform(0, 150, 1000)
+    
+    results = model(B1=revenue, **{"Model!B2": cost_ratio}, Capex=capex)
+    
+    assert model.cells == ["Model!B4", "Model!B5", "Model!B6", "Model!B7"]
+    np.testing.assert_allclose(results, _reference(revenue, cost_ratio, capex))
+
+def test_workbook_model_errors(workbook_path):
+    """Test circular references and unsupported functions are reported."""
+    with pytest.raises(ValueError, match="Circular"):
+        WorkbookModel.from_file(workbook_path, ["B1"], "C1")
+    with pytest.raises(ValueError, match="OFFSET"):
+        WorkbookModel.from_file(workbook_path, ["B1"], "C3")
+    with pytest.raises(ValueError, match="defined name"):
+        WorkbookModel.from_file(workbook_path, ["Revenue"], "B6")
+
+def test_workbook_model_in_engine(workbook_path):
+    """Test a workbook model runs chunkwise in worker processes."""
+    model = WorkbookModel.from_file(workbook_path, ["B1", "B2", "B3"], "B4")
+    config = SimulationConfig(iterations=20000, seed=1, backend="process", num_threads=2)
+    
+    results = MonteCarloEngine(config).run_simulation(
+        model,
+        {'B1': Normal(100, 10), 'B2': Uniform(0.2, 0.4), 'B3': Normal(20, 2)}
+    )
+    
+    assert results.shape == (20000,)
+    assert abs(np.mean(results) - 50) < 0.3
+
+def test_blank_cells(tmp_path):
+    """Blanks are skipped by range aggregates and are zero when referenced directly."""
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = 1
+    ws["A3"] = 3
+    formulas = {
+        "B1": "=AVERAGE(A1:A3)",
+        "B2": "=MIN(A1:A3)",
+        "B3": "=MAX(A1:A3)-A1",
+        "B4": "=SUM(A1:A3)+PRODUCT(A1:A3)",
+        "B5": "=NPV(0,A1:A3)",
+        "B6": "=A2+A1",
+        "B7": "=AVERAGE(A2:A2)+A2",
+        "B8": "=MIN(A2:A2)+A2",
+    }
+    for cell, formula in formulas.items():
+        ws[cell] = formula
+    path = tmp_path / "blanks.xlsx"
+    wb.save(path)
+    
+    model = WorkbookModel.from_file(str(path), ["A1"], list(formulas))
+    results = model(A1=np.array([1.0, -5.0]))
+    np.testing.assert_allclose(results, [
+        [2.0, 1.0, 2.0, 7.0, 4.0, 1.0, np.nan, 0.0],
+        [-1.0, -5.0, 8.0, -17.0, -2.0, -5.0, np.nan, 0.0],
+    ])
+    pickled = pickle.loads(pickle.dumps(model))
+    np.testing.assert_allclose(pickled(A1=np.array([1.0, -5.0])), results)
@@ -0,0 +1,53 @@
+"""
+Cold-start import budget of the engine, measured with ``python -X importtime``.
+"""
+import os
+import re
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time allowed for the engine, in milliseconds; 0 skips
+# the budget, e.g. on shared CI machines
+BUDGET_MS = float(os.environ.get("MCSIM_IMPORT_BUDGET_MS", 750))
+
+# Loaded only by the features that need them
+HEAVY = (
+    "scipy.stats", "scipy.optimize", "pandas", "matplotlib", "seaborn",
+    "xlwings", "openpyxl", "numexpr"
+)
+
+def _run(module: str, *args: str) -> subprocess.CompletedProcess:
+    """Import ``module`` in a fresh interpreter."""
+    script = (
+        f"import sys, {module}\n"
+        f"print('\\n'.join(name for name in {HEAVY!r} if name in sys.modules))"
+    )
+    return subprocess.run(
+        [sys.executable, *args, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+def _import_times(module: str) -> dict:
+    """Cumulative import time in microseconds of every module imported."""
+    output = _run(module, "-X", "importtime").stderr
+    times = {}
+    for match in re.finditer(r"^import time:\s+\d+ \|\s+(\d+) \| +(\S+)$", output, re.MULTILINE):
+        times[match.group(2)] = int(match.group(1))
+    return times
+
+@pytest.mark.parametrize("module", ["src.core.simulation", "src.excel.addin", "src.server"])
+def test_no_heavy_imports(module):
+    loaded = _run(module).stdout.split()
+    assert not loaded, f"{module} imports {', '.join(loaded)}"
+
+@pytest.mark.skipif(BUDGET_MS <= 0, reason="import budget disabled by MCSIM_IMPORT_BUDGET_MS")
+def test_engine_import_budget():
+    # Best of three, to ride out a cold disk cache
+    elapsed = min(_import_times("src.core.simulation")["src.core.simulation"] for _ in range(3))
+    assert elapsed / 1000 < BUDGET_MS, f"src.core.simulation took {elapsed / 1000:.0f} ms to import"
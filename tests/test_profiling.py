@@ -0,0 +1,94 @@
+"""
+Tests for run timing, hooks and profiling.
+"""
+import numpy as np
+import pytest
+from src.core.profiling import STAGES, RunHooks
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import Normal, Uniform
+from src.excel.addin import MonteCarloAddin
+from src.excel.io import MemoryIO
+
+DISTS = {"a": Normal(10, 2), "b": Uniform(0, 5)}
+CORRELATION = np.array([[1.0, 0.5], [0.5, 1.0]])
+
+def _model(a, b):
+    return a * b
+
+class Recorder(RunHooks):
+    def __init__(self):
+        self.events = []
+
+    def on_start(self, iterations):
+        self.events.append(("start", iterations))
+
+    def on_chunk(self, chunk):
+        self.events.append(("chunk", chunk.stop - chunk.start))
+
+    def on_finish(self, stats):
+        self.events.append(("finish", stats.iterations))
+
+@pytest.mark.parametrize("backend", ["thread", "process", "serial"])
+def test_run_stats(backend):
+    """Every chunk is timed per stage and reported to the hooks."""
+    hooks = Recorder()
+    config = SimulationConfig(iterations=5000, seed=3, backend=backend, num_threads=2, chunk_size=1000)
+    results = MonteCarloEngine(config, hooks=[hooks]).run_simulation(_model, DISTS, CORRELATION)
+    stats = results.run_stats
+
+    assert stats.iterations == 5000 and stats.iterations_per_second > 0
+    assert stats.chunk_count == 5
+    assert sorted(chunk.start for chunk in stats.slowest_chunks) == [0, 1000, 2000, 3000, 4000]
+    assert list(stats.stages) == list(STAGES)
+    assert set(stats.phases) == {"setup", "evaluate", "finalize"}
+    assert sum(stats.busy_seconds.values()) == pytest.approx(sum(chunk.seconds for chunk in stats.slowest_chunks))
+    assert 0 < stats.utilisation <= 1
+    assert stats.allocated_bytes == results.nbytes
+    assert hooks.events == [("start", 5000)] + [("chunk", 1000)] * 5 + [("finish", 5000)]
+
+def test_profilers():
+    """cProfile and tracemalloc capture is opt-in and leaves results unchanged."""
+    config = SimulationConfig(iterations=4000, seed=3, num_threads=2, chunk_size=1000)
+    plain = MonteCarloEngine(config).run_simulation(_model, DISTS)
+    assert plain.run_stats.profile is None and plain.run_stats.peak_memory is None
+
+    config.profile = "cprofile"
+    profiled = MonteCarloEngine(config).run_simulation(_model, DISTS)
+    np.testing.assert_array_equal(profiled, plain)
+    functions = [row[0] for row in profiled.run_stats.profile_table(100)]
+    assert any("_draw_inputs" in name for name in functions)
+    assert profiled.run_stats.profile_stats().total_calls > 0
+
+    config.profile = "tracemalloc"
+    traced = MonteCarloEngine(config).run_simulation(_model, DISTS)
+    assert traced.run_stats.peak_memory >= traced.nbytes
+
+    config.profile = "perf"
+    with pytest.raises(ValueError, match="Unknown profiler"):
+        MonteCarloEngine(config)
+
+def test_write_run_stats():
+    """The add-in writes the report as tables on its own sheet."""
+    io = MemoryIO({"Sheet1": [["a", "Normal", 10, 2], ["b", "Uniform", 0, 5]]})
+    addin = MonteCarloAddin(io=io)
+    with pytest.raises(ValueError, match="No run statistics"):
+        addin.write_run_stats()
+
+    addin.run_simulation("A1:D2", "F1", num_iterations=3000, seed=1, profile="cprofile")
+    addin.write_run_stats(limit=5)
+    cells = io.sheets["MC Profile"]
+    assert cells[0, 0] == "Statistic" and cells[1, :2].tolist() == ["Iterations", 3000]
+    headers = [row[0] for row in cells.tolist() if row[0] in ("Phase", "Stage", "Worker", "Function", "Start")]
+    assert headers == ["Phase", "Stage", "Worker", "Function", "Start"]
+
+def test_streamed_stats_stay_bounded():
+    """Long runs keep totals and only the slowest chunks."""
+    config = SimulationConfig(iterations=20000, seed=3, chunk_size=500, slowest_chunks=3)
+    engine = MonteCarloEngine(config)
+    total = sum(len(block) for block in engine.run_simulation_stream(_model, DISTS, block_size=2000))
+    stats = engine.last_stats
+    assert total == stats.iterations == 20000
+    assert stats.chunk_count == 40
+    seconds = [chunk.seconds for chunk in stats.slowest_chunks]
+    assert len(seconds) == 3 and seconds == sorted(seconds, reverse=True)
+    assert sum(stats.busy_seconds.values()) >= sum(seconds)
@@ -0,0 +1,105 @@
+"""
+Tests for sampling utilities.
+"""
+import numpy as np
+import pytest
+from scipy.stats import qmc
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.utils.sampling import get_sampler, latin_hypercube_blocks, latin_hypercube_sampling
+
+def _is_latin_hypercube(samples):
+    """Check every dimension has exactly one sample in each stratum."""
+    n = len(samples)
+    strata = np.sort(np.floor(samples * n), axis=0)
+    return np.all(strata == np.arange(n)[:, None])
+
+def test_latin_hypercube_sampling():
+    """Test LHS strata and in-place output."""
+    rng = np.random.default_rng(42)
+    out = np.empty((1000, 7), order="F")
+    
+    samples = latin_hypercube_sampling(1000, 7, rng, out=out)
+    
+    assert samples is out
+    assert _is_latin_hypercube(samples)
+    assert np.all((samples >= 0) & (samples < 1))
+    
+    with pytest.raises(ValueError):
+        latin_hypercube_sampling(1000, 7, rng, out=np.empty((10, 7)))
+
+@pytest.mark.parametrize("n_samples", [1, 2, 999, 10007])
+def test_latin_hypercube_blocks(n_samples):
+    """Test blocks together form a single Latin Hypercube."""
+    blocks = [
+        block.copy()
+        for block in latin_hypercube_blocks(n_samples, 5, 400, np.random.default_rng(1))
+    ]
+    samples = np.concatenate(blocks)
+    
+    assert all(len(block) <= 400 for block in blocks)
+    assert samples.shape == (n_samples, 5)
+    assert _is_latin_hypercube(samples)
+    
+    if n_samples > 1000:
+        # Each block is spread over the whole unit interval
+        hist, _ = np.histogram(blocks[0][:, 0], np.linspace(0, 1, 5))
+        assert hist.min() > 60
+        assert np.abs(np.corrcoef(samples.T) - np.eye(5)).max() < 0.05
+
+@pytest.mark.parametrize("name", ["random", "lhs", "sobol", "halton"])
+def test_samplers(name):
+    """Test every sampler draws uniform points in blocks."""
+    sampler = get_sampler(name, 3, np.random.default_rng(0))
+    samples = np.concatenate(list(sampler.blocks(4096, 1000)))
+    
+    assert samples.shape == (4096, 3)
+    assert np.all((samples >= 0) & (samples < 1))
+    assert np.abs(samples.mean(axis=0) - 0.5).max() < 0.02
+
+@pytest.mark.parametrize("name", ["lhs", "sobol", "halton"])
+def test_sample_chunk(name):
+    """Test chunks are random access rows of one design."""
+    sampler = get_sampler(name, 4, np.random.default_rng(3))
+    seeds = np.random.SeedSequence(0).spawn(3)
+    chunks = [
+        sampler.sample_chunk(1024, start, stop, seed)
+        for (start, stop), seed in zip([(0, 300), (300, 700), (700, 1024)], seeds)
+    ]
+    samples = np.concatenate(chunks)
+    
+    assert samples.shape == (1024, 4)
+    np.testing.assert_array_equal(
+        sampler.sample_chunk(1024, 300, 700, seeds[1]),
+        chunks[1]
+    )
+    if name == "lhs":
+        assert _is_latin_hypercube(samples)
+    else:
+        engine = getattr(qmc, sampler.engine_name)(
+            4, scramble=True, seed=np.random.default_rng(sampler.design_seed)
+        )
+        np.testing.assert_allclose(samples, engine.random(1024))
+
+def test_rqmc_replicates():
+    """Test scrambled Sobol' beats random sampling on a smooth model."""
+    def model(x1, x2):
+        return np.exp(x1) * x2
+    
+    inputs = {'x1': lambda u: u, 'x2': lambda u: u}
+    exact = (np.e - 1) / 2
+    
+    errors = {}
+    for sampler in ["random", "sobol"]:
+        config = SimulationConfig(
+            iterations=16 * 1024,
+            seed=42,
+            sampler=sampler,
+            replicates=16
+        )
+        results = MonteCarloEngine(config).run_simulation(model, inputs)
+        
+        assert results.replicate_means.shape == (16,)
+        assert abs(np.mean(results) - exact) < 4 * results.standard_error
+        errors[sampler] = results.standard_error
+    
+    assert errors["sobol"] < errors["random"] / 10
@@ -0,0 +1,59 @@
+"""
+Tests for sensitivity analysis.
+"""
+import numpy as np
+import pytest
+from scipy import stats
+from src.core.sensitivity import analyze_sensitivity, sobol_indices
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import Normal, Uniform
+
+def test_analyze_sensitivity():
+    """Test the measures against scipy and the exact linear coefficients."""
+    rng = np.random.default_rng(0)
+    inputs = {name: rng.normal(size=20000) for name in ("a", "b", "c")}
+    output = 3 * inputs["a"] - inputs["b"] + 0.1 * rng.normal(size=20000)
+    # Ties in the output are ranked by their average position
+    output = np.round(output, 1)
+    
+    result = analyze_sensitivity(inputs, output)
+    
+    expected = [stats.spearmanr(values, output).statistic for values in inputs.values()]
+    np.testing.assert_allclose(result.spearman, expected, atol=1e-12)
+    np.testing.assert_allclose(result.src, np.array([3, -1, 0]) / output.std(), atol=0.01)
+    assert result.r_squared > 0.99
+    assert [name for name, _, _ in result.tornado()] == ["a", "b", "c"]
+    low, high = result.low[0], result.high[0]
+    assert low < result.base < high
+
+def test_tornado_from_simulation():
+    config = SimulationConfig(iterations=10000, seed=2, keep_inputs=True)
+    results = MonteCarloEngine(config).run_simulation(
+        "2 * x - y",
+        {"x": Uniform(0, 1), "y": Normal(0, 0.1)}
+    )
+    result = analyze_sensitivity(results.inputs, results)
+    assert result.tornado()[0][0] == "x"
+    assert result.spearman[1] < 0 < result.spearman[0]
+    
+    with pytest.raises(ValueError):
+        analyze_sensitivity(results.inputs, np.column_stack([results, results]))
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_sobol_indices(backend):
+    """Test the indices of y = x1 + 2 x2 + x1 x3 on independent uniforms."""
+    inputs = {name: Uniform(0, 1) for name in ("x1", "x2", "x3")}
+    result = sobol_indices("x1 + 2*x2 + x1*x3", inputs, 100000, seed=1, backend=backend)
+    
+    variance = 7 / 9 - 9 / 16 + 4 / 12
+    first = np.array([2.25 / 12, 4 / 12, 0.25 / 12]) / variance
+    assert result.evaluations == 500000
+    assert result.variance == pytest.approx(variance, rel=0.01)
+    np.testing.assert_allclose(result.first, first, atol=0.02)
+    np.testing.assert_allclose(result.total[1], 4 / 12 / variance, atol=0.02)
+    # x1 and x3 interact, so their total effects exceed their first-order ones
+    assert result.total[2] > result.first[2] + 0.01
+    np.testing.assert_array_equal(
+        result.first,
+        sobol_indices("x1 + 2*x2 + x1*x3", inputs, 100000, seed=1, backend="serial").first
+    )
@@ -0,0 +1,90 @@
+"""
+Tests for the simulation server and its client.
+"""
+import os
+import signal
+import numpy as np
+import pytest
+from multiprocessing import AuthenticationError
+from src.server import protocol
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import get_distribution
+from src.server import ServerError, SimulationClient, SimulationServer
+
+INPUTS = [["revenue", "normal", 100, 15], ["cost", "uniform", 40, 60]]
+
+@pytest.fixture
+def server():
+    server = SimulationServer(("127.0.0.1", 0), authkey=b"test", num_threads=2).start()
+    yield server
+    server.stop()
+
+def test_run_matches_local_engine(server):
+    with SimulationClient(server.address, authkey=b"test") as client:
+        assert client.ping()["jobs"] == 0
+        results = client.run(INPUTS, model="revenue - cost", iterations=20000, seed=5)
+        summary = client.run_summary(INPUTS, model="revenue - cost", iterations=20000, seed=5)
+        assert client.stats() == {"ok": True, "jobs": 2, "pools": ["thread"], "workbooks": 0}
+        
+    inputs = {name: get_distribution(dist, params) for name, dist, *params in INPUTS}
+    engine = MonteCarloEngine(SimulationConfig(iterations=20000, seed=5))
+    expected = engine.run_simulation("revenue - cost", inputs)
+    np.testing.assert_array_equal(results, expected)
+    assert results.iterations == 20000
+    assert summary["Mean"] == pytest.approx(expected.mean())
+
+def test_errors_are_raised_by_the_client(server):
+    with SimulationClient(server.address, authkey=b"test") as client:
+        with pytest.raises(ValueError, match="unknown inputs"):
+            client.run(INPUTS, model="revenue - capex", iterations=100)
+        with pytest.raises(ValueError, match="Unknown sampler"):
+            client.run(INPUTS, iterations=100, sampler="bogus")
+        # The connection stays usable after a failed job
+        assert len(client.run(INPUTS, iterations=100)) == 100
+        
+    with pytest.raises(AuthenticationError):
+        SimulationClient(server.address, authkey=b"wrong").ping()
+
+def test_shutdown(server):
+    SimulationClient(server.address, authkey=b"test").shutdown()
+    server._thread.join(timeout=5)
+    assert not server._thread.is_alive()
+    with pytest.raises(OSError):
+        SimulationClient(server.address, authkey=b"test").ping()
+
+def test_broken_pool_is_replaced(server):
+    """A job on a pool whose worker died fails, and the next gets a new pool."""
+    with SimulationClient(server.address, authkey=b"test") as client:
+        assert len(client.run(INPUTS, iterations=20000, chunk_size=5000, backend="process")) == 20000
+        pool = server._pools["process"]
+        for process in list(pool._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+        
+        with pytest.raises(ServerError, match="BrokenProcessPool"):
+            client.run(INPUTS, iterations=20000, chunk_size=5000, backend="process")
+        assert "process" not in client.stats()["pools"]
+        assert len(client.run(INPUTS, iterations=20000, chunk_size=5000, backend="process")) == 20000
+        assert server._pools["process"] is not pool
+
+def test_default_authkey(tmp_path, monkeypatch):
+    """A random key is created once per user, private to them."""
+    monkeypatch.delenv("MCSIM_AUTHKEY", raising=False)
+    monkeypatch.setattr(protocol, "AUTHKEY_FILE", str(tmp_path / "mcsim" / "authkey"))
+    key = protocol.default_authkey()
+    assert len(key) == 64 and protocol.default_authkey() == key
+    if os.name == "posix":
+        assert os.stat(protocol.AUTHKEY_FILE).st_mode & 0o777 == 0o600
+        os.chmod(protocol.AUTHKEY_FILE, 0o644)
+        with pytest.raises(PermissionError):
+            protocol.default_authkey()
+    monkeypatch.setenv("MCSIM_AUTHKEY", "from-env")
+    assert protocol.default_authkey() == b"from-env"
+
+def test_remote_errors():
+    """Errors are rebuilt from their type name and message, never unpickled."""
+    error = protocol.remote_error(protocol.error_message(KeyError("x")))
+    assert type(error) is KeyError
+    error = protocol.remote_error({"type": "LinAlgError", "message": "Singular matrix"})
+    assert isinstance(error, protocol.ServerError) and str(error) == "LinAlgError: Singular matrix"
+    assert isinstance(protocol.remote_error({"type": "SystemExit", "message": ""}), protocol.ServerError)
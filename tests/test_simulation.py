@@ -4,6 +4,7 @@ Tests for the core Monte Carlo simulation engine.
 import numpy as np
 import pytest
 from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.distributions import Gamma, Normal
 
 def test_basic_simulation():
     """Test basic Monte Carlo simulation with normal distribution."""
@@ -110,3 +111,224 @@ def test_stopping_criteria():
     
     # Check that simulation stopped early
     assert len(results) < 10000
+
+def _sum_model(x1, x2):
+    """Module-level model so it can be pickled to worker processes."""
+    return x1 * x2 + np.sin(x1)
+
+def _stack_model(x1, x2):
+    """Module-level model with two outputs per iteration."""
+    return np.column_stack([x1, x2])
+
+@pytest.mark.parametrize("backend", ["serial", "process"])
+def test_backends_match_threaded(backend):
+    """Test that every execution backend reproduces the threaded results."""
+    input_distributions = {
+        'x1': lambda u: 2 * u - 1,
+        'x2': lambda u: u ** 2
+    }
+    
+    expected = MonteCarloEngine(
+        SimulationConfig(iterations=10001, seed=7, num_threads=3)
+    ).run_simulation(_sum_model, input_distributions, use_lhs=True)
+    
+    results = MonteCarloEngine(
+        SimulationConfig(iterations=10001, seed=7, num_threads=3, backend=backend)
+    ).run_simulation(_sum_model, input_distributions, use_lhs=True)
+    
+    assert len(results) == 10001
+    np.testing.assert_array_equal(results, expected)
+
+@pytest.mark.parametrize("sampler", ["random", "lhs", "sobol"])
+def test_reproducible_across_workers(sampler):
+    """Test results only depend on the seed, not on backend or worker count."""
+    input_distributions = {'x1': Normal(0, 1), 'x2': Gamma(2, 1.5)}
+    
+    def run(backend, num_threads):
+        config = SimulationConfig(
+            iterations=20000,
+            seed=11,
+            num_threads=num_threads,
+            backend=backend,
+            sampler=sampler,
+            chunk_size=3000
+        )
+        return MonteCarloEngine(config).run_simulation(_sum_model, input_distributions)
+    
+    expected = run("serial", 1)
+    for backend, num_threads in [("thread", 1), ("thread", 4), ("process", 3)]:
+        np.testing.assert_array_equal(run(backend, num_threads), expected)
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_declared_output_shape(backend):
+    """Test results are written into a buffer of the declared shape."""
+    config = SimulationConfig(
+        iterations=10000,
+        seed=5,
+        backend=backend,
+        output_shape=(2,),
+        chunk_size=3000
+    )
+    input_distributions = {'x1': Normal(0, 1), 'x2': Gamma(2, 1.5)}
+    
+    results = MonteCarloEngine(config).run_simulation(_stack_model, input_distributions)
+    probed = MonteCarloEngine(
+        SimulationConfig(iterations=10000, seed=5, chunk_size=3000)
+    ).run_simulation(_stack_model, input_distributions)
+    
+    assert results.shape == (10000, 2)
+    np.testing.assert_array_equal(results, probed)
+    
+    config.output_shape = ()
+    with pytest.raises(ValueError):
+        MonteCarloEngine(config).run_simulation(_stack_model, input_distributions)
+
+def test_simulation_stream():
+    """Test streaming simulation yields bounded blocks covering all iterations."""
+    config = SimulationConfig(iterations=10000, seed=42, block_size=3000)
+    engine = MonteCarloEngine(config)
+    
+    def model(x):
+        return x
+    
+    input_distributions = {
+        'x': lambda u: u  # Uniform(0,1)
+    }
+    
+    blocks = list(engine.run_simulation_stream(model, input_distributions))
+    
+    assert [len(b) for b in blocks] == [3000, 3000, 3000, 1000]
+    assert abs(np.mean(np.concatenate(blocks)) - 0.5) < 0.01
+
+@pytest.mark.parametrize("block_size", [300, 1000, 2500])
+def test_stream_matches_run(block_size):
+    """Blocks of any size cut the same chunk streams as a whole run."""
+    config = SimulationConfig(iterations=5000, seed=9, chunk_size=1000, replicates=2, sampler="lhs")
+    expected = MonteCarloEngine(config).run_simulation(_product, {"x": Normal(0, 1), "y": Gamma(2.0, 1.0)})
+    blocks = list(MonteCarloEngine(config).run_simulation_stream(
+        _product,
+        {"x": Normal(0, 1), "y": Gamma(2.0, 1.0)},
+        block_size=block_size
+    ))
+    
+    assert all(len(block) == block_size for block in blocks[:-1])
+    np.testing.assert_array_equal(np.concatenate(blocks), expected)
+
+@pytest.mark.parametrize("percentile", [None, 95])
+def test_tolerance_stopping(percentile):
+    """Test built-in confidence interval tolerance stops sampling early."""
+    config = SimulationConfig(
+        iterations=1000000,
+        seed=42,
+        tolerance=0.01,
+        tolerance_percentile=percentile,
+        batch_size=1000
+    )
+    engine = MonteCarloEngine(config)
+    
+    def model(x):
+        return x
+    
+    results = engine.run_simulation(model, {'x': lambda u: u})
+    
+    assert results.converged
+    assert results.iterations == len(results) < 1000000
+    assert results.convergence_trace[-1].iterations == results.iterations
+    assert results.convergence_trace[-1].half_width <= 0.01
+    assert all(p.half_width > 0.01 for p in results.convergence_trace[:-1])
+
+def _product(x, y):
+    return x * y
+
+@pytest.mark.parametrize("backend, tolerance", [
+    ("thread", None),
+    ("process", None),
+    ("thread", 1e-9),
+])
+def test_keep_inputs(backend, tolerance):
+    """Kept input samples line up with the outputs of every iteration."""
+    config = SimulationConfig(
+        iterations=5000,
+        seed=3,
+        backend=backend,
+        tolerance=tolerance,
+        batch_size=1500,
+        chunk_size=1024,
+        keep_inputs=True
+    )
+    engine = MonteCarloEngine(config)
+    results = engine.run_simulation(
+        _product,
+        {"x": Normal(0, 1), "y": Gamma(2.0, 1.0)},
+        correlation_matrix=np.array([[1.0, 0.5], [0.5, 1.0]])
+    )
+    
+    assert list(results.inputs) == ["x", "y"]
+    assert all(len(values) == results.iterations for values in results.inputs.values())
+    np.testing.assert_allclose(results, results.inputs["x"] * results.inputs["y"])
+    
+    plain = MonteCarloEngine(SimulationConfig(iterations=10, seed=3)).run_simulation(
+        lambda x: x, {"x": Normal(0, 1)}
+    )
+    assert plain.inputs is None
+
+def test_result_slices():
+    """Slices count their own rows and only keep inputs that still line up."""
+    config = SimulationConfig(iterations=1000, seed=3, keep_inputs=True)
+    results = MonteCarloEngine(config).run_simulation(_product, {"x": Normal(0, 1), "y": Gamma(2.0, 1.0)})
+    
+    head = results[:100]
+    assert head.iterations == 100 and head.inputs is None
+    assert results[::-1].inputs is None
+    assert results[np.argsort(results)].inputs is None
+    column = results.reshape(len(results), 1)
+    assert column.iterations == 1000 and column.inputs is results.inputs
+    assert results[:].inputs is results.inputs
+
+@pytest.mark.parametrize("sampler, method", [("random", "copula"), ("sobol", "iman_conover")])
+def test_extend_simulation(sampler, method):
+    """Extending a run gives the same iterations as running the longer one."""
+    dists = {"x": Normal(0, 1), "y": Gamma(2.0, 1.0)}
+    correlation = np.array([[1.0, 0.5], [0.5, 1.0]])
+    
+    def engine(iterations):
+        return MonteCarloEngine(SimulationConfig(
+            iterations=iterations,
+            seed=11,
+            sampler=sampler,
+            correlation_method=method,
+            chunk_size=1000,
+            keep_inputs=True
+        ))
+        
+    short = engine(2500).run_simulation(_product, dists, correlation)
+    full = engine(6000).run_simulation(_product, dists, correlation)
+    extended = engine(6000).extend_simulation(_product, dists, short, correlation)
+    
+    np.testing.assert_array_equal(extended, full)
+    np.testing.assert_array_equal(extended.inputs["y"], full.inputs["y"])
+    # Only complete chunks are a prefix of the longer run
+    np.testing.assert_array_equal(full[:2000], short[:2000])
+    np.testing.assert_array_equal(engine(2500).extend_simulation(_product, dists, full, correlation), short)
+    with pytest.raises(ValueError, match="extended"):
+        engine(6000).extend_simulation(_product, dists, short, correlation, use_lhs=True)
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_resimulate(backend):
+    """Changed inputs are redrawn from the kept uniforms, like a fresh seeded run."""
+    correlation = np.array([[1.0, 0.6], [0.6, 1.0]])
+    config = SimulationConfig(iterations=3000, seed=8, backend=backend, chunk_size=700, keep_draws=True)
+    engine = MonteCarloEngine(config)
+    before = engine.run_simulation(_product, {"x": Normal(0, 1), "y": Gamma(2.0, 1.0)}, correlation)
+    assert before.inputs is None
+    
+    changed = {"x": Normal(0, 1), "y": Gamma(3.0, 1.0)}
+    after = engine.resimulate(_product, changed, correlation)
+    fresh = MonteCarloEngine(config).run_simulation(_product, changed, correlation)
+    np.testing.assert_array_equal(after, fresh)
+    assert not np.array_equal(after, before)
+    
+    with pytest.raises(ValueError, match="keep_draws"):
+        engine.resimulate(_product, changed)
+    with pytest.raises(ValueError, match="keep_draws"):
+        MonteCarloEngine(SimulationConfig(iterations=10)).resimulate(_product, changed)
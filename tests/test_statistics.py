@@ -0,0 +1,107 @@
+"""
+Tests for the streaming statistics accumulator.
+"""
+import numpy as np
+import pytest
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.utils.statistics import Histogram, Reservoir, StatsAccumulator, binned_kde
+
+def test_accumulator_matches_numpy():
+    """Test merged chunk accumulators match full-array statistics."""
+    rng = np.random.default_rng(42)
+    data = rng.lognormal(size=200000)
+    
+    # Accumulate disjoint chunks separately, as workers would, then merge
+    chunks = np.array_split(data, 7)
+    stats = StatsAccumulator()
+    for chunk in chunks:
+        stats.merge(StatsAccumulator().update(chunk))
+    
+    assert stats.count == len(data)
+    assert stats.mean == pytest.approx(np.mean(data), rel=1e-12)
+    assert stats.std == pytest.approx(np.std(data), rel=1e-12)
+    assert stats.min == np.min(data)
+    assert stats.max == np.max(data)
+    
+    # Quantile sketch error is measured in rank
+    ordered = np.sort(data)
+    for p in [0.1, 5, 50, 95, 99.9]:
+        rank = np.searchsorted(ordered, stats.percentile(p)) / len(data)
+        assert abs(rank - p / 100) < 0.002
+
+def test_simulation_summary():
+    """Test the engine reduces streamed blocks into summary statistics."""
+    config = SimulationConfig(iterations=100000, seed=42, block_size=30000)
+    engine = MonteCarloEngine(config)
+    
+    def model(x):
+        return x
+    
+    stats = engine.run_simulation_summary(model, {'x': lambda u: u})
+    
+    assert stats.count == 100000
+    assert abs(stats.mean - 0.5) < 0.01
+    assert abs(stats.percentile(95) - 0.95) < 0.01
+
+def test_adaptive_histogram():
+    """Test streamed and merged histograms match np.histogram on their edges."""
+    rng = np.random.default_rng(7)
+    data = np.concatenate([rng.normal(5, 2, 50000), [1e3, -50.0, np.nan, np.inf]])
+    
+    streamed = Histogram(256)
+    for chunk in np.array_split(data, 11):
+        streamed.update(chunk)
+    merged = Histogram(256)
+    for chunk in np.array_split(data, 4):
+        merged.merge(Histogram(256).update(chunk))
+        
+    expected, _ = np.histogram(data[np.isfinite(data)], streamed.edges)
+    np.testing.assert_array_equal(streamed.counts, expected)
+    np.testing.assert_array_equal(merged.counts, streamed.counts)
+    np.testing.assert_array_equal(merged.edges, streamed.edges)
+    assert streamed.count == len(data) - 1 and streamed.overflow == 1
+    
+    counts, edges = streamed.rebin(40)
+    assert counts.sum() == len(data) - 2
+    assert len(counts) <= 40 and edges[0] <= -50 and edges[-1] > 1e3
+
+def test_fixed_histogram():
+    histogram = Histogram(10, range=(0, 10)).update([-1, 0, 5, 9.5, 10, 11])
+    np.testing.assert_array_equal(histogram.counts, [1, 0, 0, 0, 0, 1, 0, 0, 0, 2])
+    assert (histogram.underflow, histogram.overflow) == (1, 1)
+    with pytest.raises(ValueError):
+        histogram.merge(Histogram(10))
+
+def test_binned_kde():
+    """Test the FFT density integrates to one and matches the normal pdf."""
+    data = np.random.default_rng(3).normal(size=200000)
+    grid, density = binned_kde(Histogram(1024).update(data))
+    
+    assert np.sum(density) * (grid[1] - grid[0]) == pytest.approx(1, abs=1e-6)
+    pdf = np.exp(-grid ** 2 / 2) / np.sqrt(2 * np.pi)
+    assert np.max(np.abs(density - pdf)) < 0.01
+    
+def test_summary_histogram():
+    engine = MonteCarloEngine(SimulationConfig(iterations=30000, seed=1, block_size=8192))
+    stats = engine.run_simulation_summary(lambda x: x, {'x': lambda u: u}, bins=128)
+    assert stats.histogram.count == 30000
+    assert stats.histogram.edges[0] >= 0 and stats.histogram.edges[-1] <= 2
+
+def test_reservoir():
+    """Test every row is equally likely to end up in the sample."""
+    hits = np.zeros(1000)
+    for seed in range(200):
+        reservoir = Reservoir(100, seed=seed)
+        for start in range(0, 1000, 64):
+            stop = min(start + 64, 1000)
+            reservoir.update(np.column_stack([np.arange(start, stop), -np.arange(start, stop)]))
+        rows = reservoir.rows
+        assert rows.shape == (100, 2) and reservoir.seen == 1000
+        assert len(np.unique(rows[:, 0])) == 100
+        np.testing.assert_array_equal(rows[:, 1], -rows[:, 0])
+        hits[rows[:, 0]] += 1
+        
+    # Each row is kept with probability 0.1, i.e. 20 times in 200 runs
+    deciles = hits.reshape(10, 100).sum(axis=1)
+    assert np.all(np.abs(deciles - 2000) < 200)
+    assert len(Reservoir(5).update(np.arange(3)).rows) == 3
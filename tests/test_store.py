@@ -0,0 +1,64 @@
+"""
+Tests for the on-disk run store.
+"""
+import numpy as np
+import pytest
+from src.core.simulation import MonteCarloEngine, SimulationConfig
+from src.core.store import RunStore
+from src.distributions import Normal, Uniform
+from src.excel.addin import MonteCarloAddin
+from src.excel.io import MemoryIO
+
+DISTS = {"a": Normal(10, 2), "b": Uniform(0, 5)}
+
+def _mapped(array):
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array is not None
+
+def test_store_round_trip(tmp_path):
+    """A stored run reopens memory-mapped, equal to the run in memory."""
+    store = RunStore(str(tmp_path))
+    config = SimulationConfig(iterations=5000, seed=4, chunk_size=1000, keep_inputs=True)
+    run = store.run(MonteCarloEngine(config), "a * b", DISTS, description="a * b")
+    expected = MonteCarloEngine(config).run_simulation("a * b", DISTS)
+    
+    reopened = RunStore(str(tmp_path)).open(run.run_id)
+    assert store.runs() == [run.run_id]
+    assert reopened.info["description"] == "a * b" and reopened.info["config"]["seed"] == 4
+    assert _mapped(reopened.results) and _mapped(reopened.inputs["a"])
+    np.testing.assert_array_equal(reopened.results, expected)
+    np.testing.assert_array_equal(reopened.inputs["b"], expected.inputs["b"])
+    assert reopened.inputs["a"].flags.c_contiguous
+    
+    stats = reopened.stats(bins=64, block_size=700)
+    assert stats.count == 5000
+    assert stats.summary()["Max"] == expected.max()
+    
+    store.delete(run.run_id)
+    assert store.runs() == []
+    with pytest.raises(ValueError, match="Unknown run"):
+        store.open(run.run_id)
+
+def test_store_output_shapes_and_early_stop(tmp_path):
+    """Multi-output models and runs that stop early are stored as run."""
+    store = RunStore(str(tmp_path))
+    config = SimulationConfig(iterations=20000, seed=1, tolerance=1.0, batch_size=2000)
+    run = store.run(MonteCarloEngine(config), lambda a, b: np.column_stack([a, a + b]), DISTS)
+    
+    assert run.info["converged"] and run.results.converged
+    assert run.results.shape == (2000, 2)
+    assert run.inputs is None
+    expected = MonteCarloEngine(config).run_simulation(lambda a, b: np.column_stack([a, a + b]), DISTS)
+    np.testing.assert_array_equal(run.results, expected)
+
+def test_addin_store(tmp_path):
+    """The add-in stores its runs; what-if runs are refused rather than left unstored."""
+    io = MemoryIO({"Sheet1": [["a", "Normal", 10, 2], ["b", "Uniform", 0, 5]]})
+    addin = MonteCarloAddin(io=io, store=RunStore(str(tmp_path)))
+    addin.run_simulation("A1:D2", "F1", num_iterations=1000, seed=2, model="a * b")
+    assert addin.store.runs() == [addin.current_run_id]
+    
+    with pytest.raises(ValueError, match="what_if"):
+        addin.run_simulation("A1:D2", "F1", num_iterations=1000, seed=2, model="a * b", what_if=True)
+    assert len(addin.store.runs()) == 1